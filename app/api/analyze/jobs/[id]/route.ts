@@ -0,0 +1,37 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+const PYTHON_SERVICE_URL = process.env.PYTHON_SERVICE_URL || 'http://localhost:8000';
+
+/**
+ * API Route: GET /api/analyze/jobs/[id]
+ *
+ * Status of a background analysis job, with results once done
+ * Pass ?wait=<seconds> (up to 30) to long-poll until the job finishes
+ */
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ id: string }> }
+) {
+  try {
+    const { id } = await params;
+    const response = await fetch(
+      `${PYTHON_SERVICE_URL}/jobs/${encodeURIComponent(id)}${request.nextUrl.search}`,
+      { method: 'GET' }
+    );
+
+    const data = await response.json();
+    if (!response.ok) {
+      return NextResponse.json(
+        { success: false, error: data.detail || 'Could not read analysis job' },
+        { status: response.status }
+      );
+    }
+
+    return NextResponse.json({ success: true, ...data }, { status: 200 });
+  } catch {
+    return NextResponse.json(
+      { success: false, error: 'Cannot connect to Python service' },
+      { status: 503 }
+    );
+  }
+}
@@ -0,0 +1,58 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+const PYTHON_SERVICE_URL = process.env.PYTHON_SERVICE_URL || 'http://localhost:8000';
+
+/**
+ * API Route: POST /api/analyze/jobs
+ *
+ * Queues a session recording for background analysis in the Python service
+ * Returns the job id at once; poll GET /api/analyze/jobs/[id] for the results
+ */
+export async function POST(request: NextRequest) {
+  try {
+    const formData = await request.formData();
+    const file = formData.get('file');
+
+    if (!file || !(file instanceof Blob)) {
+      return NextResponse.json(
+        { success: false, error: 'No audio file provided' },
+        { status: 400 }
+      );
+    }
+
+    const pythonFormData = new FormData();
+    pythonFormData.append('file', file);
+
+    const response = await fetch(`${PYTHON_SERVICE_URL}/jobs${request.nextUrl.search}`, {
+      method: 'POST',
+      body: pythonFormData,
+    });
+
+    const data = await response.json();
+    if (!response.ok) {
+      return NextResponse.json(
+        { success: false, error: data.detail || 'Could not queue analysis' },
+        { status: response.status }
+      );
+    }
+
+    return NextResponse.json({ success: true, ...data }, { status: 202 });
+  } catch (error) {
+    console.error('Analysis job API error:', error);
+
+    if (error instanceof TypeError && error.message.includes('fetch')) {
+      return NextResponse.json(
+        {
+          success: false,
+          error: 'Speech analysis service is not running. Please start the Python service.',
+        },
+        { status: 503 }
+      );
+    }
+
+    return NextResponse.json(
+      { success: false, error: 'Internal server error' },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,74 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+const PYTHON_SERVICE_URL = process.env.PYTHON_SERVICE_URL || 'http://localhost:8000';
+
+/**
+ * API Route: POST /api/analyze/pcm
+ *
+ * Proxies raw PCM (application/octet-stream) to the Python service
+ * The body is streamed through as-is: not buffered, no multipart parsing
+ * and no WAV encoding
+ */
+export async function POST(request: NextRequest) {
+  try {
+    if (!request.body || request.headers.get('Content-Length') === '0') {
+      return NextResponse.json(
+        { success: false, error: 'No audio data provided' },
+        { status: 400 }
+      );
+    }
+
+    // Sample format and latency budget travel in headers; query parameters pass straight through
+    const headers: Record<string, string> = { 'Content-Type': 'application/octet-stream' };
+    for (const name of ['Content-Length', 'X-Sample-Rate', 'X-Channels', 'X-Encoding', 'X-Analysis-Budget-Ms']) {
+      const value = request.headers.get(name);
+      if (value) headers[name] = value;
+    }
+
+    const startedAt = Date.now();
+    const response = await fetch(`${PYTHON_SERVICE_URL}/analyze/pcm${request.nextUrl.search}`, {
+      method: 'POST',
+      headers,
+      body: request.body,
+      // Required by Node's fetch to send a streamed request body
+      duplex: 'half',
+    } as RequestInit);
+
+    if (!response.ok) {
+      const error = await response.json();
+      const retryAfter = response.headers.get('Retry-After');
+      return NextResponse.json(
+        { success: false, error: error.detail || 'Analysis failed' },
+        { status: response.status, headers: retryAfter ? { 'Retry-After': retryAfter } : undefined }
+      );
+    }
+
+    const data = await response.json();
+
+    const serverTiming = [response.headers.get('Server-Timing'), `proxy;dur=${Date.now() - startedAt}`]
+      .filter(Boolean)
+      .join(', ');
+
+    return NextResponse.json(data, {
+      status: 200,
+      headers: { 'Server-Timing': serverTiming },
+    });
+  } catch (error) {
+    console.error('PCM analysis API error:', error);
+
+    if (error instanceof TypeError && error.message.includes('fetch')) {
+      return NextResponse.json(
+        {
+          success: false,
+          error: 'Speech analysis service is not running. Please start the Python service.',
+        },
+        { status: 503 }
+      );
+    }
+
+    return NextResponse.json(
+      { success: false, error: 'Internal server error' },
+      { status: 500 }
+    );
+  }
+}
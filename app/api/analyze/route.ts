@@ -25,22 +25,34 @@ export async function POST(request: NextRequest) {
     const pythonFormData = new FormData();
     pythonFormData.append('file', file);
 
-    const response = await fetch(`${PYTHON_SERVICE_URL}/analyze`, {
+    // Query parameters (priority, session_id, ...) pass straight through
+    const startedAt = Date.now();
+    const response = await fetch(`${PYTHON_SERVICE_URL}/analyze${request.nextUrl.search}`, {
       method: 'POST',
       body: pythonFormData,
     });
 
     if (!response.ok) {
       const error = await response.json();
+      // 429 from admission control tells the client when to retry
+      const retryAfter = response.headers.get('Retry-After');
       return NextResponse.json(
         { success: false, error: error.detail || 'Analysis failed' },
-        { status: response.status }
+        { status: response.status, headers: retryAfter ? { 'Retry-After': retryAfter } : undefined }
       );
     }
 
     const data = await response.json();
 
-    return NextResponse.json(data, { status: 200 });
+    // Pass the service's per-stage timings through, plus the proxy round trip
+    const serverTiming = [response.headers.get('Server-Timing'), `proxy;dur=${Date.now() - startedAt}`]
+      .filter(Boolean)
+      .join(', ');
+
+    return NextResponse.json(data, {
+      status: 200,
+      headers: { 'Server-Timing': serverTiming },
+    });
   } catch (error) {
     console.error('Analysis API error:', error);
 
@@ -65,14 +77,25 @@ export async function POST(request: NextRequest) {
 /**
  * API Route: GET /api/analyze
  *
- * Health check for the analysis service
+ * Readiness check for the analysis service: 200 once its workers are warm,
+ * 503 with status 'warming' while they start, 503 'unhealthy' if it is down
  */
 export async function GET() {
   try {
-    const response = await fetch(`${PYTHON_SERVICE_URL}/health`, {
+    const response = await fetch(`${PYTHON_SERVICE_URL}/ready`, {
       method: 'GET',
     });
 
+    if (response.status === 503) {
+      const data = await response.json().catch(() => null);
+      if (data?.status === 'warming') {
+        return NextResponse.json(
+          { status: 'warming', pythonService: data },
+          { status: 503, headers: { 'Retry-After': response.headers.get('Retry-After') || '1' } }
+        );
+      }
+    }
+
     if (!response.ok) {
       return NextResponse.json(
         { status: 'unhealthy', error: 'Python service not responding' },
@@ -4,6 +4,7 @@
  */
 
 import { NextRequest, NextResponse } from 'next/server';
+import { compactAudio, toOriginalTranscript } from '@/lib/audio/compaction';
 
 export async function POST(request: NextRequest) {
   try {
@@ -31,9 +32,23 @@ export async function POST(request: NextRequest) {
     if (userAudioFile) console.log(`User audio: ${userAudioFile.size} bytes`);
     if (aiAudioFile) console.log(`AI audio: ${aiAudioFile.size} bytes`);
 
+    // Trim dead air (16 kHz mono) before upload; fall back to the original recording
+    const [userCompacted, aiCompacted] = await Promise.all([
+      userAudioFile ? compactAudio(userAudioFile) : null,
+      aiAudioFile ? compactAudio(aiAudioFile) : null,
+    ]);
+    for (const [name, compacted] of [['User', userCompacted], ['AI', aiCompacted]] as const) {
+      if (compacted) {
+        console.log(
+          `${name} audio compacted: ${compacted.original_duration}s -> ${compacted.compacted_duration}s`
+        );
+      }
+    }
+
     // Convert files to base64
-    const userAudioBytes = userAudioFile ? Buffer.from(await userAudioFile.arrayBuffer()) : null;
-    const aiAudioBytes = aiAudioFile ? Buffer.from(await aiAudioFile.arrayBuffer()) : null;
+    const toBase64 = async (file: Blob) => Buffer.from(await file.arrayBuffer()).toString('base64');
+    const userAudioData = userAudioFile ? await toBase64(userCompacted?.audio ?? userAudioFile) : null;
+    const aiAudioData = aiAudioFile ? await toBase64(aiCompacted?.audio ?? aiAudioFile) : null;
 
     // Create prompt for transcription
     const promptBoth = `You are transcribing an Arabic conversation between a user and an AI assistant named Omar.
@@ -44,11 +59,11 @@ I will provide you with two audio files:
 1. User audio: Contains only the user's speech
 2. AI audio: Contains only Omar's (AI assistant) responses
 
-Please transcribe this conversation and format it as follows:
-User (U): [user's words in Arabic]
-Omar (O): [Omar's words in Arabic]
-U: [user's words]
-O: [Omar's words]
+Please transcribe this conversation and format it as follows, starting each line with the time (minutes:seconds) at which that speech begins in its own audio file:
+[00:00] User (U): [user's words in Arabic]
+[00:04] Omar (O): [Omar's words in Arabic]
+[00:09] U: [user's words]
+[00:12] O: [Omar's words]
 
 Important:
 - Transcribe ALL speech accurately in Arabic
@@ -61,8 +76,8 @@ Start the transcription now:`;
 
     const promptSingleUser = `You are transcribing an Arabic speech track spoken by the user in Palestinian Arabic dialect.
 
-Please transcribe the audio and format each line as:
-User (U): [words in Arabic]
+Please transcribe the audio and format each line as follows, starting with the time (minutes:seconds) at which that speech begins:
+[00:00] User (U): [words in Arabic]
 
 Important:
 - Transcribe ALL speech accurately in Arabic
@@ -73,8 +88,8 @@ Start the transcription now:`;
 
     const promptSingleAI = `You are transcribing an Arabic speech track spoken by an AI assistant named Omar in Palestinian Arabic.
 
-Please transcribe the audio and format each line as:
-Omar (O): [words in Arabic]
+Please transcribe the audio and format each line as follows, starting with the time (minutes:seconds) at which that speech begins:
+[00:00] Omar (O): [words in Arabic]
 
 Important:
 - Transcribe ALL speech accurately in Arabic
@@ -90,22 +105,22 @@ Start the transcription now:`;
           role: 'user',
           parts: [
             { text: prompt },
-            ...(userAudioBytes
+            ...(userAudioData
               ? [
                   {
                     inlineData: {
                       mimeType: 'audio/wav',
-                      data: userAudioBytes.toString('base64'),
+                      data: userAudioData,
                     },
                   },
                 ]
               : []),
-            ...(aiAudioBytes
+            ...(aiAudioData
               ? [
                   {
                     inlineData: {
                       mimeType: 'audio/wav',
-                      data: aiAudioBytes.toString('base64'),
+                      data: aiAudioData,
                     },
                   },
                 ]
@@ -124,7 +139,7 @@ Start the transcription now:`;
 
     let data: any = null;
     let lastErr: string | null = null;
-    const prompt = userAudioBytes && aiAudioBytes ? promptBoth : (userAudioBytes ? promptSingleUser : promptSingleAI);
+    const prompt = userAudioData && aiAudioData ? promptBoth : (userAudioData ? promptSingleUser : promptSingleAI);
 
     for (const a of modelAttempts) {
       try {
@@ -149,13 +164,23 @@ Start the transcription now:`;
       throw new Error(lastErr || 'Gemini transcription failed');
     }
 
-    const transcript = data.candidates?.[0]?.content?.parts?.[0]?.text || 'No transcript generated';
+    const timedTranscript: string = data.candidates?.[0]?.content?.parts?.[0]?.text || '';
+
+    // Timestamps refer to the compacted audio; map them back to the original recordings
+    const lines = toOriginalTranscript(timedTranscript, {
+      user: userCompacted?.segments ?? null,
+      ai: aiCompacted?.segments ?? null,
+    });
+    const transcript = timedTranscript
+      ? timedTranscript.replace(/^\s*\[\d+:\d{1,2}(?:\.\d+)?\]\s*/gm, '')
+      : 'No transcript generated';
 
     console.log('✅ Transcript generated successfully');
 
     return NextResponse.json({
       success: true,
       transcript,
+      lines,
     });
   } catch (error) {
     console.error('Transcription error:', error);
@@ -2,7 +2,9 @@
 
 import { useEffect, useState } from 'react';
 import {
+  EncodedContour,
   SpeechAnalysisResult,
+  decodeContour,
   getConfidenceLevel,
   getFluencyLevel,
   generateFeedback,
@@ -97,6 +99,14 @@ export default function FluencyMeter({ result, transcript, className = '' }: Flu
         </div>
       </div>
 
+      {/* Pitch contour of the analyzed chunk */}
+      {result.contours?.pitch && (
+        <div className="mb-4">
+          <span className="text-xs text-gray-400">Pitch</span>
+          <PitchSparkline contour={result.contours.pitch} duration={result.duration} />
+        </div>
+      )}
+
       {/* Detailed Metrics */}
       <details className="mb-4">
         <summary className="text-sm text-gray-400 cursor-pointer hover:text-gray-300 transition-colors">
@@ -111,7 +121,10 @@ export default function FluencyMeter({ result, transcript, className = '' }: Flu
           <MetricRow label="Pause Ratio" value={`${result.timing.pause_ratio}%`} />
           <MetricRow label="Mean Pitch" value={`${result.pitch.mean} Hz`} />
           <MetricRow label="Mean Intensity" value={`${result.intensity.mean} dB`} />
-          <MetricRow label="Voice Quality (HNR)" value={`${result.voice_quality.harmonics_to_noise_ratio} dB`} />
+          <MetricRow
+            label="Voice Quality (HNR)"
+            value={result.voice_quality.harmonics_to_noise_ratio === null ? '—' : `${result.voice_quality.harmonics_to_noise_ratio} dB`}
+          />
         </div>
       </details>
 
@@ -142,6 +155,48 @@ function MetricRow({ label, value }: { label: string; value: string }) {
   );
 }
 
+function PitchSparkline({ contour, duration }: { contour: EncodedContour; duration: number }) {
+  const { times, values } = decodeContour(contour);
+  const voiced = values.filter((value) => !Number.isNaN(value));
+  if (voiced.length === 0 || duration <= 0) {
+    return null;
+  }
+
+  const low = Math.min(...voiced);
+  const range = Math.max(Math.max(...voiced) - low, 1);
+
+  // One polyline per voiced stretch; unvoiced frames (NaN) break the line
+  const segments: string[] = [];
+  let points: string[] = [];
+  values.forEach((value, i) => {
+    if (Number.isNaN(value)) {
+      if (points.length > 1) segments.push(points.join(' '));
+      points = [];
+      return;
+    }
+    const x = (times[i] / duration) * 100;
+    const y = 28 - ((value - low) / range) * 24;
+    points.push(`${x.toFixed(2)},${y.toFixed(2)}`);
+  });
+  if (points.length > 1) segments.push(points.join(' '));
+
+  return (
+    <svg viewBox="0 0 100 30" preserveAspectRatio="none" className="w-full h-8 mt-1">
+      {segments.map((segment, i) => (
+        <polyline
+          key={i}
+          points={segment}
+          fill="none"
+          stroke="currentColor"
+          strokeWidth={1}
+          vectorEffect="non-scaling-stroke"
+          className="text-cyan-400"
+        />
+      ))}
+    </svg>
+  );
+}
+
 function getScoreColor(score: number): string {
   if (score >= 80) return 'bg-gradient-to-r from-green-500 to-emerald-400';
   if (score >= 60) return 'bg-gradient-to-r from-blue-500 to-cyan-400';
@@ -49,6 +49,7 @@ interface UseGeminiLiveOptions {
   onPhaseUpdate?: (phaseInfo: PhaseInfo) => void;
   enableAnalysis?: boolean; // Enable speech analysis feature
   analysisIntervalSeconds?: number; // How often to analyze (default: 10 seconds)
+  analysisBudgetMs?: number; // Latency budget per live analysis; costly stages are skipped to meet it (default: 1000)
 }
 
 export function useGeminiLive({
@@ -61,6 +62,7 @@ export function useGeminiLive({
   onPhaseUpdate,
   enableAnalysis = false,
   analysisIntervalSeconds = 10,
+  analysisBudgetMs = 1000,
 }: UseGeminiLiveOptions) {
   const [status, setStatus] = useState<ConnectionStatus>('disconnected');
   const [isRecording, setIsRecording] = useState(false);
@@ -92,6 +94,9 @@ export function useGeminiLive({
   const analysisTimerRef = useRef<NodeJS.Timeout | null>(null);
   const isAnalyzingRef = useRef(false);
   const analysisServiceAvailableRef = useRef<boolean | null>(null);
+  // Identifies this session's live chunks so the service can drop stale ones
+  const analysisSessionIdRef = useRef<string>(`${Date.now()}-${Math.random().toString(36).slice(2)}`);
+  const analysisRetryAtRef = useRef<number>(0);
 
   // Audio recording refs for transcription
   const userAudioChunksRef = useRef<Float32Array[]>([]);
@@ -107,11 +112,23 @@ export function useGeminiLive({
       return;
     }
 
+    // Service asked us to back off (queue full); keep buffering until then
+    if (Date.now() < analysisRetryAtRef.current) {
+      return;
+    }
+
     try {
       // Check analysis service availability lazily once
       if (analysisServiceAvailableRef.current === null) {
         try {
           const health = await fetch('/api/analyze', { method: 'GET' });
+          if (health.status === 503) {
+            const body = await health.json().catch(() => null);
+            if (body?.status === 'warming') {
+              // Workers are still warming up; keep buffering and ask again on the next interval
+              return;
+            }
+          }
           analysisServiceAvailableRef.current = health.ok;
           if (!health.ok) {
             console.warn('Speech analysis unavailable; skipping analysis this session');
@@ -143,23 +160,35 @@ export function useGeminiLive({
       // Clear buffer after combining
       audioBufferRef.current = [];
 
-      // Convert Float32Array to WAV blob
-      const wavBlob = createWavBlob(combinedAudio, 48000);
-
-      // Send to analysis API
-      const formData = new FormData();
-      formData.append('file', wavBlob, 'audio.wav');
-
-      const response = await fetch('/api/analyze', {
+      // Send raw 16-bit samples (half the bytes of Float32); no WAV encoding or multipart needed
+      const params = new URLSearchParams({
+        priority: 'interactive',
+        session_id: analysisSessionIdRef.current,
+        contours: '120', // Enough points for the meter's pitch sparkline
+        pitch_backend: 'numpy', // Cheaper tracker for live chunks; reports keep Praat
+      });
+      const response = await fetch(`/api/analyze/pcm?${params}`, {
         method: 'POST',
-        body: formData,
+        headers: {
+          'Content-Type': 'application/octet-stream',
+          'X-Sample-Rate': '48000',
+          'X-Encoding': 'int16',
+          'X-Analysis-Budget-Ms': String(analysisBudgetMs),
+        },
+        body: float32To16BitPCM(combinedAudio),
       });
 
       if (response.ok) {
         const data = await response.json();
-        if (data.success && onAnalysisResult) {
+        // Chunks that were mostly the character talking carry no metrics worth showing
+        if (data.success && onAnalysisResult && !data.results.insufficient_speech) {
           onAnalysisResult(data.results);
         }
+      } else if (response.status === 429) {
+        const retryAfter = Number(response.headers.get('Retry-After')) || 5;
+        analysisRetryAtRef.current = Date.now() + retryAfter * 1000;
+      } else if (response.status === 409) {
+        // Superseded by a newer chunk from this session; its result will arrive instead
       } else {
         const txt = await response.text();
         console.warn('Speech analysis failed:', txt);
@@ -175,7 +204,7 @@ export function useGeminiLive({
     } finally {
       isAnalyzingRef.current = false;
     }
-  }, [enableAnalysis, onAnalysisResult]);
+  }, [enableAnalysis, onAnalysisResult, analysisBudgetMs]);
 
   /**
    * Create WAV blob from Float32Array audio data
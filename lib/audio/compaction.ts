@@ -0,0 +1,96 @@
+/**
+ * Silence compaction client
+ * Trims dead air from recordings via the Python service before they are
+ * sent for transcription, and maps compacted times back to the original
+ */
+
+const PYTHON_SERVICE_URL = process.env.PYTHON_SERVICE_URL || 'http://localhost:8000';
+
+// [compacted start, original start, duration] in seconds
+export type CompactionSegment = [number, number, number];
+
+export interface CompactedAudio {
+  audio: Blob; // 16-bit WAV
+  sample_rate: number;
+  channels: number;
+  original_duration: number;
+  compacted_duration: number;
+  segments: CompactionSegment[];
+}
+
+/**
+ * Compact a WAV recording (server side)
+ * Returns null if the service is unavailable or found no speech, so the
+ * caller can fall back to the original recording
+ */
+export async function compactAudio(file: File): Promise<CompactedAudio | null> {
+  try {
+    const upload = new FormData();
+    upload.append('file', file, file.name || 'audio.wav');
+
+    const response = await fetch(`${PYTHON_SERVICE_URL}/compact`, { method: 'POST', body: upload });
+    if (!response.ok) {
+      console.warn(`Audio compaction failed: ${response.status}`);
+      return null;
+    }
+
+    // multipart/form-data: the time map as JSON, and the WAV as is rather than base64 in JSON
+    const parts = await response.formData();
+    const audio = parts.get('audio');
+    const metadata = JSON.parse(String(parts.get('metadata')));
+    return audio instanceof Blob && metadata.compacted_duration > 0 ? { ...metadata, audio } : null;
+  } catch (error) {
+    console.warn('Audio compaction unavailable:', error);
+    return null;
+  }
+}
+
+/**
+ * Map a time in the compacted audio (e.g. a transcript timestamp) to the original recording
+ */
+export function toOriginalTime(segments: CompactionSegment[], compactedTime: number): number {
+  let segment = segments[0];
+  for (const candidate of segments) {
+    if (candidate[0] > compactedTime) break;
+    segment = candidate;
+  }
+  if (!segment) return compactedTime;
+
+  const [compactedStart, originalStart, duration] = segment;
+  return originalStart + Math.min(Math.max(compactedTime - compactedStart, 0), duration);
+}
+
+export interface TranscriptLine {
+  speaker: 'user' | 'ai';
+  start: number | null; // seconds into the original recording of the speaker's track
+  text: string;
+}
+
+/**
+ * Speaker lines ("U: ...", "O: ...") of a transcript whose lines start with
+ * "[MM:SS]" timestamps in the audio sent for transcription, timed in the
+ * original recordings via each track's compaction map (null when the track
+ * was sent uncompacted)
+ */
+export function toOriginalTranscript(
+  transcript: string,
+  timeMaps: { user: CompactionSegment[] | null; ai: CompactionSegment[] | null }
+): TranscriptLine[] {
+  const lines: TranscriptLine[] = [];
+  for (const raw of transcript.split('\n')) {
+    const match = raw.trim().match(/^(?:\[(\d+):(\d{1,2}(?:\.\d+)?)\]\s*)?(.*)$/);
+    const text = match?.[3].trim();
+    if (!match || !text) continue;
+
+    const speaker = /^(Omar \(O\)|O):/.test(text) ? 'ai' : /^(User \(U\)|U):/.test(text) ? 'user' : null;
+    if (!speaker) continue;
+    const segments = timeMaps[speaker];
+    let start: number | null = null;
+    if (match[1] !== undefined) {
+      const compactedTime = Number(match[1]) * 60 + Number(match[2]);
+      start = segments ? toOriginalTime(segments, compactedTime) : compactedTime;
+    }
+    lines.push({ speaker, start, text });
+  }
+  return lines;
+}
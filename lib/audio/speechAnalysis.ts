@@ -17,10 +17,11 @@ export interface IntensityMetrics {
   max: number;
 }
 
+// null when skipped to meet a latency budget (see AnalysisBudgetReport)
 export interface VoiceQualityMetrics {
-  harmonics_to_noise_ratio: number;
-  jitter: number;
-  shimmer: number;
+  harmonics_to_noise_ratio: number | null;
+  jitter: number | null;
+  shimmer: number | null;
 }
 
 export interface TimingMetrics {
@@ -29,6 +30,7 @@ export interface TimingMetrics {
   pause_ratio: number;
   speech_rate: number;
   articulation_rate: number;
+  syllable_count: number;
 }
 
 export interface SpeechScores {
@@ -37,6 +39,29 @@ export interface SpeechScores {
   overall: number;
 }
 
+export interface TimelineEntry {
+  start: number;
+  end: number;
+  results: Omit<SpeechAnalysisResult, 'timeline'> | null; // null when the chunk has no voiced speech
+}
+
+export interface AnalysisBudgetReport {
+  available_ms: number;
+  planned_ms: number;
+  profile: 'full' | 'fast';
+  computed: string[]; // Metric names, e.g. 'pitch' or 'voice_quality.jitter'
+  estimated: string[]; // Computed at reduced resolution
+  omitted: string[];
+}
+
+// Base64 little-endian arrays; decode with decodeContour
+export interface EncodedContour {
+  count: number;
+  dtype: 'float16' | 'float32';
+  times: string; // float32 seconds
+  values: string; // Hz for pitch (NaN where unvoiced), dB for intensity
+}
+
 export interface SpeechAnalysisResult {
   duration: number;
   pitch: PitchMetrics;
@@ -44,6 +69,10 @@ export interface SpeechAnalysisResult {
   voice_quality: VoiceQualityMetrics;
   timing: TimingMetrics;
   scores: SpeechScores;
+  timeline?: TimelineEntry[]; // Per-chunk metrics, present for long recordings
+  insufficient_speech?: boolean; // Too little speech to analyze; only timing is meaningful
+  budget?: AnalysisBudgetReport; // Present when the request carried a latency budget
+  contours?: { pitch?: EncodedContour; intensity?: EncodedContour }; // Present when requested with ?contours=N
 }
 
 export interface AnalysisResponse {
@@ -89,6 +118,41 @@ export async function analyzeSpeech(
   }
 }
 
+function base64Bytes(data: string): ArrayBuffer {
+  const binary = atob(data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes.buffer;
+}
+
+function halfToFloat(half: number): number {
+  const sign = half & 0x8000 ? -1 : 1;
+  const exponent = (half >> 10) & 0x1f;
+  const fraction = half & 0x3ff;
+  if (exponent === 0) return sign * 2 ** -14 * (fraction / 1024);
+  if (exponent === 0x1f) return fraction ? NaN : sign * Infinity;
+  return sign * 2 ** (exponent - 15) * (1 + fraction / 1024);
+}
+
+/**
+ * Decode a contour from the analysis results into plain arrays
+ */
+export function decodeContour(contour: EncodedContour): { times: Float32Array; values: Float32Array } {
+  const times = new Float32Array(base64Bytes(contour.times));
+  if (contour.dtype === 'float32') {
+    return { times, values: new Float32Array(base64Bytes(contour.values)) };
+  }
+
+  const halves = new DataView(base64Bytes(contour.values));
+  const values = new Float32Array(contour.count);
+  for (let i = 0; i < contour.count; i++) {
+    values[i] = halfToFloat(halves.getUint16(i * 2, true));
+  }
+  return { times, values };
+}
+
 /**
  * Detect Arabic filler words in transcript
  * Common Arabic fillers: يعني (ya'ni), وﷲ (wallah), اه (eh), يعني كذا (like this)
@@ -203,7 +267,8 @@ export function generateFeedback(
     if (results.pitch.coefficient_of_variation > 25) {
       feedback.push('Work on maintaining a steadier pitch');
     }
-    if (results.voice_quality.harmonics_to_noise_ratio < 10) {
+    const hnr = results.voice_quality.harmonics_to_noise_ratio;
+    if (hnr !== null && hnr < 10) {
       feedback.push('Focus on clear vocal production');
     }
   } else if (results.scores.confidence >= 80) {
@@ -0,0 +1,205 @@
+"""
+Admission control for analysis jobs
+A bounded priority queue in front of the worker pool: live-meter chunks
+run ahead of bulk/report jobs, a full queue is rejected with a retry hint
+instead of growing without bound, and a queued live chunk is dropped once
+a newer chunk from the same session arrives
+
+Configuration (environment variables):
+    ADMISSION_QUEUE_SIZE  Jobs allowed to wait for a worker (default: 4 per worker)
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+
+from workers import POOL_SIZE
+
+ADMISSION_QUEUE_SIZE = int(os.environ.get("ADMISSION_QUEUE_SIZE", str(4 * POOL_SIZE)))
+
+# Lower runs first
+PRIORITIES = {
+    "interactive": 0,
+    "bulk": 1,
+}
+
+
+class QueueFull(Exception):
+    """The queue has no room; retry after retry_after seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Analysis queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Superseded(Exception):
+    """A newer job from the same session replaced this one while it was queued"""
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+    key: Optional[str] = field(default=None, compare=False)
+    bounded: bool = field(default=True, compare=False)
+    dropped: bool = field(default=False, compare=False)
+
+
+class AdmissionController:
+    """
+    Grants up to `slots` concurrent jobs and queues the rest by priority
+
+    Jobs of equal priority run in arrival order. Slots are handed directly
+    from a finishing job to the next waiter, so queued work cannot be
+    overtaken by a newcomer. Unbounded (follow-up) jobs wait in the same
+    order but neither count toward max_queued nor are ever shed.
+    """
+
+    def __init__(self, slots: int = POOL_SIZE, max_queued: int = ADMISSION_QUEUE_SIZE):
+        self.slots = slots
+        self.max_queued = max_queued
+        self.running = 0
+        self.rejected = 0
+        self.superseded = 0
+        self.avg_job_seconds = 1.0  # Moving average, for Retry-After
+
+        self._heap: List[_Waiter] = []
+        self._waiting = 0  # Bounded waiters only
+        self._follow_ups = 0
+        self._seq = itertools.count()
+        self._by_key: Dict[str, _Waiter] = {}
+
+    @property
+    def queued(self) -> int:
+        return self._waiting + self._follow_ups
+
+    def retry_after(self) -> int:
+        """Seconds until the queue has likely drained enough to accept a job"""
+        return max(1, math.ceil(self.avg_job_seconds * (self.queued + 1) / self.slots))
+
+    def check(self, priority: str = "bulk") -> None:
+        """
+        Raise QueueFull if a job of this priority would be rejected now
+
+        Lets a multi-job request fail up front instead of part-way through.
+        """
+        if self._waiting >= self.max_queued and self._lowest_below(PRIORITIES[priority]) is None:
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "interactive", key: Optional[str] = None,
+                   bounded: bool = True) -> AsyncIterator[None]:
+        """
+        Hold a worker slot for the duration of the block
+
+        Args:
+            priority: "interactive" or "bulk"
+            key: Session key; a queued job with the same key is superseded
+            bounded: Reject with QueueFull when the queue is full. Pass False
+                for follow-up jobs of a request that was already admitted;
+                these are never rejected or shed.
+
+        Raises:
+            QueueFull: The queue is full (or this job was displaced by a
+                higher-priority one while queued)
+            Superseded: A newer job with the same key arrived while queued
+        """
+        await self._acquire(PRIORITIES[priority], key, bounded)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.avg_job_seconds += 0.2 * (time.monotonic() - started - self.avg_job_seconds)
+            self._release()
+
+    async def _acquire(self, priority: int, key: Optional[str], bounded: bool) -> None:
+        if key is not None:
+            previous = self._by_key.pop(key, None)
+            if previous is not None:
+                self.superseded += 1
+                self._drop(previous, Superseded("Superseded by a newer chunk from the same session"))
+
+        if self.running < self.slots and self.queued == 0:
+            self.running += 1
+            return
+
+        if bounded and self._waiting >= self.max_queued:
+            # Shed the newest lower-priority job to make room, else this one
+            victim = self._lowest_below(priority)
+            if victim is None:
+                self.rejected += 1
+                raise QueueFull(self.retry_after())
+            self.rejected += 1
+            self._drop(victim, QueueFull(self.retry_after()))
+
+        waiter = _Waiter(priority, next(self._seq), asyncio.get_running_loop().create_future(), key, bounded)
+        heapq.heappush(self._heap, waiter)
+        self._count(waiter, 1)
+        if key is not None:
+            self._by_key[key] = waiter
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                self._release()  # Granted a slot just as the caller went away
+            elif not waiter.dropped:
+                self._forget(waiter)
+            raise
+
+    def _release(self) -> None:
+        self.running -= 1
+        while self._heap:
+            waiter = heapq.heappop(self._heap)
+            if waiter.dropped:
+                continue
+            self._count(waiter, -1)
+            if waiter.key is not None and self._by_key.get(waiter.key) is waiter:
+                del self._by_key[waiter.key]
+            self.running += 1
+            waiter.future.set_result(None)
+            return
+
+    def _drop(self, waiter: _Waiter, error: Exception) -> None:
+        """Remove a queued waiter and fail it with error"""
+        self._forget(waiter)
+        if not waiter.future.done():
+            waiter.future.set_exception(error)
+
+    def _forget(self, waiter: _Waiter) -> None:
+        # Left in the heap and skipped when popped
+        waiter.dropped = True
+        self._count(waiter, -1)
+        if waiter.key is not None and self._by_key.get(waiter.key) is waiter:
+            del self._by_key[waiter.key]
+
+    def _count(self, waiter: _Waiter, change: int) -> None:
+        if waiter.bounded:
+            self._waiting += change
+        else:
+            self._follow_ups += change
+
+    def _lowest_below(self, priority: int) -> Optional[_Waiter]:
+        """Newest bounded waiter with lower priority than `priority`, if any"""
+        candidates = [w for w in self._heap if not w.dropped and w.bounded and w.priority > priority]
+        return max(candidates, default=None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "rejected": self.rejected,
+            "superseded": self.superseded,
+        }
+
+
+admission = AdmissionController()
@@ -3,17 +3,116 @@ Speech Analysis Service using Parselmouth (Praat)
 Analyzes audio files for fluency and confidence metrics
 """
 
+import time
+
+_import_started = time.perf_counter()
+
 import parselmouth
 from parselmouth.praat import call
-import numpy as np
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import asyncio
+import json
 import tempfile
 import os
-from typing import Dict, Any
+import uuid
+from typing import AsyncIterator, Dict, Any, List, Optional, Set, Tuple
 import uvicorn
 
-app = FastAPI(title="Speech Analysis Service")
+import energy
+import scoring
+from admission import PRIORITIES, QueueFull, Superseded, admission
+from batch import BATCH_MAX_ITEMS, archive_items
+from budget import Plan, cost_model, coverage, reported_plan
+from compaction import COMPACT_MAX_PAUSE_SECONDS, compact_upload
+from compressed import DecodedTooLarge, UnsupportedAudio, check_decodable, compressed_format, decode_compressed
+from contours import DEFAULT_CONTOUR_DTYPE, pack_contours
+from features import (
+    DEFAULT_INTENSITY_BACKEND, DEFAULT_PROFILE, FEATURE_GROUPS, AnalysisError, AnalysisOptions, FeatureGraph
+)
+from jobs import FINISHED, get_job_store
+from long_audio import LONG_AUDIO_MIN_SECONDS, analyze_long_wav, wav_duration
+from metrics import (
+    AUDIO_SECONDS, ERRORS, IN_FLIGHT, INSUFFICIENT_SPEECH, PEAK_MEMORY, REJECTED, REQUEST_SECONDS, STARTUP_SECONDS,
+    StageTimer, observe_stages, observe_warm_up, server_timing_header
+)
+from pitch import DEFAULT_PITCH_BACKEND
+from result_cache import cache_key, result_cache
+from streaming import STREAM_WINDOW_SECONDS, analyze_window, end_session, get_session
+from uploads import Source, Upload, UploadTooLarge, file_chunks, open_source, read_upload
+from wav_io import (
+    DECODE_BLOCK_FRAMES, MalformedWav, WavInfo, bytes_per_frame, decode_pcm, is_wav, iter_pcm_blocks, parse_wav_header,
+    pcm_wav_info
+)
+from workers import (
+    POOL_SIZE, collect_warm_up, pool_ready, run_in_pool, run_measured, shutdown_pool, start_pool, startup_report
+)
+
+# Seconds spent importing this module and everything it depends on
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+
+# Above this many samples, PCM is decoded straight into an allocated Praat
+# Sound instead of into a NumPy array that Praat then copies
+IN_PLACE_DECODE_SAMPLES = 1 << 22
+
+# Longest GET /jobs/{id}?wait= long-poll, in seconds
+JOB_MAX_WAIT_SECONDS = 30
+
+# How often worker warm-up reports are collected
+WARM_UP_POLL_SECONDS = 0.1
+
+# Background analyses started by POST /jobs
+job_tasks: Set[asyncio.Task] = set()
+
+
+def record_warm_up() -> None:
+    """Move worker warm-up reports into the metrics"""
+    for report in collect_warm_up():
+        observe_warm_up(report)
+    ready_seconds = startup_report()["ready_seconds"]
+    if ready_seconds is not None:
+        STARTUP_SECONDS.labels("workers_ready").set(ready_seconds)
+
+
+async def beat_jobs() -> None:
+    """Keep this process's job lease, and fail the jobs of processes that lost theirs"""
+    store = get_job_store()
+    while True:
+        await store.beat()
+        await asyncio.sleep(store.lease / 3)
+
+
+async def watch_warm_up() -> None:
+    """Collect warm-up reports as workers start, including those replacing recycled workers"""
+    while True:
+        record_warm_up()
+        await asyncio.sleep(WARM_UP_POLL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start and warm the workers now, so the first request finds them ready
+    STARTUP_SECONDS.labels("import").set(IMPORT_SECONDS)
+    start_pool()
+    # Opening the job store fails the jobs an earlier run left unfinished
+    await asyncio.to_thread(get_job_store)
+    job_heartbeat = asyncio.create_task(beat_jobs())
+    warm_up_watcher = asyncio.create_task(watch_warm_up())
+    yield
+    warm_up_watcher.cancel()
+    job_heartbeat.cancel()
+    for task in job_tasks:
+        task.cancel()
+    await asyncio.gather(*job_tasks, return_exceptions=True)
+    shutdown_pool()
+
+
+app = FastAPI(title="Speech Analysis Service", lifespan=lifespan)
 
 # Enable CORS for Next.js frontend
 app.add_middleware(
@@ -25,151 +124,415 @@ app.add_middleware(
 )
 
 
-def analyze_audio_file(file_path: str) -> Dict[str, Any]:
+def pcm_sound(content: bytes, info: WavInfo) -> parselmouth.Sound:
+    """
+    Decode a PCM payload into a Praat Sound
+
+    Long recordings are decoded block by block into the Sound's own
+    buffer, so the samples are held once as float64 rather than twice.
+    """
+    n_frames = info.data_size // bytes_per_frame(info)
+    if n_frames * info.channels < IN_PLACE_DECODE_SAMPLES:
+        return parselmouth.Sound(decode_pcm(content, info), sampling_frequency=info.sample_rate)
+
+    sound = call("Create Sound from formula", "upload", info.channels, 0, n_frames / info.sample_rate,
+                 info.sample_rate, "0")
+    decode_pcm(content, info, out=sound.values)
+    return sound
+
+
+def gated_speech_seconds(content: bytes, info: WavInfo) -> float:
+    """Seconds of speech in a PCM payload by the speech gate's frame levels (see energy.py)"""
+    frame = max(1, int(round(energy.GATE_FRAME_SECONDS * info.sample_rate)))
+    block = max(1, DECODE_BLOCK_FRAMES // frame) * frame
+    levels, threshold = energy.speech_gate(lambda: iter_pcm_blocks(content, info, block), info.sample_rate, frame)
+    return energy.gated_speech_seconds(levels, frame / info.sample_rate, threshold)
+
+
+def insufficient_speech_results(duration: float, speaking_time: float,
+                                options: Optional[AnalysisOptions] = None) -> Dict[str, Any]:
+    """
+    Lightweight result for audio with too little speech to analyze
+
+    Timing reflects the speech the gate found; pitch, intensity, voice
+    quality and scores are zero, and "insufficient_speech" is set.
+    """
+    results = build_results(
+        duration=duration,
+        mean_pitch=0.0, std_pitch=0.0, min_pitch=0.0, max_pitch=0.0,
+        mean_intensity=0.0, std_intensity=0.0, max_intensity=0.0,
+        mean_hnr=0.0, jitter=0.0, shimmer=0.0,
+        speaking_time=speaking_time, syllable_count=0
+    )
+    results["scores"] = {"confidence": 0.0, "fluency": 0.0, "overall": 0.0}
+    results = select_groups(results, (options or AnalysisOptions()).features)
+    results["insufficient_speech"] = True
+    return results
+
+
+def load_sound(content: bytes, pcm_info: Optional[WavInfo] = None, path: Optional[str] = None) -> parselmouth.Sound:
+    """
+    Decode an uploaded audio buffer into a Praat Sound
+
+    WAV and raw PCM (described by pcm_info) are decoded in memory, and
+    compressed uploads (see compressed.py) are first decoded to PCM; other
+    formats fall back to Praat's file readers, reading path directly when
+    the upload is already on disk
+
+    Raises:
+        UnsupportedAudio: If Praat cannot read the upload either
+    """
+    if pcm_info is None and is_wav(content):
+        pcm_info = parse_wav_header(content)
+    elif pcm_info is None and compressed_format(content) is not None:
+        content, pcm_info = decode_compressed(content, path)
+    if pcm_info is not None:
+        return pcm_sound(content, pcm_info)
+    tmp_path = None
+    try:
+        if path is not None:
+            return parselmouth.Sound(path)
+        with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
+            tmp_file.write(content)
+            tmp_path = tmp_file.name
+        return parselmouth.Sound(tmp_path)
+    except parselmouth.PraatError:
+        raise UnsupportedAudio("Not a recognised audio format; send WAV, PCM, WebM, Ogg or MP4")
+    finally:
+        if tmp_path is not None:
+            os.unlink(tmp_path)
+
+
+def analyze_audio_file(
+    file_path: str,
+    options: Optional[AnalysisOptions] = None,
+    timer: Optional[StageTimer] = None
+) -> Dict[str, Any]:
     """
     Analyze audio file using Parselmouth to extract acoustic features
 
+    Pass a StageTimer to collect per-stage timings.
+
     Returns:
         Dictionary containing fluency and confidence metrics
     """
+    timer = timer or StageTimer()
     try:
-        # Load audio file
-        sound = parselmouth.Sound(file_path)
-
-        # Get basic audio properties
-        duration = sound.duration  # in seconds
-        sampling_rate = sound.sampling_frequency
-
-        # Extract pitch (F0) - fundamental frequency
-        pitch = sound.to_pitch(time_step=0.01)
-        pitch_values = pitch.selected_array['frequency']
-        pitch_values = pitch_values[pitch_values > 0]  # Remove unvoiced frames
-
-        if len(pitch_values) == 0:
-            raise ValueError("No voiced segments detected in audio")
-
-        mean_pitch = float(np.mean(pitch_values))
-        std_pitch = float(np.std(pitch_values))
-        min_pitch = float(np.min(pitch_values))
-        max_pitch = float(np.max(pitch_values))
-
-        # Calculate pitch stability (confidence indicator)
-        # Lower coefficient of variation = more stable = more confident
-        pitch_cv = (std_pitch / mean_pitch) * 100 if mean_pitch > 0 else 0
-
-        # Extract intensity (loudness)
-        intensity = sound.to_intensity(time_step=0.01)
-        intensity_values = intensity.values[0]
-        intensity_values = intensity_values[intensity_values > 0]
-
-        if len(intensity_values) > 0:
-            mean_intensity = float(np.mean(intensity_values))
-            std_intensity = float(np.std(intensity_values))
-            max_intensity = float(np.max(intensity_values))
-        else:
-            mean_intensity = std_intensity = max_intensity = 0.0
-
-        # Extract voice quality metrics
-        # Harmonicity (HNR - Harmonics-to-Noise Ratio)
-        harmonicity = sound.to_harmonicity()
-        hnr_values = harmonicity.values[0]
-        hnr_values = hnr_values[~np.isnan(hnr_values)]
-        mean_hnr = float(np.mean(hnr_values)) if len(hnr_values) > 0 else 0.0
-
-        # Extract jitter and shimmer (voice quality indicators)
-        point_process = call(sound, "To PointProcess (periodic, cc)", 75, 500)
-
-        jitter = 0.0
-        shimmer = 0.0
-        try:
-            jitter = call(point_process, "Get jitter (local)", 0, 0, 0.0001, 0.02, 1.3)
-            shimmer = call([sound, point_process], "Get shimmer (local)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
-        except:
-            pass  # If jitter/shimmer calculation fails, keep as 0
-
-        # Calculate speech rate estimation
-        # Use intensity to detect voiced segments
-        silence_threshold = mean_intensity * 0.3 if mean_intensity > 0 else 40
-
-        # Create TextGrid for syllable detection (simplified)
-        intensity_tier = intensity.values[0]
-        speech_frames = np.sum(intensity_tier > silence_threshold)
-        total_frames = len(intensity_tier)
-
-        # Estimate speaking time (frames above threshold)
-        speaking_time = (speech_frames / total_frames) * duration if total_frames > 0 else 0
-        silence_time = duration - speaking_time
-
-        # Pause ratio (higher = more hesitation)
-        pause_ratio = (silence_time / duration * 100) if duration > 0 else 0
-
-        # Estimate articulation rate (rough approximation)
-        # Assumes average syllable duration of 0.2 seconds
-        estimated_syllables = speaking_time / 0.2 if speaking_time > 0 else 0
-        speech_rate = (estimated_syllables * 60) / duration if duration > 0 else 0  # syllables per minute
-        articulation_rate = (estimated_syllables * 60) / speaking_time if speaking_time > 0 else 0
-
-        # Calculate confidence score (0-100)
-        # Factors: high intensity, stable pitch, good HNR, low jitter/shimmer
-        confidence_score = calculate_confidence_score(
-            mean_intensity=mean_intensity,
-            pitch_cv=pitch_cv,
-            mean_hnr=mean_hnr,
-            jitter=jitter,
-            shimmer=shimmer
-        )
+        with timer.stage("load"):
+            sound = parselmouth.Sound(file_path)
+    except Exception as e:
+        raise AnalysisError(f"Error analyzing audio: {str(e)}", stage="load")
+
+    return analyze_sound(sound, options, timer)
+
+
+def analyze_audio_bytes(
+    content: bytes,
+    options: Optional[AnalysisOptions] = None,
+    timer: Optional[StageTimer] = None,
+    pcm_info: Optional[WavInfo] = None,
+    path: Optional[str] = None,
+    budget: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Analyze an in-memory audio upload without writing it to disk
+
+    Pass a StageTimer to collect per-stage timings, pcm_info when content
+    is raw PCM rather than an audio file, path when content is a
+    memory-mapped file, and budget (seconds) to fit the analysis into a
+    latency budget (see analyze_sound).
+
+    Compressed uploads (WebM, Ogg, MP4) are decoded to PCM first. WAV,
+    PCM and compressed uploads with less than SPEECH_GATE_MIN_SECONDS of
+    speech (by frame level, before any Praat object is created) are
+    answered with insufficient_speech_results instead of being analyzed.
+
+    Returns:
+        Dictionary containing fluency and confidence metrics
+
+    Raises:
+        ValueError: If content is empty, or a WAV header is malformed
+        UnsupportedAudio: If content is not a readable audio format, or a
+            compressed upload cannot be decoded
+        DecodedTooLarge: If a compressed upload decodes to more than DECODE_MAX_BYTES
+        AnalysisError: Tagged with the stage that failed
+    """
+    if not len(content):
+        raise ValueError("Upload is empty")
+    timer = timer or StageTimer()
+    try:
+        with timer.stage("decode"):
+            if pcm_info is None and is_wav(content):
+                pcm_info = parse_wav_header(content)
+            elif pcm_info is None and compressed_format(content) is not None:
+                content, pcm_info = decode_compressed(content, path)
+
+        if pcm_info is not None and energy.SPEECH_GATE_MIN_SECONDS > 0:
+            with timer.stage("gate"):
+                speech = gated_speech_seconds(content, pcm_info)
+            if speech < energy.SPEECH_GATE_MIN_SECONDS:
+                return insufficient_speech_results(wav_duration(pcm_info), speech, options)
+
+        with timer.stage("decode"):
+            sound = load_sound(content, pcm_info, path)
+    except (MalformedWav, UnsupportedAudio, DecodedTooLarge):
+        raise
+    except Exception as e:
+        raise AnalysisError(f"Error analyzing audio: {str(e)}", stage=timer.failed_stage or "decode")
+
+    return analyze_sound(sound, options, timer, budget)
+
+
+def analyze_upload(
+    source: Source,
+    options: Optional[AnalysisOptions] = None,
+    pcm_info: Optional[WavInfo] = None,
+    budget: Optional[float] = None
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Worker entry point for /analyze and /analyze/pcm
+
+    Args:
+        source: Upload.source, the upload or the path of its spool file
+        budget: Seconds left of the request's latency budget, if it has one
+
+    Returns:
+        (results, seconds spent in each stage)
+    """
+    timer = StageTimer()
+    with open_source(source) as content:
+        path = source if isinstance(source, str) else None
+        results = analyze_audio_bytes(content, options, timer, pcm_info, path, budget)
+    return results, timer.stages
+
+
+def analyze_sound(
+    sound: parselmouth.Sound,
+    options: Optional[AnalysisOptions] = None,
+    timer: Optional[StageTimer] = None,
+    budget: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Analyze a Praat Sound to extract acoustic features
 
-        # Calculate fluency score (0-100)
-        # Factors: good speech rate, low pause ratio, stable articulation
-        fluency_score = calculate_fluency_score(
-            speech_rate=speech_rate,
-            pause_ratio=pause_ratio,
-            articulation_rate=articulation_rate
+    Args:
+        sound: Audio to analyze
+        options: Result groups, profile and backends (see AnalysisOptions).
+            Praat objects are only computed if a requested group needs them.
+        timer: Collects per-stage timings when given
+        budget: Latency budget in seconds, including the time already on
+            timer. Stages that do not fit are downgraded or omitted (see
+            budget.py) and the results get a "budget" report.
+
+    Returns:
+        Dictionary containing fluency and confidence metrics
+
+    Raises:
+        AnalysisError: Tagged with the stage that failed
+    """
+    timer = timer or StageTimer()
+    options = options or AnalysisOptions()
+    duration, rate = sound.duration, sound.sampling_frequency
+    try:
+        plan = Plan(options.profile)
+        if budget is not None:
+            available = max(0.0, budget - timer.total)
+            plan, predicted = cost_model.plan(available, options.profile, duration, rate, options.features)
+
+        graph = FeatureGraph(
+            sound, replace(options, profile=plan.profile), timer, hnr=plan.hnr, jitter_shimmer=plan.jitter_shimmer
         )
+        summary = graph.summary()
+        with timer.stage("scoring"):
+            results = build_results(**summary)
 
-        return {
-            "duration": round(duration, 2),
-            "pitch": {
-                "mean": round(mean_pitch, 2),
-                "std": round(std_pitch, 2),
-                "min": round(min_pitch, 2),
-                "max": round(max_pitch, 2),
-                "coefficient_of_variation": round(pitch_cv, 2)
-            },
-            "intensity": {
-                "mean": round(mean_intensity, 2),
-                "std": round(std_intensity, 2),
-                "max": round(max_intensity, 2)
-            },
-            "voice_quality": {
-                "harmonics_to_noise_ratio": round(mean_hnr, 2),
-                "jitter": round(jitter, 4),
-                "shimmer": round(shimmer, 4)
-            },
-            "timing": {
-                "speaking_time": round(speaking_time, 2),
-                "silence_time": round(silence_time, 2),
-                "pause_ratio": round(pause_ratio, 2),
-                "speech_rate": round(speech_rate, 2),
-                "articulation_rate": round(articulation_rate, 2)
-            },
-            "scores": {
-                "confidence": round(confidence_score, 2),
-                "fluency": round(fluency_score, 2),
-                "overall": round((confidence_score + fluency_score) / 2, 2)
-            }
-        }
+        cost_model.observe(plan, duration, rate, options.features, timer.stages)
+        results = select_groups(results, options.features)
+        if options.contour_points:
+            with timer.stage("contours"):
+                results["contours"] = pack_contours(graph.contours(), options.contour_points, options.contour_dtype)
+        if budget is not None:
+            results["budget"] = cost_model.report(plan, predicted, available, options.profile, options.features)
+        return results
 
     except Exception as e:
-        raise ValueError(f"Error analyzing audio: {str(e)}")
+        raise AnalysisError(f"Error analyzing audio: {str(e)}", stage=timer.failed_stage or "features")
+
+
+def select_groups(results: Dict[str, Any], features) -> Dict[str, Any]:
+    """Keep duration and the requested result groups"""
+    return {
+        group: value for group, value in results.items()
+        if group == "duration" or group in features
+    }
+
+
+def chunked_info(content: bytes, options: AnalysisOptions, chunked: Optional[bool],
+                 pcm_info: Optional[WavInfo] = None) -> Optional[WavInfo]:
+    """
+    WAV header when the upload should be analyzed in parallel chunks, else None
+
+    Chunking runs the full profile on every result group. By default it is
+    used for WAV uploads (or raw PCM, described by pcm_info) of at least
+    LONG_AUDIO_MIN_SECONDS; chunked=True forces it and chunked=False
+    disables it.
+
+    Raises:
+        ValueError: If chunking is forced but the upload or options do not allow it
+    """
+    if chunked is False:
+        return None
+
+    supported = (
+        options.profile == "full"
+        and options.intensity_backend == "praat"
+        and options.pitch_backend == "praat"
+        and options.features == frozenset(FEATURE_GROUPS)
+    )
+    info = pcm_info
+    if info is None and is_wav(content):
+        try:
+            info = parse_wav_header(content)
+        except ValueError:
+            pass
+
+    if chunked:
+        if info is None or not supported:
+            raise ValueError(
+                "Chunked analysis needs a WAV upload, profile=full, intensity_backend=praat, "
+                "pitch_backend=praat and all features"
+            )
+        return info
+    if info is not None and supported and wav_duration(info) >= LONG_AUDIO_MIN_SECONDS:
+        return info
+    return None
+
+
+async def analyze_chunked(content: bytes, info: WavInfo, peaks: Optional[List[int]] = None,
+                          options: Optional[AnalysisOptions] = None) -> Dict[str, Any]:
+    """
+    Analyze a long WAV upload in parallel chunks (see long_audio.py)
+
+    Args:
+        peaks: Collects each chunk's worker peak memory in bytes
+        options: Only its contour settings apply; chunks always run the full analysis
+
+    Returns:
+        Metrics for the whole recording, with a per-chunk "timeline"
+    """
+    contours = {}
+    summary, timeline = await analyze_long_wav(content, info, peaks, contours)
+    if summary is None:
+        raise AnalysisError("Error analyzing audio: No voiced segments detected in audio", stage="pitch")
+
+    results = build_results(**summary)
+    results["timeline"] = [
+        {
+            "start": round(entry["start"], 2),
+            "end": round(entry["end"], 2),
+            "results": build_results(**entry["summary"]) if entry["summary"] else None
+        }
+        for entry in timeline
+    ]
+    if options is not None and options.contour_points:
+        results["contours"] = pack_contours(contours, options.contour_points, options.contour_dtype)
+    return results
+
+
+def build_results(
+    duration: float,
+    mean_pitch: float,
+    std_pitch: float,
+    min_pitch: float,
+    max_pitch: float,
+    mean_intensity: float,
+    std_intensity: float,
+    max_intensity: float,
+    mean_hnr: Optional[float],
+    jitter: Optional[float],
+    shimmer: Optional[float],
+    speaking_time: float,
+    syllable_count: int
+) -> Dict[str, Any]:
+    """
+    Derive timing metrics and scores from summary features
+
+    Shared by the batch and streaming analysis paths so both report the
+    same SpeechAnalysisResult shape. Voice quality measures omitted under
+    a latency budget are None and reported as null.
+    """
+    # Calculate pitch stability (confidence indicator)
+    # Lower coefficient of variation = more stable = more confident
+    pitch_cv = (std_pitch / mean_pitch) * 100 if mean_pitch > 0 else 0
+
+    silence_time = duration - speaking_time
+
+    # Pause ratio (higher = more hesitation)
+    pause_ratio = (silence_time / duration * 100) if duration > 0 else 0
+
+    # Speech and articulation rate from detected syllable nuclei
+    speech_rate = (syllable_count * 60) / duration if duration > 0 else 0  # syllables per minute
+    articulation_rate = (syllable_count * 60) / speaking_time if speaking_time > 0 else 0
+
+    # Calculate confidence score (0-100)
+    # Factors: high intensity, stable pitch, good HNR, low jitter/shimmer
+    confidence_score = calculate_confidence_score(
+        mean_intensity=mean_intensity,
+        pitch_cv=pitch_cv,
+        mean_hnr=mean_hnr,
+        jitter=jitter,
+        shimmer=shimmer
+    )
+
+    # Calculate fluency score (0-100)
+    # Factors: good speech rate, low pause ratio, stable articulation
+    fluency_score = calculate_fluency_score(
+        speech_rate=speech_rate,
+        pause_ratio=pause_ratio,
+        articulation_rate=articulation_rate
+    )
+
+    return {
+        "duration": round(duration, 2),
+        "pitch": {
+            "mean": round(mean_pitch, 2),
+            "std": round(std_pitch, 2),
+            "min": round(min_pitch, 2),
+            "max": round(max_pitch, 2),
+            "coefficient_of_variation": round(pitch_cv, 2)
+        },
+        "intensity": {
+            "mean": round(mean_intensity, 2),
+            "std": round(std_intensity, 2),
+            "max": round(max_intensity, 2)
+        },
+        "voice_quality": {
+            "harmonics_to_noise_ratio": round(mean_hnr, 2) if mean_hnr is not None else None,
+            "jitter": round(jitter, 4) if jitter is not None else None,
+            "shimmer": round(shimmer, 4) if shimmer is not None else None
+        },
+        "timing": {
+            "speaking_time": round(speaking_time, 2),
+            "silence_time": round(silence_time, 2),
+            "pause_ratio": round(pause_ratio, 2),
+            "speech_rate": round(speech_rate, 2),
+            "articulation_rate": round(articulation_rate, 2),
+            "syllable_count": int(syllable_count)
+        },
+        "scores": {
+            "confidence": round(confidence_score, 2),
+            "fluency": round(fluency_score, 2),
+            "overall": round((confidence_score + fluency_score) / 2, 2)
+        }
+    }
 
 
 def calculate_confidence_score(
     mean_intensity: float,
     pitch_cv: float,
-    mean_hnr: float,
-    jitter: float,
-    shimmer: float
+    mean_hnr: Optional[float],
+    jitter: Optional[float],
+    shimmer: Optional[float]
 ) -> float:
     """
     Calculate confidence score based on acoustic features
@@ -179,39 +542,11 @@ def calculate_confidence_score(
     - Lower pitch variation (stable pitch)
     - Higher HNR (clear voice)
     - Lower jitter and shimmer (steady voice)
-    """
-    score = 50  # Start at middle
-
-    # Intensity score (0-25 points)
-    # Typical speaking intensity: 50-70 dB
-    if mean_intensity >= 65:
-        score += 25
-    elif mean_intensity >= 55:
-        score += 15
-    elif mean_intensity >= 45:
-        score += 5
-
-    # Pitch stability score (0-25 points)
-    # Lower CV = more stable = more confident
-    if pitch_cv < 10:
-        score += 25
-    elif pitch_cv < 20:
-        score += 15
-    elif pitch_cv < 30:
-        score += 5
-
-    # Voice quality score (0-25 points)
-    if mean_hnr > 15:  # Good voice quality
-        score += 15
-    elif mean_hnr > 10:
-        score += 8
 
-    if jitter < 0.01 and shimmer < 0.05:  # Low jitter/shimmer
-        score += 10
-    elif jitter < 0.02 and shimmer < 0.1:
-        score += 5
-
-    return min(100, max(0, score))
+    Voice quality measures that were not computed (None) score the middle
+    band. Thresholds: scoring.THRESHOLDS["confidence"].
+    """
+    return scoring.confidence_score(mean_intensity, pitch_cv, mean_hnr, jitter, shimmer)
 
 
 def calculate_fluency_score(
@@ -226,83 +561,781 @@ def calculate_fluency_score(
     - Good speech rate (150-200 syllables/min)
     - Low pause ratio (< 30%)
     - Consistent articulation rate
+
+    Thresholds: scoring.THRESHOLDS["fluency"].
+    """
+    return scoring.fluency_score(speech_rate, pause_ratio, articulation_rate)
+
+
+def parse_options(features: Optional[str], profile: str, intensity_backend: str, priority: str,
+                  contours: int = 0, contour_dtype: str = DEFAULT_CONTOUR_DTYPE,
+                  pitch_backend: str = DEFAULT_PITCH_BACKEND) -> AnalysisOptions:
+    """
+    Validate the analysis query parameters shared by the /analyze endpoints
+
+    Raises:
+        HTTPException: 400 for unknown values
+    """
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority: {priority} (expected one of {', '.join(PRIORITIES)})")
+
+    try:
+        return AnalysisOptions(
+            features=frozenset(features.split(',')) if features else None,
+            profile=profile,
+            intensity_backend=intensity_backend,
+            pitch_backend=pitch_backend,
+            contour_points=contours,
+            contour_dtype=contour_dtype
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def parse_budget(request: Request, budget_ms: Optional[float]) -> Optional[float]:
+    """
+    Latency budget in seconds, from budget_ms or the X-Analysis-Budget-Ms header
+
+    Raises:
+        HTTPException: 400 unless the budget is a positive number
+    """
+    value = budget_ms if budget_ms is not None else request.headers.get("x-analysis-budget-ms")
+    if value is None:
+        return None
+    try:
+        value = float(value)
+    except ValueError:
+        value = 0
+    if not value > 0:
+        raise HTTPException(status_code=400, detail="X-Analysis-Budget-Ms must be a positive number of milliseconds")
+    return value / 1000
+
+
+def header_format(content: bytes, pcm_info: Optional[WavInfo]) -> Optional[Tuple[float, float]]:
+    """(duration, sample rate) of a WAV or raw PCM upload from its header; None for other formats"""
+    info = pcm_info
+    if info is None and is_wav(content):
+        try:
+            info = parse_wav_header(content)
+        except ValueError:
+            return None
+    return (wav_duration(info), info.sample_rate) if info is not None else None
+
+
+def budget_cache_key(key: str, report: Dict[str, Any]) -> Optional[str]:
+    """Cache key of results downgraded as a budget report (or coverage) lists; None if nothing was"""
+    if not report["estimated"] and not report["omitted"]:
+        return None
+    return cache_key(key.encode(), {"budgeted": True, "estimated": report["estimated"], "omitted": report["omitted"]})
+
+
+async def analyze_content(
+    upload: Upload,
+    options: AnalysisOptions,
+    priority: str,
+    session_id: Optional[str],
+    chunked: Optional[bool],
+    pcm_info: Optional[WavInfo],
+    stages: Dict[str, float],
+    endpoint: str,
+    peaks: Optional[List[int]] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Serve one upload from the cache, or admit and analyze it
+
+    Stage timings are added to stages, and the peak memory of each worker
+    job to peaks. With a deadline (a time.perf_counter() value), the worker
+    is given what is left of the latency budget once the upload is
+    admitted; chunked analysis of long recordings ignores it. Cached
+    results are served to a budgeted request with a fresh "budget" report:
+    complete results always, downgraded ones only if they are what the
+    planner would pick for its deadline now.
+
+    Raises:
+        ValueError: Chunking was requested but is not possible
+        QueueFull, Superseded: From admission control
+        AnalysisError, asyncio.TimeoutError: From the analysis
     """
-    score = 50  # Start at middle
-
-    # Speech rate score (0-35 points)
-    # Optimal: 150-200 syllables per minute
-    if 150 <= speech_rate <= 200:
-        score += 35
-    elif 120 <= speech_rate <= 220:
-        score += 25
-    elif 100 <= speech_rate <= 250:
-        score += 15
-    elif speech_rate > 0:
-        score += 5
-
-    # Pause ratio score (0-35 points)
-    # Lower pause ratio = more fluent
-    if pause_ratio < 20:
-        score += 35
-    elif pause_ratio < 30:
-        score += 25
-    elif pause_ratio < 40:
-        score += 15
-    elif pause_ratio < 50:
-        score += 5
-
-    # Articulation rate bonus (0-30 points)
-    # Good articulation: 180-250 syllables/min when speaking
-    if 180 <= articulation_rate <= 250:
-        score += 30
-    elif 150 <= articulation_rate <= 280:
-        score += 20
-    elif articulation_rate > 100:
-        score += 10
-
-    return min(100, max(0, score))
+    content = upload.content
+    if pcm_info is None:
+        check_decodable(content)
+    long_info = chunked_info(content, options, chunked, pcm_info)
+
+    # Identical audio (retries, final flush, session report) is served from cache
+    lookup_started = time.perf_counter()
+    params = {**options.cache_params(), "chunked": long_info is not None}
+    if pcm_info is not None:
+        params["pcm"] = [pcm_info.format_tag, pcm_info.bits_per_sample, pcm_info.sample_rate, pcm_info.channels]
+    # Hashing a long upload takes a while; keep it off the event loop
+    key = await asyncio.to_thread(cache_key, content, params)
+    results = result_cache.get(key)
+    served = Plan(options.profile)
+
+    # Plan as the worker would, so downgraded results are only served to requests whose deadline calls for them
+    budgeted = deadline is not None and long_info is None
+    audio = header_format(content, pcm_info) if budgeted else None
+    if results is None and audio is not None:
+        plan, _ = cost_model.plan(deadline - time.perf_counter(), options.profile, *audio, options.features)
+        budget_key = budget_cache_key(key, coverage(plan, options.profile, options.features))
+        if budget_key is not None:
+            results = result_cache.get(budget_key)
+            served = plan
+    stages["cache"] = time.perf_counter() - lookup_started
+    if results is not None:
+        if budgeted and not results.get("insufficient_speech"):
+            available = max(0.0, deadline - time.perf_counter())
+            report = cost_model.report(served, 0.0, available, options.profile, options.features)
+            results = {**results, "budget": {**report, "cached": True}}
+        return results
+
+    if long_info is not None:
+        # Long recordings: overlapping chunks across all workers, as bulk jobs
+        admission.check("bulk")
+        submitted = time.perf_counter()
+        results = await analyze_chunked(content, long_info, peaks, options)
+        stages["chunks"] = time.perf_counter() - submitted
+    else:
+        # Only live chunks replace each other; report jobs always run
+        queued = time.perf_counter()
+        async with admission.slot(priority, key=session_id if priority == "interactive" else None):
+            stages["queue"] = time.perf_counter() - queued
+
+            # Analyze in a worker process so the event loop stays responsive
+            submitted = time.perf_counter()
+            budget = deadline - submitted if deadline is not None else None
+            (results, worker_stages), peak = await run_in_pool(
+                run_measured, analyze_upload, upload.source, options, pcm_info, budget
+            )
+        if peaks is not None and peak is not None:
+            peaks.append(peak)
+
+        # Transfer to and from the worker
+        stages["pool"] = max(0.0, time.perf_counter() - submitted - sum(worker_stages.values()))
+        stages.update(worker_stages)
+
+        # Keep this process's planning as fast or slow as the workers'
+        if "budget" in results and audio is not None:
+            plan = reported_plan(results["budget"], options.profile, audio[1], options.features)
+            cost_model.observe(plan, *audio, options.features, worker_stages)
+
+    AUDIO_SECONDS.labels(endpoint).inc(results.get("duration", 0))
+    if results.get("insufficient_speech"):
+        INSUFFICIENT_SPEECH.labels(endpoint).inc()
+    # Cached without the report, which is made afresh for each request served
+    report = results.get("budget")
+    cached = {name: value for name, value in results.items() if name != "budget"}
+    result_cache.put((budget_cache_key(key, report) if report is not None else None) or key, cached)
+    return results
+
+
+async def run_analysis(
+    response: Response,
+    endpoint: str,
+    chunks: AsyncIterator[bytes],
+    options: AnalysisOptions,
+    priority: str,
+    session_id: Optional[str],
+    chunked: Optional[bool],
+    pcm_format: Optional[Tuple[str, int, int]] = None,
+    budget: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Read, cache-check, admit and analyze one upload, recording metrics
+
+    Args:
+        chunks: The request body, streamed into a spooled Upload
+        pcm_format: (encoding, sample_rate, channels) when the body is raw PCM
+        budget: Latency budget in seconds, counted from the start of the request
+
+    Returns:
+        Analysis results
+
+    Raises:
+        HTTPException: With the status for the failure
+    """
+    started = time.perf_counter()
+    stages: Dict[str, float] = {}
+    peaks: List[int] = []
+    upload = None
+    with IN_FLIGHT.labels(endpoint).track_inprogress():
+        try:
+            upload = await read_upload(chunks)
+            stages["read"] = time.perf_counter() - started
+
+            pcm_info = pcm_wav_info(*pcm_format, upload.size) if pcm_format else None
+            deadline = started + budget if budget is not None else None
+            results = await analyze_content(
+                upload, options, priority, session_id, chunked, pcm_info, stages, endpoint, peaks, deadline
+            )
+
+        except UploadTooLarge as e:
+            REJECTED.labels("too_large").inc()
+            raise HTTPException(status_code=413, detail=str(e))
+
+        except QueueFull as e:
+            REJECTED.labels("queue_full").inc()
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+        except Superseded as e:
+            REJECTED.labels("superseded").inc()
+            raise HTTPException(status_code=409, detail=str(e))
+
+        except asyncio.TimeoutError:
+            ERRORS.labels("timeout").inc()
+            raise HTTPException(status_code=504, detail="Analysis timed out")
+
+        except AnalysisError as e:
+            ERRORS.labels(e.stage or "features").inc()
+            raise HTTPException(status_code=500, detail=str(e))
+
+        except UnsupportedAudio as e:
+            REJECTED.labels("unsupported_audio").inc()
+            raise HTTPException(status_code=415, detail=str(e))
+
+        except ValueError as e:
+            # Bad PCM format or impossible chunking request
+            raise HTTPException(status_code=400, detail=str(e))
+
+        except Exception as e:
+            ERRORS.labels("internal").inc()
+            raise HTTPException(status_code=500, detail=str(e))
+
+        finally:
+            if upload is not None:
+                upload.close()
+
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.labels(endpoint).observe(elapsed)
+    observe_stages(stages)
+    response.headers["Server-Timing"] = server_timing_header({**stages, "total": elapsed})
+    if peaks:
+        PEAK_MEMORY.labels(endpoint).observe(max(peaks))
+        response.headers["X-Peak-Memory"] = str(max(peaks))
+    return results
 
 
 @app.post("/analyze")
-async def analyze_audio(file: UploadFile = File(...)) -> Dict[str, Any]:
+async def analyze_audio(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    features: Optional[str] = Query(None, description="Comma-separated result groups, e.g. pitch,timing"),
+    profile: str = Query(DEFAULT_PROFILE, description="Analysis profile: full or fast"),
+    intensity_backend: str = Query(DEFAULT_INTENSITY_BACKEND, description="Intensity/timing backend: praat or numpy"),
+    pitch_backend: str = Query(DEFAULT_PITCH_BACKEND, description="Pitch tracker: praat or numpy"),
+    contours: int = Query(0, description="Return pitch/intensity contours decimated to this many points (0 = none)"),
+    contour_dtype: str = Query(DEFAULT_CONTOUR_DTYPE, description="Contour value encoding: float16 or float32"),
+    chunked: Optional[bool] = Query(None, description="Parallel chunked analysis; default: WAV uploads of LONG_AUDIO_MIN_SECONDS or more"),
+    priority: str = Query("interactive", description="interactive (live meter) or bulk (reports); interactive runs first"),
+    session_id: Optional[str] = Query(None, description="Live session; a newer interactive chunk replaces a queued one"),
+    budget_ms: Optional[float] = Query(None, description="Latency budget (or X-Analysis-Budget-Ms header); stages that do not fit are downgraded or skipped")
+) -> Dict[str, Any]:
     """
     Endpoint to analyze uploaded audio file
 
-    Accepts: audio/wav, audio/webm, audio/ogg
+    Accepts: audio/wav, audio/webm, audio/ogg, audio/mp4 (compressed ones need PyAV)
     Returns: Analysis metrics including fluency and confidence scores
     """
     # Validate file type
     if not file.content_type or not file.content_type.startswith('audio/'):
         raise HTTPException(status_code=400, detail="File must be an audio file")
 
-    # Save uploaded file to temporary location
+    options = parse_options(features, profile, intensity_backend, priority, contours, contour_dtype, pitch_backend)
+    budget = parse_budget(request, budget_ms)
+    results = await run_analysis(
+        response, "analyze", file_chunks(file), options, priority, session_id, chunked, budget=budget
+    )
+
+    return {
+        "success": True,
+        "filename": file.filename,
+        "results": results
+    }
+
+
+@app.post("/analyze/pcm")
+async def analyze_pcm(
+    request: Request,
+    response: Response,
+    sample_rate: Optional[int] = Query(None, description="Sample rate in Hz (or X-Sample-Rate header)"),
+    channels: Optional[int] = Query(None, description="Interleaved channels (or X-Channels header; default 1)"),
+    encoding: Optional[str] = Query(None, description="int16 or float32, little-endian (or X-Encoding header; default int16)"),
+    features: Optional[str] = Query(None, description="Comma-separated result groups, e.g. pitch,timing"),
+    profile: str = Query(DEFAULT_PROFILE, description="Analysis profile: full or fast"),
+    intensity_backend: str = Query(DEFAULT_INTENSITY_BACKEND, description="Intensity/timing backend: praat or numpy"),
+    pitch_backend: str = Query(DEFAULT_PITCH_BACKEND, description="Pitch tracker: praat or numpy"),
+    contours: int = Query(0, description="Return pitch/intensity contours decimated to this many points (0 = none)"),
+    contour_dtype: str = Query(DEFAULT_CONTOUR_DTYPE, description="Contour value encoding: float16 or float32"),
+    chunked: Optional[bool] = Query(None, description="Parallel chunked analysis; default: LONG_AUDIO_MIN_SECONDS or more"),
+    priority: str = Query("interactive", description="interactive (live meter) or bulk (reports); interactive runs first"),
+    session_id: Optional[str] = Query(None, description="Live session; a newer interactive chunk replaces a queued one"),
+    budget_ms: Optional[float] = Query(None, description="Latency budget (or X-Analysis-Budget-Ms header); stages that do not fit are downgraded or skipped")
+) -> Dict[str, Any]:
+    """
+    Analyze raw PCM sent as the request body
+
+    Accepts: application/octet-stream, interleaved little-endian int16 or float32
+    Returns: Same results as /analyze, without multipart or WAV encoding
+    """
+    # Only missing values fall back to the headers; an explicit 0 is rejected by pcm_wav_info
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+        if sample_rate is None and "x-sample-rate" in request.headers:
+            sample_rate = int(request.headers["x-sample-rate"])
+        if channels is None:
+            channels = int(request.headers.get("x-channels", 1))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="X-Sample-Rate and X-Channels must be integers")
+    if encoding is None:
+        encoding = request.headers.get("x-encoding", "int16")
+
+    if sample_rate is None:
+        raise HTTPException(status_code=400, detail="sample_rate query parameter or X-Sample-Rate header is required")
 
-        # Analyze the file
-        results = analyze_audio_file(tmp_path)
+    options = parse_options(features, profile, intensity_backend, priority, contours, contour_dtype, pitch_backend)
+    budget = parse_budget(request, budget_ms)
+    results = await run_analysis(
+        response, "analyze_pcm", request.stream(), options, priority, session_id, chunked,
+        pcm_format=(encoding, sample_rate, channels), budget=budget
+    )
 
-        # Clean up
-        os.unlink(tmp_path)
+    return {
+        "success": True,
+        "results": results
+    }
+
+
+async def analyze_batch_item(upload: Upload, options: AnalysisOptions, priority: str,
+                             chunked: Optional[bool] = None, endpoint: str = "batch") -> Dict[str, Any]:
+    """
+    Analyze one clip of a batch or job, reporting failure in the result instead of raising
+
+    A clip shed by admission control waits and retries, so a batch yields
+    to live traffic without losing items.
+    """
+    stages: Dict[str, float] = {}
+    while True:
+        try:
+            results = await analyze_content(upload, options, priority, None, chunked, None, stages, endpoint)
+            observe_stages(stages)
+            return {"success": True, "results": results}
+
+        except QueueFull as e:
+            REJECTED.labels("queue_full").inc()
+            await asyncio.sleep(e.retry_after)
+
+        except asyncio.TimeoutError:
+            ERRORS.labels("timeout").inc()
+            return {"success": False, "status": 504, "error": "Analysis timed out"}
+
+        except AnalysisError as e:
+            ERRORS.labels(e.stage or "features").inc()
+            return {"success": False, "status": 500, "error": str(e)}
+
+        except UnsupportedAudio as e:
+            REJECTED.labels("unsupported_audio").inc()
+            return {"success": False, "status": 415, "error": str(e)}
+
+        except UploadTooLarge as e:
+            REJECTED.labels("too_large").inc()
+            return {"success": False, "status": 413, "error": str(e)}
+
+        except ValueError as e:
+            return {"success": False, "status": 400, "error": str(e)}
+
+        except Exception as e:
+            ERRORS.labels("internal").inc()
+            return {"success": False, "status": 500, "error": str(e)}
+
+
+def close_uploads(items: List[Tuple[str, Upload]]) -> None:
+    for _, upload in items:
+        upload.close()
+
+
+@app.post("/analyze/batch")
+async def analyze_batch(
+    files: Optional[List[UploadFile]] = File(None, description="Clips, one part each"),
+    archive: Optional[UploadFile] = File(None, description="zip or tar archive of clips"),
+    features: Optional[str] = Query(None, description="Comma-separated result groups, e.g. pitch,timing"),
+    profile: str = Query(DEFAULT_PROFILE, description="Analysis profile: full or fast"),
+    intensity_backend: str = Query(DEFAULT_INTENSITY_BACKEND, description="Intensity/timing backend: praat or numpy"),
+    pitch_backend: str = Query(DEFAULT_PITCH_BACKEND, description="Pitch tracker: praat or numpy"),
+    contours: int = Query(0, description="Return pitch/intensity contours decimated to this many points (0 = none)"),
+    contour_dtype: str = Query(DEFAULT_CONTOUR_DTYPE, description="Contour value encoding: float16 or float32"),
+    priority: str = Query("bulk", description="bulk (default) or interactive")
+) -> StreamingResponse:
+    """
+    Analyze many clips in one request
+
+    Accepts: multipart with any number of "files" parts, and/or one "archive"
+             part (zip or tar) whose files are the clips
+    Returns: NDJSON, one line per clip as it finishes:
+             {"index", "filename", "success", "results"} or
+             {"index", "filename", "success": false, "status", "error"},
+             then {"done": true, "total", "succeeded", "failed"}
+    """
+    options = parse_options(features, profile, intensity_backend, priority, contours, contour_dtype, pitch_backend)
+
+    items: List[Tuple[str, Upload]] = []
+    try:
+        for file in files or []:
+            items.append((file.filename, await read_upload(file_chunks(file))))
+        if archive is not None:
+            # Same size limit and spooling as any upload; unpacking (and its limits) off the event loop
+            archive_upload = await read_upload(file_chunks(archive))
+            try:
+                clips = await asyncio.to_thread(archive_items, archive_upload.source, BATCH_MAX_ITEMS - len(items))
+            finally:
+                archive_upload.close()
+            items += [(name, Upload(content)) for name, content in clips]
+        if not items:
+            raise HTTPException(status_code=400, detail="No clips provided")
+        if len(items) > BATCH_MAX_ITEMS:
+            raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} clips per batch")
+        admission.check(priority)
+
+    except UploadTooLarge as e:
+        close_uploads(items)
+        REJECTED.labels("too_large").inc()
+        raise HTTPException(status_code=413, detail=str(e))
+
+    except QueueFull as e:
+        close_uploads(items)
+        REJECTED.labels("queue_full").inc()
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    except ValueError as e:
+        # Not a supported archive, or too many clips in it
+        close_uploads(items)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except BaseException:
+        close_uploads(items)
+        raise
+
+    async def stream() -> AsyncIterator[str]:
+        started = time.perf_counter()
+        # One clip per worker in flight; the rest wait here rather than in the admission queue
+        slots = asyncio.Semaphore(POOL_SIZE)
+
+        async def run(index: int, filename: str, upload: Upload) -> Dict[str, Any]:
+            try:
+                async with slots:
+                    result = await analyze_batch_item(upload, options, priority)
+            finally:
+                upload.close()
+            return {"index": index, "filename": filename, **result}
+
+        succeeded = 0
+        with IN_FLIGHT.labels("batch").track_inprogress():
+            tasks = [asyncio.create_task(run(i, name, upload)) for i, (name, upload) in enumerate(items)]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    line = await finished
+                    succeeded += line["success"]
+                    yield json.dumps(line) + "\n"
+            finally:
+                # The client went away; stop analyzing the rest
+                for task in tasks:
+                    task.cancel()
+
+        REQUEST_SECONDS.labels("batch").observe(time.perf_counter() - started)
+        yield json.dumps({"done": True, "total": len(items), "succeeded": succeeded, "failed": len(items) - succeeded}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+async def run_job(job_id: str, upload: Upload, options: AnalysisOptions, priority: str,
+                  chunked: Optional[bool]) -> None:
+    """Analyze a job's upload in the background and store the outcome"""
+    store = get_job_store()
+    try:
+        await store.start(job_id)
+        started = time.perf_counter()
+        result = await analyze_batch_item(upload, options, priority, chunked, endpoint="jobs")
+        REQUEST_SECONDS.labels("jobs").observe(time.perf_counter() - started)
+    except asyncio.CancelledError:
+        await store.fail(job_id, 503, "Interrupted by a service shutdown; please resubmit")
+        raise
+    finally:
+        upload.close()
 
+    if result["success"]:
+        await store.finish(job_id, result["results"])
+    else:
+        await store.fail(job_id, result["status"], result["error"])
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    response: Response,
+    file: UploadFile = File(...),
+    features: Optional[str] = Query(None, description="Comma-separated result groups, e.g. pitch,timing"),
+    profile: str = Query(DEFAULT_PROFILE, description="Analysis profile: full or fast"),
+    intensity_backend: str = Query(DEFAULT_INTENSITY_BACKEND, description="Intensity/timing backend: praat or numpy"),
+    pitch_backend: str = Query(DEFAULT_PITCH_BACKEND, description="Pitch tracker: praat or numpy"),
+    contours: int = Query(0, description="Return pitch/intensity contours decimated to this many points (0 = none)"),
+    contour_dtype: str = Query(DEFAULT_CONTOUR_DTYPE, description="Contour value encoding: float16 or float32"),
+    chunked: Optional[bool] = Query(None, description="Parallel chunked analysis; default: WAV uploads of LONG_AUDIO_MIN_SECONDS or more"),
+    priority: str = Query("bulk", description="bulk (default) or interactive")
+) -> Dict[str, Any]:
+    """
+    Queue a session recording for analysis and return immediately
+
+    Accepts: audio/wav, audio/webm, audio/ogg, audio/mp4 (compressed ones need PyAV)
+    Returns: {"job_id", "status", "deduplicated"}; poll GET /jobs/{job_id}.
+             Resubmitting identical audio and parameters returns the
+             existing job (unless it failed).
+    """
+    if not file.content_type or not file.content_type.startswith('audio/'):
+        raise HTTPException(status_code=400, detail="File must be an audio file")
+
+    options = parse_options(features, profile, intensity_backend, priority, contours, contour_dtype, pitch_backend)
+    try:
+        upload = await read_upload(file_chunks(file))
+    except UploadTooLarge as e:
+        REJECTED.labels("too_large").inc()
+        raise HTTPException(status_code=413, detail=str(e))
+
+    store = get_job_store()
+    key = await asyncio.to_thread(cache_key, upload.content, {**options.cache_params(), "chunked": chunked})
+    job, created = await store.create(key, file.filename)
+    if created:
+        task = asyncio.create_task(run_job(job["job_id"], upload, options, priority, chunked))
+        job_tasks.add(task)
+        task.add_done_callback(job_tasks.discard)
+    else:
+        upload.close()
+
+    response.headers["Location"] = f"/jobs/{job['job_id']}"
+    return {"job_id": job["job_id"], "status": job["status"], "deduplicated": not created}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=JOB_MAX_WAIT_SECONDS, description="Long-poll: seconds to wait for the job to finish")
+) -> Dict[str, Any]:
+    """
+    Job status, with results once done
+
+    Returns: {"job_id", "status": queued|running|done|failed, "filename",
+             "created", "updated"} plus "results", or "error" and
+             "error_status" (the HTTP status /analyze would have returned)
+    """
+    store = get_job_store()
+    job = await store.wait(job_id, wait) if wait else await store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """
+    Server-sent events for a job
+
+    Sends a "status" event with the job on every status change, ending
+    with the finished job; a comment is sent every 15 s to keep proxies
+    from closing the connection.
+    """
+    store = get_job_store()
+    job = await store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+
+    async def stream() -> AsyncIterator[str]:
+        current = job
+        yield f"event: status\ndata: {json.dumps(current)}\n\n"
+        while current is not None and current["status"] not in FINISHED:
+            latest = await store.wait(job_id, 15, since=current["status"])
+            if latest is not None and latest["status"] == current["status"]:
+                yield ": keepalive\n\n"
+            elif latest is not None:
+                yield f"event: status\ndata: {json.dumps(latest)}\n\n"
+            current = latest
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def form_data(metadata: Dict[str, Any], audio: bytes, filename: str) -> Tuple[bytes, str]:
+    """
+    multipart/form-data body with a JSON "metadata" part and a WAV "audio" part
+
+    Returns:
+        (body, Content-Type header)
+    """
+    boundary = uuid.uuid4().hex
+    while boundary.encode() in audio:
+        boundary = uuid.uuid4().hex
+    body = b"".join([
+        f'--{boundary}\r\nContent-Disposition: form-data; name="metadata"\r\n'
+        f'Content-Type: application/json\r\n\r\n{json.dumps(metadata)}\r\n'.encode(),
+        f'--{boundary}\r\nContent-Disposition: form-data; name="audio"; filename="{filename}"\r\n'
+        f'Content-Type: audio/wav\r\n\r\n'.encode(),
+        audio,
+        f'\r\n--{boundary}--\r\n'.encode(),
+    ])
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+@app.post("/compact")
+async def compact_audio(
+    file: UploadFile = File(...),
+    max_pause: float = Query(COMPACT_MAX_PAUSE_SECONDS, description="Pauses longer than this many seconds are shortened to it"),
+    downsample: bool = Query(True, description="Mix to mono and resample to 16 kHz"),
+    threshold_db: Optional[float] = Query(None, description="Speech level in Praat dB; default: the speech gate's level for the recording"),
+    priority: str = Query("bulk", description="bulk (default) or interactive")
+) -> Response:
+    """
+    Trim long pauses from a recording before it is sent for transcription
+
+    Accepts: audio/wav
+    Returns: multipart/form-data: a "metadata" JSON part with the map from
+             compacted to original times, and the compacted WAV as "audio"
+    """
+    if not file.content_type or not file.content_type.startswith('audio/'):
+        raise HTTPException(status_code=400, detail="File must be an audio file")
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority: {priority} (expected one of {', '.join(PRIORITIES)})")
+    if not max_pause > 0:
+        raise HTTPException(status_code=400, detail="max_pause must be positive")
+
+    started = time.perf_counter()
+    stages: Dict[str, float] = {}
+    upload = None
+    with IN_FLIGHT.labels("compact").track_inprogress():
+        try:
+            upload = await read_upload(file_chunks(file))
+            stages["read"] = time.perf_counter() - started
+
+            queued = time.perf_counter()
+            async with admission.slot(priority):
+                stages["queue"] = time.perf_counter() - queued
+                submitted = time.perf_counter()
+                result, worker_stages = await run_in_pool(
+                    compact_upload, upload.source, max_pause, downsample, threshold_db
+                )
+            stages["pool"] = max(0.0, time.perf_counter() - submitted - sum(worker_stages.values()))
+            stages.update(worker_stages)
+
+        except UploadTooLarge as e:
+            REJECTED.labels("too_large").inc()
+            raise HTTPException(status_code=413, detail=str(e))
+
+        except QueueFull as e:
+            REJECTED.labels("queue_full").inc()
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+        except asyncio.TimeoutError:
+            ERRORS.labels("timeout").inc()
+            raise HTTPException(status_code=504, detail="Compaction timed out")
+
+        except ValueError as e:
+            # Not a supported WAV file
+            raise HTTPException(status_code=400, detail=str(e))
+
+        finally:
+            if upload is not None:
+                upload.close()
+
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.labels("compact").observe(elapsed)
+    observe_stages(stages)
+    audio = result.pop("audio")
+    metadata = {"success": True, "filename": file.filename, **result}
+    body, content_type = form_data(metadata, audio, "compacted.wav")
+    return Response(content=body, media_type=content_type,
+                    headers={"Server-Timing": server_timing_header({**stages, "total": elapsed})})
+
+
+@app.websocket("/ws/analyze/{session_id}")
+async def analyze_stream(
+    websocket: WebSocket,
+    session_id: str,
+    sample_rate: int = 48000,
+    encoding: str = "int16",
+    channels: int = 1,
+    window_seconds: float = STREAM_WINDOW_SECONDS,
+    pitch_backend: str = DEFAULT_PITCH_BACKEND
+):
+    """
+    Streaming analysis endpoint
+
+    Accepts: binary messages of raw little-endian PCM (int16 or float32)
+    Sends: {"type": "metrics", ...} each time a window closes, with results
+           in the same shape as /analyze (null until speech is detected)
+    Send {"type": "end"} as a text message to flush the last partial window
+    and receive a final {"type": "final", ...} message.
+    """
+    await websocket.accept()
+
+    try:
+        session = get_session(session_id, sample_rate, encoding, channels, window_seconds, pitch_backend)
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1003)
+        return
+
+    async def analyze_next(final: bool = False) -> bool:
+        window = session.next_window(final=final)
+        if window is not None:
+            started = time.perf_counter()
+            # Windows of one session arrive in order, so they are never shed
+            async with admission.slot("interactive", bounded=False):
+                result = await run_in_pool(analyze_window, *window, False, session.pitch_backend)
+            session.merge(result)
+            REQUEST_SECONDS.labels("stream").observe(time.perf_counter() - started)
+            samples, rate, start, end = window
+            AUDIO_SECONDS.labels("stream").inc((end if end is not None else samples.shape[-1] / rate) - start)
+        return window is not None
+
+    def metrics_message(message_type: str) -> Dict[str, Any]:
+        summary = session.summary()
         return {
-            "success": True,
-            "filename": file.filename,
-            "results": results
+            "type": message_type,
+            "session_id": session_id,
+            "window": session.windows,
+            "results": build_results(**summary) if summary else None
         }
 
-    except Exception as e:
-        # Clean up on error
-        if 'tmp_path' in locals():
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                session.feed(message["bytes"])
+                while session.window_ready():
+                    if await analyze_next():
+                        await websocket.send_json(metrics_message("metrics"))
 
-        raise HTTPException(status_code=500, detail=str(e))
+            elif message.get("text") is not None:
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    control = {}
+                if control.get("type") == "end":
+                    await analyze_next(final=True)
+                    await websocket.send_json(metrics_message("final"))
+                    end_session(session_id)
+                    await websocket.close()
+                    break
+
+    except WebSocketDisconnect:
+        pass
+
+    except asyncio.TimeoutError:
+        ERRORS.labels("timeout").inc()
+        await websocket.send_json({"type": "error", "detail": "Analysis timed out"})
+        await websocket.close(code=1011)
+
+    except Exception as e:
+        ERRORS.labels("stream").inc()
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1011)
 
 
 @app.get("/health")
@@ -311,6 +1344,43 @@ async def health_check():
     return {"status": "healthy", "service": "speech-analysis"}
 
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness check: 200 once every worker has warmed up, 503 until then
+
+    /health only shows the event loop is running; this also tells a load
+    balancer that the first analysis will not wait for a cold worker.
+    """
+    # Starts a new pool if a crashed one was shut down
+    start_pool()
+    record_warm_up()
+    report = {"import_seconds": round(IMPORT_SECONDS, 3), **startup_report()}
+    if not pool_ready():
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+        return {"status": "warming", **report}
+    return {"status": "ready", **report}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Result cache size and hit/miss/eviction counters"""
+    return result_cache.stats()
+
+
+@app.get("/queue/stats")
+async def queue_stats():
+    """Admission queue occupancy and shed-job counters"""
+    return admission.stats()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: latency histograms, in-flight and queue gauges, audio seconds, errors by stage"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     print("Starting Speech Analysis Service on http://localhost:8000")
     print("API Documentation available at http://localhost:8000/docs")
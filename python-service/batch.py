@@ -0,0 +1,98 @@
+"""
+Clip extraction for /analyze/batch
+Expands a zip or tar archive into the clips it contains
+
+Configuration (environment variables):
+    BATCH_MAX_ITEMS       Most clips accepted in one batch request (default: 500)
+    BATCH_MAX_CLIP_BYTES  Largest clip unpacked from an archive (default: 100 MB)
+    BATCH_MAX_BYTES       Most bytes unpacked from one archive (default: 512 MB)
+"""
+
+import io
+import os
+import posixpath
+import tarfile
+import zipfile
+from typing import BinaryIO, List, Tuple
+
+from uploads import Source, UploadTooLarge
+
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "500"))
+BATCH_MAX_CLIP_BYTES = int(os.environ.get("BATCH_MAX_CLIP_BYTES", str(100 << 20)))
+BATCH_MAX_BYTES = int(os.environ.get("BATCH_MAX_BYTES", str(512 << 20)))
+
+
+class ArchiveTooLarge(UploadTooLarge):
+    """An archive whose clips unpack to more than the batch limits"""
+
+    def __init__(self, message: str, max_bytes: int):
+        ValueError.__init__(self, message)
+        self.max_bytes = max_bytes
+
+
+def is_hidden(name: str) -> bool:
+    """Archive metadata rather than a clip (dotfiles, macOS resource forks)"""
+    return any(part.startswith('.') or part == '__MACOSX' for part in name.split('/'))
+
+
+def archive_items(source: Source, max_items: int = BATCH_MAX_ITEMS, max_clip_bytes: int = BATCH_MAX_CLIP_BYTES,
+                  max_bytes: int = BATCH_MAX_BYTES) -> List[Tuple[str, bytes]]:
+    """
+    Read every regular file in a zip or tar (optionally compressed) archive
+
+    Each member's size is checked against the limits before it is
+    unpacked, and no more than the checked size is read, so a
+    decompression bomb is refused rather than expanded.
+
+    Args:
+        source: The archive, or the path of its spool file
+
+    Returns:
+        (name, content) per clip, in archive order
+
+    Raises:
+        ValueError: If source is not a supported archive or holds too many clips
+        ArchiveTooLarge: If a clip, or all clips together, unpack to more than the limits
+    """
+    with (open(source, 'rb') if isinstance(source, str) else io.BytesIO(source)) as file:
+        return read_archive(file, max_items, max_clip_bytes, max_bytes)
+
+
+def read_archive(file: BinaryIO, max_items: int, max_clip_bytes: int, max_bytes: int) -> List[Tuple[str, bytes]]:
+    items = []
+    total = 0
+
+    def check(name: str, size: int) -> None:
+        nonlocal total
+        if len(items) >= max_items:
+            raise ValueError(f"Archive holds more than {max_items} clips")
+        if size > max_clip_bytes:
+            raise ArchiveTooLarge(f"{name} unpacks to more than the {max_clip_bytes}-byte clip limit", max_clip_bytes)
+        total += size
+        if total > max_bytes:
+            raise ArchiveTooLarge(f"Archive unpacks to more than the {max_bytes}-byte limit", max_bytes)
+
+    if zipfile.is_zipfile(file):
+        with zipfile.ZipFile(file) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or is_hidden(info.filename):
+                    continue
+                check(info.filename, info.file_size)
+                with archive.open(info) as member:
+                    items.append((info.filename, member.read(info.file_size)))
+        return items
+
+    file.seek(0)
+    try:
+        archive = tarfile.open(fileobj=file, mode='r:*')
+    except tarfile.TarError:
+        raise ValueError("Archive must be zip or tar")
+
+    with archive:
+        for member in archive:
+            name = posixpath.normpath(member.name)
+            if not member.isfile() or is_hidden(name):
+                continue
+            check(name, member.size)
+            items.append((name, archive.extractfile(member).read(member.size)))
+    return items
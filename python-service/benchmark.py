@@ -0,0 +1,295 @@
+"""
+Offline benchmark for the speech analysis hot path
+Times each analysis stage directly (no server) on synthetic audio and
+compares against a stored baseline to catch regressions from parselmouth
+or numpy upgrades
+
+Usage:
+    python benchmark.py --quick                      # 1 s and 10 s cases only
+    python benchmark.py --save-baseline              # write benchmark_baseline.json
+    python benchmark.py --baseline benchmark_baseline.json --threshold 1.25
+    python benchmark.py --quick --signals speech --check-backends
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import parselmouth
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import energy
+import pitch
+from analyze import analyze_audio_bytes
+from features import AnalysisOptions, FeatureGraph
+from syllables import syllable_nuclei
+from synthetic import generate_silence, generate_speech_like, to_wav_bytes
+from wav_io import read_wav_bytes
+
+DURATIONS = [1, 10, 60, 600]
+QUICK_DURATIONS = [1, 10]
+SAMPLE_RATES = [16000, 24000, 48000]
+SIGNALS = ["speech", "silence"]
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+# (NumPy stage, Praat stage it replaces): the NumPy backends must stay faster
+BACKEND_PAIRS = [("intensity_numpy", "intensity"), ("pitch_numpy", "pitch")]
+
+GENERATORS = {
+    "speech": generate_speech_like,
+    "silence": generate_silence,
+}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (0 if unavailable)"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(setup: Callable[[], Any], run: Callable[[Any], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Best wall time of run(setup()) over `repeat` runs, then one traced run for allocations
+
+    Only run() is timed; setup() prepares fresh inputs for every run. An
+    untimed warm-up run absorbs one-time costs (lazy imports, Praat init).
+    """
+    try:
+        run(setup())
+    except Exception:
+        pass
+
+    best = float('inf')
+    error = None
+    for _ in range(repeat):
+        prepared = setup()
+        start = time.perf_counter()
+        try:
+            run(prepared)
+        except Exception as e:
+            error = str(e)
+        best = min(best, time.perf_counter() - start)
+
+    prepared = setup()
+    tracemalloc.start()
+    try:
+        run(prepared)
+    except Exception:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {"seconds": round(best, 6), "alloc_peak_mb": round(peak / (1024 * 1024), 3)}
+    if error:
+        result["error"] = error
+    return result
+
+
+def stage_functions(content: bytes) -> List[tuple]:
+    """
+    (name, setup, run) for each stage
+
+    setup() builds a FeatureGraph with the stage's inputs already computed,
+    so only the stage itself is timed.
+    """
+    values, sample_rate = read_wav_bytes(content)
+    sound = parselmouth.Sound(values, sampling_frequency=sample_rate)
+
+    def graph_with(*ready: str) -> FeatureGraph:
+        graph = FeatureGraph(sound)
+        for name in ready:
+            getattr(graph, name)
+        return graph
+
+    def syllables(graph: FeatureGraph) -> None:
+        times, intensity_db = graph.intensity_contour
+        syllable_nuclei(intensity_db, times, graph.pitch.selected_array['frequency'], graph.pitch.xs())
+
+    return [
+        ("decode_wav", lambda: None, lambda _: read_wav_bytes(content)),
+        ("sound", lambda: None, lambda _: parselmouth.Sound(values, sampling_frequency=sample_rate)),
+        ("pitch", graph_with, lambda g: g.pitch),
+        ("pitch_numpy", lambda: None, lambda _: pitch.numpy_pitch(sound, 0.01)),
+        ("intensity", graph_with, lambda g: g.intensity),
+        ("intensity_numpy", lambda: None, lambda _: energy.intensity_frames(values, sample_rate, 0.01)),
+        ("harmonicity", graph_with, lambda g: g.harmonicity),
+        ("point_process", lambda: graph_with("pitch"), lambda g: g.point_process),
+        ("jitter_shimmer", lambda: graph_with("pitch", "point_process"), lambda g: g.jitter_shimmer),
+        ("syllables", lambda: graph_with("pitch", "intensity_contour"), syllables),
+        ("analyze_full", lambda: None, lambda _: analyze_audio_bytes(content)),
+        ("analyze_fast", lambda: None, lambda _: analyze_audio_bytes(content, AnalysisOptions(profile="fast"))),
+    ]
+
+
+def run_case(signal: str, duration: float, sample_rate: int, repeat: int) -> Dict[str, Any]:
+    """Benchmark every stage for one case; runs in a fresh process"""
+    audio = GENERATORS[signal](duration, sample_rate)
+    content = to_wav_bytes(audio, sample_rate)
+    del audio
+
+    stages = {}
+    for name, setup, run in stage_functions(content):
+        stages[name] = measure(setup, run, repeat)
+
+    return {
+        "case": case_name(signal, duration, sample_rate),
+        "stages": stages,
+        "speedups": backend_speedups(stages),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def backend_speedups(stages: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+    """Praat stage time over NumPy stage time, for each pair in BACKEND_PAIRS"""
+    speedups = {}
+    for numpy_stage, praat_stage in BACKEND_PAIRS:
+        fast, slow = stages.get(numpy_stage), stages.get(praat_stage)
+        if fast and slow and "error" not in fast and "error" not in slow and fast["seconds"] > 0:
+            speedups[numpy_stage] = round(slow["seconds"] / fast["seconds"], 2)
+    return speedups
+
+
+def slower_backends(results: List[Dict[str, Any]], min_seconds: float) -> List[str]:
+    """Describe every case where a NumPy backend is not faster than the Praat stage it replaces"""
+    slower = []
+    for case in results:
+        for numpy_stage, praat_stage in BACKEND_PAIRS:
+            speedup = case.get("speedups", {}).get(numpy_stage)
+            # Stages too fast to time reliably are not compared
+            if speedup is None or case["stages"][praat_stage]["seconds"] < min_seconds:
+                continue
+            if speedup < 1:
+                slower.append(f"{case['case']} {numpy_stage}: {1 / speedup:.2f}x slower than {praat_stage}")
+    return slower
+
+
+def case_name(signal: str, duration: float, sample_rate: int) -> str:
+    return f"{signal}-{duration:g}s-{sample_rate // 1000}k"
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float,
+            rss_threshold: float, min_seconds: float) -> List[str]:
+    """Describe every stage that is slower (or a case that uses more memory) than the baseline allows"""
+    regressions = []
+    for case in results:
+        reference = baseline.get(case["case"])
+        if reference is None:
+            continue
+
+        for stage, current in case["stages"].items():
+            previous = reference["stages"].get(stage)
+            if previous is None or "error" in current or "error" in previous:
+                continue
+            # Ignore stages too fast to time reliably
+            if previous["seconds"] < min_seconds and current["seconds"] < min_seconds:
+                continue
+            if current["seconds"] > previous["seconds"] * threshold:
+                regressions.append(
+                    f"{case['case']} {stage}: {current['seconds']:.4f}s vs baseline "
+                    f"{previous['seconds']:.4f}s ({current['seconds'] / previous['seconds']:.2f}x)"
+                )
+
+        if reference.get("peak_rss_mb") and case["peak_rss_mb"] > reference["peak_rss_mb"] * rss_threshold:
+            regressions.append(
+                f"{case['case']} peak RSS: {case['peak_rss_mb']} MB vs baseline {reference['peak_rss_mb']} MB"
+            )
+    return regressions
+
+
+def print_case(case: Dict[str, Any]) -> None:
+    print(f"\n{case['case']}  (peak RSS {case['peak_rss_mb']} MB)")
+    for stage, result in case["stages"].items():
+        note = f"  [{result['error']}]" if "error" in result else ""
+        print(f"  {stage:<16} {result['seconds'] * 1000:>10.2f} ms  {result['alloc_peak_mb']:>8.2f} MB alloc{note}")
+    for stage, speedup in case.get("speedups", {}).items():
+        print(f"  {stage:<16} {speedup:>10.2f}x the Praat stage's speed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the speech analysis stages")
+    parser.add_argument("--quick", action="store_true", help="Only 1 s and 10 s cases")
+    parser.add_argument("--durations", type=float, nargs="+", help="Durations in seconds")
+    parser.add_argument("--rates", type=int, nargs="+", default=SAMPLE_RATES, help="Sample rates in Hz")
+    parser.add_argument("--signals", nargs="+", default=SIGNALS, choices=SIGNALS)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the fastest is kept")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="Save results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed slowdown factor per stage")
+    parser.add_argument("--rss-threshold", type=float, default=1.2, help="Allowed peak RSS growth factor")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="Stages faster than this are not compared")
+    parser.add_argument("--check-backends", action="store_true",
+                        help="Fail if a NumPy backend is slower than the Praat stage it replaces")
+    args = parser.parse_args()
+
+    durations = args.durations or (QUICK_DURATIONS if args.quick else DURATIONS)
+    cases = [(s, d, r) for s in args.signals for d in durations for r in args.rates]
+
+    print("=" * 60)
+    print(f"Speech Analysis Benchmark - {len(cases)} cases")
+    print(f"parselmouth {parselmouth.__version__}, numpy {np.__version__}")
+    print("=" * 60)
+
+    # One fresh process per case so peak RSS belongs to that case alone
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for signal, duration, sample_rate in cases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            case = pool.submit(run_case, signal, duration, sample_rate, args.repeat).result()
+        print_case(case)
+        results.append(case)
+
+    report = {
+        case["case"]: {"stages": case["stages"], "speedups": case["speedups"], "peak_rss_mb": case["peak_rss_mb"]}
+        for case in results
+    }
+    report_meta = {"parselmouth": parselmouth.__version__, "numpy": np.__version__}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"meta": report_meta, "cases": report}, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({"meta": report_meta, "cases": report}, f, indent=2)
+        print(f"\n[OK] Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["cases"], args.threshold, args.rss_threshold, args.min_seconds)
+
+        print("\n" + "=" * 60)
+        if regressions:
+            print(f"[FAILED] {len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"[OK] No regressions against {args.baseline} (baseline: {baseline.get('meta')})")
+
+    if args.check_backends:
+        slower = slower_backends(results, args.min_seconds)
+        print("\n" + "=" * 60)
+        if slower:
+            print(f"[FAILED] {len(slower)} NumPy backend(s) slower than Praat:")
+            for line in slower:
+                print(f"  {line}")
+            sys.exit(1)
+        print("[OK] Every NumPy backend is faster than the Praat stage it replaces")
+
+
+if __name__ == '__main__':
+    main()
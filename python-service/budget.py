@@ -0,0 +1,212 @@
+"""
+Deadline-aware analysis planning
+A request may carry a latency budget (X-Analysis-Budget-Ms). Each worker
+predicts the cost of every analysis stage from the recording's length
+and rate, and picks the most complete plan that fits what is left of
+the budget: first HNR on a 16 kHz copy, then the fast profile (coarser
+pitch and intensity steps), then no HNR, then no jitter/shimmer. Pitch,
+intensity and timing are always computed.
+
+Predictions are scaled by how fast this worker has recently been
+compared with the reference costs below, so under CPU contention the
+planner picks cheaper plans.
+
+Configuration (environment variables):
+    BUDGET_HEADROOM  Share of the remaining budget a plan may fill (default: 0.8)
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from features import HNR_DOWNSAMPLED_RATE, PROFILES, get_profile
+
+BUDGET_HEADROOM = float(os.environ.get("BUDGET_HEADROOM", "0.8"))
+
+# Reference stage costs, measured on speech-like audio with one core:
+# (seconds per second of audio at 16 kHz and 10 ms frames, exponent of the
+# rate dependence, whether the cost scales with the number of frames)
+STAGE_COSTS = {
+    "resample": (0.0022, 1.0, False),
+    "pitch": (0.0020, 1.35, True),
+    "intensity": (0.0002, 1.5, True),
+    "harmonicity": (0.0175, 2.0, True),
+    "point_process": (0.0019, 1.8, False),
+    "jitter_shimmer": (0.0002, 1.0, False),
+    "timing": (0.00002, 0.0, True),
+    "syllables": (0.00005, 0.0, True),
+}
+
+# Weight of the latest analysis in the worker's speed estimate
+SPEED_SMOOTHING = 0.3
+SPEED_RANGE = (0.25, 20.0)
+
+# Metric names used in the report, per result group
+VOICE_QUALITY_METRICS = {
+    "hnr": "voice_quality.harmonics_to_noise_ratio",
+    "jitter": "voice_quality.jitter",
+    "shimmer": "voice_quality.shimmer",
+}
+
+
+@dataclass(frozen=True)
+class Plan:
+    """
+    How one analysis is run
+
+    hnr is one of features.HNR_MODES; jitter_shimmer is False when both
+    are omitted. Passed on to FeatureGraph.
+    """
+    profile: str
+    hnr: str = "full"
+    jitter_shimmer: bool = True
+
+
+def stage_costs(plan: Plan, duration: float, sample_rate: float,
+                features: FrozenSet[str]) -> Dict[str, float]:
+    """Reference cost in seconds of each stage the plan runs"""
+    profile = get_profile(plan.profile)
+    rate = min(sample_rate, profile.sample_rate or sample_rate)
+    voice_quality = "voice_quality" in features
+
+    def cost(stage: str, at_rate: float, time_step: float = 0.01) -> float:
+        seconds, exponent, per_frame = STAGE_COSTS[stage]
+        frames = 0.01 / time_step if per_frame else 1.0
+        return seconds * duration * (at_rate / 16000) ** exponent * frames
+
+    costs = {}
+    if rate < sample_rate or (voice_quality and plan.hnr == "downsampled" and sample_rate > HNR_DOWNSAMPLED_RATE):
+        costs["resample"] = cost("resample", sample_rate)
+    if "pitch" in features or (voice_quality and plan.jitter_shimmer):
+        costs["pitch"] = cost("pitch", rate, profile.pitch_time_step)
+    if features & {"intensity", "timing"}:
+        costs["intensity"] = cost("intensity", rate, profile.intensity_time_step)
+    if "timing" in features:
+        costs["timing"] = cost("timing", rate, profile.intensity_time_step)
+        costs["syllables"] = cost("syllables", rate, profile.intensity_time_step)
+    if voice_quality and plan.hnr != "omitted":
+        hnr_rate = min(rate, HNR_DOWNSAMPLED_RATE) if plan.hnr == "downsampled" else rate
+        costs["harmonicity"] = cost("harmonicity", hnr_rate, profile.harmonicity_time_step)
+    if voice_quality and plan.jitter_shimmer:
+        costs["point_process"] = cost("point_process", rate)
+        costs["jitter_shimmer"] = cost("jitter_shimmer", rate)
+    return costs
+
+
+def candidate_plans(profile: str, sample_rate: float) -> List[Plan]:
+    """Plans from most to least complete"""
+    plans = [Plan(profile)]
+    analysis_rate = PROFILES[profile].sample_rate or sample_rate
+    if min(sample_rate, analysis_rate) > HNR_DOWNSAMPLED_RATE:
+        plans.append(Plan(profile, "downsampled"))
+    if profile != "fast":
+        plans.append(Plan("fast"))
+    plans.append(Plan("fast", "omitted"))
+    plans.append(Plan("fast", "omitted", jitter_shimmer=False))
+    return plans
+
+
+def coverage(plan: Plan, requested_profile: str, features: FrozenSet[str]) -> Dict[str, List[str]]:
+    """
+    Which metrics a plan computes as requested, estimates or omits
+
+    Metrics computed with a downgraded profile or on a downsampled copy
+    count as estimated; scores are estimated when any of their inputs is.
+    """
+    downgraded = plan.profile != requested_profile
+    report: Dict[str, List[str]] = {"computed": [], "estimated": [], "omitted": []}
+
+    for group in ("pitch", "intensity", "timing"):
+        if group in features:
+            report["estimated" if downgraded else "computed"].append(group)
+
+    if "voice_quality" in features:
+        if plan.hnr == "omitted":
+            hnr = "omitted"
+        else:
+            hnr = "estimated" if downgraded or plan.hnr == "downsampled" else "computed"
+        report[hnr].append(VOICE_QUALITY_METRICS["hnr"])
+        for metric in ("jitter", "shimmer"):
+            status = "omitted" if not plan.jitter_shimmer else "estimated" if downgraded else "computed"
+            report[status].append(VOICE_QUALITY_METRICS[metric])
+
+    if "scores" in features:
+        exact = not report["estimated"] and not report["omitted"]
+        report["computed" if exact else "estimated"].append("scores")
+    return report
+
+
+def reported_plan(report: Dict[str, Any], requested_profile: str, sample_rate: float,
+                  features: FrozenSet[str]) -> Plan:
+    """The candidate plan with the coverage a budget report lists"""
+    listed = {status: report[status] for status in ("computed", "estimated", "omitted")}
+    for plan in candidate_plans(requested_profile, sample_rate):
+        if coverage(plan, requested_profile, features) == listed:
+            return plan
+    return Plan(report["profile"])
+
+
+class CostModel:
+    """
+    Stage cost predictions for this worker process
+
+    speed is the smoothed ratio of measured to reference stage costs; it
+    rises while the machine is contended and falls back when it is idle.
+    The first analysis observed after reset() sets it outright.
+    """
+
+    def __init__(self, headroom: float = BUDGET_HEADROOM):
+        self.headroom = headroom
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the measured speed, so the next observed analysis calibrates it"""
+        self.speed = 1.0
+        self.calibrated = False
+
+    def predict(self, plan: Plan, duration: float, sample_rate: float, features: FrozenSet[str]) -> float:
+        """Predicted seconds for the plan's stages"""
+        return sum(stage_costs(plan, duration, sample_rate, features).values()) * self.speed
+
+    def plan(self, budget: float, profile: str, duration: float, sample_rate: float,
+             features: FrozenSet[str]) -> Tuple[Plan, float]:
+        """
+        The most complete plan predicted to fit in budget seconds
+
+        Falls back to the cheapest plan when none fits.
+
+        Returns:
+            (plan, predicted seconds)
+        """
+        for plan in candidate_plans(profile, sample_rate):
+            predicted = self.predict(plan, duration, sample_rate, features)
+            if predicted <= budget * self.headroom:
+                break
+        return plan, predicted
+
+    def observe(self, plan: Plan, duration: float, sample_rate: float, features: FrozenSet[str],
+                stages: Dict[str, float]) -> None:
+        """Update speed from the measured stage timings of a finished analysis"""
+        costs = stage_costs(plan, duration, sample_rate, features)
+        reference = sum(costs.values())
+        measured = sum(stages.get(stage, 0.0) for stage in costs)
+        if reference <= 0 or measured <= 0:
+            return
+        low, high = SPEED_RANGE
+        ratio = min(high, max(low, measured / reference))
+        self.speed = self.speed + SPEED_SMOOTHING * (ratio - self.speed) if self.calibrated else ratio
+        self.calibrated = True
+
+    def report(self, plan: Plan, predicted: float, budget: float, requested_profile: str,
+               features: FrozenSet[str]) -> Dict[str, Any]:
+        """The "budget" entry added to budgeted results"""
+        return {
+            "available_ms": round(budget * 1000),
+            "planned_ms": round(predicted * 1000),
+            "profile": plan.profile,
+            **coverage(plan, requested_profile, features),
+        }
+
+
+# Module-level model, one per worker process
+cost_model = CostModel()
@@ -0,0 +1,153 @@
+"""
+Silence compaction for transcription uploads
+Finds speech with the speech gate's frame levels and threshold over the
+raw PCM (see energy.py), shortens every pause longer than a limit, and
+re-encodes what is left (optionally as 16 kHz mono), with a map from
+compacted back to original times
+
+Configuration (environment variables):
+    COMPACT_MAX_PAUSE_SECONDS  Longer pauses are shortened to this (default: 0.5)
+"""
+
+import io
+import os
+import wave
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import parselmouth
+
+import energy
+from metrics import StageTimer
+from uploads import Source, open_source
+from wav_io import DECODE_BLOCK_FRAMES, WavInfo, bytes_per_frame, decode_pcm, iter_pcm_blocks, parse_wav_header
+
+COMPACT_MAX_PAUSE_SECONDS = float(os.environ.get("COMPACT_MAX_PAUSE_SECONDS", "0.5"))
+
+# Output rate when downsampling; speech recognisers need nothing above 8 kHz
+COMPACT_SAMPLE_RATE = 16000
+
+
+def keep_segments(speech: np.ndarray, max_pause: int) -> List[Tuple[int, int]]:
+    """
+    Frame ranges [start, end) to keep
+
+    Pauses of up to max_pause frames are kept whole. Longer ones, and the
+    silence before the first and after the last speech, are cut down to
+    max_pause frames: half after the speech before, half before the
+    speech after.
+    """
+    edges = np.diff(np.concatenate([[False], speech, [False]]).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return []
+
+    # Merge speech runs separated by short pauses
+    long_pause = starts[1:] - ends[:-1] > max_pause
+    starts = starts[np.concatenate([[True], long_pause])]
+    ends = ends[np.concatenate([long_pause, [True]])]
+
+    lead = max_pause // 2
+    trail = max_pause - lead
+    starts = np.maximum(starts - lead, 0)
+    ends = np.minimum(ends + trail, len(speech))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def encode_wav(blocks: List[np.ndarray], sample_rate: int, channels: int) -> bytes:
+    """16-bit PCM WAV from float blocks of shape (channels, samples)"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as out:
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        for block in blocks:
+            pcm = np.clip(np.round(block.T * 32767), -32768, 32767).astype('<i2')
+            out.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def compact_pcm(content: bytes, info: WavInfo, max_pause: float = COMPACT_MAX_PAUSE_SECONDS,
+                downsample: bool = True, threshold_db: Optional[float] = None,
+                timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+    """
+    Compact a PCM payload
+
+    Args:
+        max_pause: Longest pause kept, in seconds
+        downsample: Mix to mono and resample to COMPACT_SAMPLE_RATE (if higher)
+        threshold_db: Speech level in Praat dB; the speech gate's (energy.speech_gate) when omitted
+
+    Returns:
+        {"audio" (WAV bytes), "sample_rate", "channels", "original_duration",
+        "compacted_duration", "segments"}, where each segment is
+        [compacted start, original start, duration] in seconds
+    """
+    timer = timer or StageTimer()
+    rate = info.sample_rate
+    frame = max(1, int(round(energy.GATE_FRAME_SECONDS * rate)))
+    frame_bytes = bytes_per_frame(info)
+    n_samples = info.data_size // frame_bytes
+
+    with timer.stage("vad"):
+        block = max(1, DECODE_BLOCK_FRAMES // frame) * frame
+        if threshold_db is None:
+            levels, threshold = energy.speech_gate(lambda: iter_pcm_blocks(content, info, block), rate, frame)
+        else:
+            levels, threshold = energy.frame_levels(iter_pcm_blocks(content, info, block), frame), threshold_db
+        frames = keep_segments(levels > threshold, int(round(max_pause * rate / frame)))
+
+    out_rate = min(rate, COMPACT_SAMPLE_RATE) if downsample else rate
+    channels = 1 if downsample else info.channels
+    blocks = []
+    segments = []
+    written = 0
+
+    for first_frame, last_frame in frames:
+        first = first_frame * frame
+        last = n_samples if last_frame == len(levels) else last_frame * frame
+        with timer.stage("decode"):
+            samples = decode_pcm(content, info._replace(
+                data_offset=info.data_offset + first * frame_bytes, data_size=(last - first) * frame_bytes
+            ))
+        if downsample:
+            with timer.stage("resample"):
+                samples = samples.mean(axis=0, keepdims=True)
+                if out_rate < rate:
+                    sound = parselmouth.Sound(samples, sampling_frequency=rate)
+                    samples = sound.resample(out_rate, 50).values
+
+        blocks.append(samples)
+        segments.append([round(written / out_rate, 4), round(first / rate, 4), round((last - first) / rate, 4)])
+        written += samples.shape[1]
+
+    with timer.stage("encode"):
+        audio = encode_wav(blocks, out_rate, channels)
+
+    return {
+        "audio": audio,
+        "sample_rate": out_rate,
+        "channels": channels,
+        "original_duration": round(n_samples / rate, 3),
+        "compacted_duration": round(written / out_rate, 3),
+        "segments": segments,
+    }
+
+
+def compact_upload(source: Source, max_pause: float = COMPACT_MAX_PAUSE_SECONDS, downsample: bool = True,
+                   threshold_db: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Worker entry point for /compact
+
+    Raises:
+        ValueError: If the upload is not a supported WAV file
+
+    Returns:
+        (compact_pcm result, seconds spent in each stage)
+    """
+    timer = StageTimer()
+    with open_source(source) as content:
+        info = parse_wav_header(content)
+        result = compact_pcm(content, info, max_pause, downsample, threshold_db, timer)
+    return result, timer.stages
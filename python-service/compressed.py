@@ -0,0 +1,120 @@
+"""
+In-process decoding of compressed uploads
+MediaRecorder output (WebM or Ogg with Opus or Vorbis; MP4/AAC from
+Safari) is demuxed and decoded packet by packet with PyAV into a float32
+PCM buffer, which then takes the same path as raw PCM uploads
+
+PyAV is in requirements.txt; where it is missing, compressed uploads are
+rejected with 415 and WAV and PCM uploads work as before.
+
+Configuration (environment variables):
+    DECODE_MAX_BYTES  Most float32 PCM a compressed upload may decode to; more gets 413 (default: 256 MB)
+"""
+
+import io
+import os
+from typing import Optional, Tuple
+
+from uploads import UploadTooLarge
+from wav_io import WavInfo, pcm_wav_info
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# About 23 minutes of 48 kHz mono; pcm_sound adds a float64 copy of twice the size
+DECODE_MAX_BYTES = int(os.environ.get("DECODE_MAX_BYTES", str(256 << 20)))
+
+
+class UnsupportedAudio(ValueError):
+    """A compressed upload that this service cannot decode"""
+
+
+class DecodedTooLarge(UploadTooLarge):
+    """A compressed upload that decodes to more than DECODE_MAX_BYTES"""
+
+    def __init__(self, max_bytes: int):
+        ValueError.__init__(self, f"Compressed upload decodes to more than the {max_bytes}-byte limit")
+        self.max_bytes = max_bytes
+
+    def __reduce__(self):
+        # Raised in worker processes, so it must survive pickling
+        return type(self), (self.max_bytes,)
+
+
+def compressed_format(content: bytes) -> Optional[str]:
+    """Container of a compressed upload, by its magic bytes: "webm", "ogg", "mp4" or None"""
+    head = bytes(content[:12])
+    if head.startswith(b"\x1a\x45\xdf\xa3"):  # EBML: WebM and Matroska
+        return "webm"
+    if head.startswith(b"OggS"):
+        return "ogg"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    return None
+
+
+def check_decodable(content: bytes) -> None:
+    """
+    Fail early for compressed uploads when PyAV is missing
+
+    Raises:
+        UnsupportedAudio: If content is compressed and PyAV is not installed
+    """
+    container = compressed_format(content)
+    if container is not None and av is None:
+        raise UnsupportedAudio(f"Decoding {container} uploads needs PyAV (pip install av); send WAV or PCM instead")
+
+
+def decode_compressed(content: bytes, path: Optional[str] = None,
+                      max_bytes: int = DECODE_MAX_BYTES) -> Tuple[bytearray, WavInfo]:
+    """
+    Decode the first audio stream of a compressed upload
+
+    Packets are demuxed and decoded one at a time, and each decoded frame
+    is appended as interleaved float32 to one growing buffer: no temp file
+    or subprocess, and the decoded audio is held once.
+
+    Args:
+        content: The upload
+        path: The upload's spool file, read directly instead of content
+
+    Returns:
+        (float32 PCM, WavInfo describing it) for decode_pcm
+
+    Raises:
+        UnsupportedAudio: If PyAV is missing, or content has no decodable audio
+        DecodedTooLarge: As soon as the decoded audio exceeds max_bytes
+    """
+    check_decodable(content)
+    try:
+        with av.open(path if path is not None else io.BytesIO(content), mode="r") as container:
+            if not container.streams.audio:
+                raise UnsupportedAudio("Upload has no audio stream")
+            stream = container.streams.audio[0]
+            resampler = av.AudioResampler(format="flt")  # Packed float32, same layout and rate
+
+            pcm = bytearray()
+            rate = channels = None
+
+            def append(frames):
+                nonlocal rate, channels
+                for converted in frames:
+                    rate, channels = converted.sample_rate, converted.layout.nb_channels
+                    pcm.extend(converted.to_ndarray().tobytes())
+                    if len(pcm) > max_bytes:
+                        raise DecodedTooLarge(max_bytes)
+
+            for packet in container.demux(stream):
+                for frame in packet.decode():
+                    append(resampler.resample(frame))
+            # The resampler may hold back samples, and with some codecs emit only here
+            append(resampler.resample(None))
+    except av.error.FFmpegError as e:
+        raise UnsupportedAudio(f"Could not decode the upload: {e}")
+
+    if not pcm:
+        raise UnsupportedAudio("Upload has no decodable audio")
+    return pcm, pcm_wav_info("float32", rate, channels, len(pcm))
+
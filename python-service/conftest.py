@@ -0,0 +1,22 @@
+"""
+Shared fixtures
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def client(tmp_path_factory):
+    """TestClient for the service, with its worker pool running (workers start cold) and a scratch job store"""
+    from fastapi.testclient import TestClient
+
+    import analyze
+    import jobs
+
+    with pytest.MonkeyPatch.context() as mp:
+        # Workers are spawned, so they read the environment rather than patched modules
+        mp.setenv("ANALYSIS_WARM_UP", "0")
+        mp.setattr(jobs, "JOBS_DB_PATH", str(tmp_path_factory.mktemp("jobs") / "jobs.db"))
+        mp.setattr(jobs, "_store", None)
+        with TestClient(analyze.app) as test_client:
+            yield test_client
@@ -0,0 +1,82 @@
+"""
+Frame-level contours for plotting
+Decimates the pitch and intensity contours the analysis already computes
+to a requested number of points, and packs them as base64 arrays rather
+than JSON number lists
+
+Configuration (environment variables):
+    CONTOUR_MAX_POINTS  Largest accepted contour_points (default: 10000)
+"""
+
+import base64
+import os
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+CONTOUR_MAX_POINTS = int(os.environ.get("CONTOUR_MAX_POINTS", "10000"))
+
+# Encodings for contour values; frame times are always float32
+CONTOUR_DTYPES = {"float16": "<f2", "float32": "<f4"}
+DEFAULT_CONTOUR_DTYPE = "float16"
+
+Contour = Tuple[np.ndarray, np.ndarray]
+
+
+def decimate(times: np.ndarray, values: np.ndarray, points: int) -> Contour:
+    """
+    Reduce a contour to at most points frames while keeping its shape
+
+    The frames are split into points / 2 equal buckets and each bucket
+    keeps its lowest and highest frame, in time order (min-max
+    decimation), so peaks and dips that plain striding would step over
+    survive. NaN frames (unvoiced pitch) are ignored; a bucket with
+    nothing but NaN stays NaN, so gaps are kept. Returns frames in order.
+    """
+    n = len(values)
+    if n <= points:
+        return times, values
+
+    size = -(-n // max(1, points // 2))
+    buckets = -(-n // size)
+    grid = np.full(buckets * size, np.nan)
+    grid[:n] = values
+    grid = grid.reshape(buckets, size)
+
+    missing = np.isnan(grid)
+    low = np.argmin(np.where(missing, np.inf, grid), axis=1)
+    high = np.argmax(np.where(missing, -np.inf, grid), axis=1)
+
+    # All-NaN buckets keep their first and last frames, so gaps keep their extent
+    last = np.full(buckets, size - 1)
+    last[-1] = n - 1 - (buckets - 1) * size
+    gaps = missing.all(axis=1)
+    low[gaps], high[gaps] = 0, last[gaps]
+
+    offsets = np.stack([np.minimum(low, high), np.maximum(low, high)], axis=1)
+    index = np.unique(np.arange(buckets)[:, None] * size + offsets)
+    return times[index], values[index]
+
+
+def encode_array(values: np.ndarray, dtype: str) -> str:
+    """Little-endian array bytes as base64"""
+    return base64.b64encode(np.asarray(values, dtype=CONTOUR_DTYPES[dtype]).tobytes()).decode("ascii")
+
+
+def pack_contours(contours: Dict[str, Contour], points: int, dtype: str = DEFAULT_CONTOUR_DTYPE) -> Dict[str, Any]:
+    """
+    The "contours" entry of the results
+
+    Each contour becomes {"count", "dtype", "times", "values"}, with times
+    (seconds, float32) and values (dtype) as base64 little-endian arrays.
+    """
+    packed = {}
+    for name, (times, values) in contours.items():
+        times, values = decimate(times, values, points)
+        packed[name] = {
+            "count": len(values),
+            "dtype": dtype,
+            "times": encode_array(times, "float32"),
+            "values": encode_array(values, dtype),
+        }
+    return packed
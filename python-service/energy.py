@@ -0,0 +1,327 @@
+"""
+Pure-NumPy frame energy and voice activity detection
+A vectorized alternative to Praat's to_intensity for the timing metrics,
+following Praat's framing and windowing so the two backends agree, and
+the speech gate that skips analysis of chunks with nothing to analyze
+
+Configuration (environment variables):
+    VAD_HANGOVER_SECONDS     Speech kept active after each speech frame (default: 0.1)
+    SPEECH_GATE_RANGE_DB     Frames this far below the loud (95th percentile) frames are not speech (default: 25)
+    SPEECH_GATE_SNR_DB       Frames must be this far above the noise floor (10th percentile), if any (default: 10)
+    SPEECH_GATE_FLOOR_DB     Frames below this level are never speech, in Praat dB (default: 30)
+    SPEECH_GATE_MIN_SECONDS  Less speech than this skips analysis (default: 0.25, 0 disables the gate)
+"""
+
+import os
+from functools import lru_cache
+from typing import Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+VAD_HANGOVER_SECONDS = float(os.environ.get("VAD_HANGOVER_SECONDS", "0.1"))
+SPEECH_GATE_RANGE_DB = float(os.environ.get("SPEECH_GATE_RANGE_DB", "25"))
+SPEECH_GATE_SNR_DB = float(os.environ.get("SPEECH_GATE_SNR_DB", "10"))
+SPEECH_GATE_FLOOR_DB = float(os.environ.get("SPEECH_GATE_FLOOR_DB", "30"))
+SPEECH_GATE_MIN_SECONDS = float(os.environ.get("SPEECH_GATE_MIN_SECONDS", "0.25"))
+
+# Frame length of the speech gate
+GATE_FRAME_SECONDS = 0.01
+
+# Steady recordings count as speech only when periodic at a voice pitch:
+# frames long enough for two periods at the lowest pitch, and the score
+# they must reach (noise and mains hum score below 0.2, voiced sound above 1)
+VOICE_PITCH_RANGE = (70.0, 400.0)
+PERIODICITY_FRAME_SECONDS = 0.04
+PERIODICITY_THRESHOLD = 0.5
+
+# Praat's intensity window: Kaiser-like Bessel window 6.4 / minimum pitch long
+KAISER_BETA = 2 * np.pi * np.pi + 0.5
+REFERENCE_POWER = 4e-10  # (2e-5 Pa)^2
+
+# Upper bound on the temporary (frames x window) block, in samples
+BLOCK_SAMPLES = 1 << 18
+
+
+def frame_times(n_samples: int, sample_rate: float, window_duration: float,
+                time_step: float) -> np.ndarray:
+    """Centres of the analysis frames, placed the way Praat places them"""
+    dx = 1.0 / sample_rate
+    duration = dx * n_samples
+    if duration < window_duration:
+        return np.zeros(0)
+    n_frames = int(np.floor((duration - window_duration) / time_step)) + 1
+    # Same arithmetic as Praat, so frame centres round to the same samples
+    first_sample_time = 0.5 * dx
+    mid_time = first_sample_time - 0.5 * dx + 0.5 * duration
+    first_time = mid_time - 0.5 * n_frames * time_step + 0.5 * time_step
+    return first_time + time_step * np.arange(n_frames)
+
+
+@lru_cache(maxsize=8)
+def intensity_window(sample_rate: float, minimum_pitch: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Praat's intensity window for this rate, and its cumulative sum from 0 (computed once per rate)"""
+    dx = 1.0 / sample_rate
+    half_duration = 0.5 * 6.4 / minimum_pitch
+    half = int(np.floor(half_duration / dx))
+    offsets = np.arange(-half, half + 1)
+    root = 1 - (offsets * dx / half_duration) ** 2
+    window = np.where(root > 0, np.i0(KAISER_BETA * np.sqrt(np.clip(root, 0, None))), 0.0)
+    cumulative_window = np.concatenate([[0.0], np.cumsum(window)])
+    window.flags.writeable = cumulative_window.flags.writeable = False
+    return window, cumulative_window
+
+
+def intensity_frames(samples: np.ndarray, sample_rate: float, time_step: float = 0.01,
+                     minimum_pitch: float = 100.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Intensity contour in dB, equivalent to Sound.to_intensity
+
+    Each frame is the mean-subtracted, window-weighted power of the samples
+    around its centre, from the window sums of polyphase_window_sums.
+
+    Args:
+        samples: Audio as (samples,) or (channels, samples)
+        sample_rate: Sampling frequency in Hz
+        time_step: Frame step in seconds
+        minimum_pitch: Lowest pitch to resolve; sets the window length
+
+    Returns:
+        (times, intensity_db)
+    """
+    samples = np.atleast_2d(samples)
+    n_samples = samples.shape[1]
+    dx = 1.0 / sample_rate
+
+    window_duration = 6.4 / minimum_pitch
+    window, cumulative_window = intensity_window(float(sample_rate), float(minimum_pitch))
+    half = len(window) // 2
+
+    times = frame_times(n_samples, sample_rate, window_duration, time_step)
+    if len(times) == 0:
+        return times, np.zeros(0)
+
+    # Sample nearest each frame centre (sample i sits at (i + 0.5) * dx)
+    mids = np.floor((times - 0.5 * dx) / dx + 0.5).astype(np.int64)
+    lo = np.maximum(mids - half, 0)
+    hi = np.minimum(mids + half, n_samples - 1)
+    count = hi - lo + 1
+    sum_weights = cumulative_window[hi - mids + half + 1] - cumulative_window[lo - mids + half]
+
+    starts = mids - half
+    # Frames are a whole number of samples apart at the usual rates (any
+    # multiple of 100 Hz at the 10 ms step). Centres fall halfway between
+    # samples, so rounding moves a few by one sample; those are redone.
+    step = int(round(time_step * sample_rate))
+    evenly_spaced = step > 0 and abs(time_step * sample_rate - step) < 1e-6
+    power = np.zeros(len(times))
+
+    for channel in samples:
+        if evenly_spaced:
+            sums = polyphase_window_sums(channel, starts[0], step, len(starts), window)
+            moved = np.flatnonzero(starts != starts[0] + step * np.arange(len(starts)))
+            if len(moved):
+                for total, redone in zip(sums, gathered_window_sums(channel, starts[moved], window)):
+                    total[moved] = redone
+        else:
+            sums = gathered_window_sums(channel, starts, window)
+        plain, weighted, weighted_square = sums
+        mean = plain / count
+
+        # sum w (x - mean)^2 expanded, so the mean needs no second pass
+        power += weighted_square - 2 * mean * weighted + mean * mean * sum_weights
+
+    power /= sum_weights * len(samples) * REFERENCE_POWER
+    with np.errstate(divide='ignore'):
+        intensity_db = np.where(power < 1e-30, -300.0, 10 * np.log10(np.maximum(power, 1e-30)))
+    return times, intensity_db
+
+
+def polyphase_window_sums(channel: np.ndarray, first: int, step: int, n_frames: int,
+                          window: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Plain and window-weighted sums of x, and weighted sums of x^2, for
+    frames of len(window) samples starting every step samples from first
+
+    The signal is folded into rows of step samples and the window into
+    step-long pieces, so frame k is the sum over q of row k + q times
+    piece q. Two matrix products cover every frame, reading the signal in
+    place instead of copying out overlapping frames (Praat's cost), and
+    samples outside the signal count as zero.
+    """
+    pieces = -(-len(window) // step)
+    rows = n_frames - 1 + pieces
+
+    def fold(weights):
+        return np.pad(weights, (0, pieces * step - len(weights))).reshape(pieces, step)
+
+    folded = np.vstack([fold(np.ones(len(window))), fold(window)])
+
+    # Rows wholly inside the signal are a view of it; the few at either end are padded copies
+    inner_start = min(rows, max(0, -(first // step)))
+    inner_stop = max(inner_start, min(rows, (len(channel) - first) // step))
+    linear, squared = [], []
+    for begin, end in ((0, inner_start), (inner_start, inner_stop), (inner_stop, rows)):
+        if begin == end:
+            continue
+        lo, hi = first + begin * step, first + end * step
+        signal = channel[max(lo, 0):max(hi, 0)]
+        if len(signal) < hi - lo:
+            left = min(max(-lo, 0), hi - lo)
+            signal = np.pad(signal, (left, hi - lo - left - len(signal)))
+        signal = signal.reshape(end - begin, step)
+        linear.append(folded @ signal.T)  # (2 * pieces, rows)
+        squared.append(folded[pieces:] @ (signal * signal).T)
+    linear, squared = np.hstack(linear), np.hstack(squared)
+
+    def frame_sums(products):
+        total = np.zeros(n_frames)
+        for q, piece in enumerate(products):
+            total += piece[q:q + n_frames]
+        return total
+
+    return frame_sums(linear[:pieces]), frame_sums(linear[pieces:]), frame_sums(squared)
+
+
+def gathered_window_sums(channel: np.ndarray, starts: np.ndarray,
+                         window: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """As polyphase_window_sums, for frames at arbitrary starts (copied out a block of frames at a time)"""
+    # Zero padding, only where frames reach past the signal, makes those samples contribute nothing
+    pad = max(0, -int(starts.min()), int(starts.max()) + len(window) - len(channel))
+    view = np.lib.stride_tricks.sliding_window_view(np.pad(channel, pad) if pad else channel, len(window))
+    plain, weighted, weighted_square = (np.zeros(len(starts)) for _ in range(3))
+    block = max(1, BLOCK_SAMPLES // len(window))
+    for begin in range(0, len(starts), block):
+        frames = view[starts[begin:begin + block] + pad]
+        plain[begin:begin + block] = frames.sum(axis=1)
+        weighted[begin:begin + block] = frames @ window
+        weighted_square[begin:begin + block] = (frames * frames) @ window
+    return plain, weighted, weighted_square
+
+
+def silence_threshold(intensity_db: np.ndarray) -> float:
+    """Speech/silence threshold used by the timing metrics"""
+    positive = intensity_db[intensity_db > 0]
+    mean_intensity = float(np.mean(positive)) if len(positive) > 0 else 0.0
+    return mean_intensity * 0.3 if mean_intensity > 0 else 40
+
+
+def apply_hangover(speech: np.ndarray, hangover_frames: int) -> np.ndarray:
+    """
+    Keep speech active for hangover_frames after each speech frame
+
+    Bridges short dips inside words without a per-frame loop.
+    """
+    if hangover_frames <= 0 or len(speech) == 0:
+        return speech
+    index = np.arange(len(speech))
+    last_speech = np.maximum.accumulate(np.where(speech, index, -hangover_frames - 1))
+    return index - last_speech <= hangover_frames
+
+
+def voice_activity(intensity_db: np.ndarray, time_step: float,
+                   hangover_seconds: float = VAD_HANGOVER_SECONDS) -> np.ndarray:
+    """Per-frame speech mask with hangover smoothing"""
+    speech = intensity_db > silence_threshold(intensity_db)
+    return apply_hangover(speech, int(round(hangover_seconds / time_step)))
+
+
+def frame_levels(blocks: Iterable[np.ndarray], frame_size: int) -> np.ndarray:
+    """
+    Level in dB of consecutive, non-overlapping frames of frame_size samples
+
+    A cheap stand-in for the intensity contour: plain mean-subtracted power
+    per frame, averaged over channels, on the same dB scale as Praat. A
+    trailing partial frame is dropped.
+
+    Args:
+        blocks: Audio as (channels, samples) blocks; every block but the
+            last must hold a whole number of frames
+    """
+    levels = []
+    for block in blocks:
+        block = np.atleast_2d(block)
+        n_frames = block.shape[1] // frame_size
+        frames = block[:, :n_frames * frame_size].reshape(block.shape[0], n_frames, frame_size)
+        power = frames.var(axis=2).mean(axis=0)
+        levels.append(10 * np.log10(np.maximum(power / REFERENCE_POWER, 1e-30)))
+    return np.concatenate(levels) if levels else np.zeros(0)
+
+
+def is_steady(levels: np.ndarray) -> bool:
+    """Whether the loud and quiet frames are within SPEECH_GATE_SNR_DB: steady noise, hum, or one held sound"""
+    if len(levels) == 0:
+        return True
+    quiet, loud = np.percentile(levels, [10, 95])
+    return float(loud - quiet) < SPEECH_GATE_SNR_DB
+
+
+def periodicity(blocks: Iterable[np.ndarray], sample_rate: float) -> float:
+    """
+    Median voice periodicity of PERIODICITY_FRAME_SECONDS frames
+
+    How far each frame's normalized autocorrelation climbs back, at a lag
+    in VOICE_PITCH_RANGE, from its lowest point at shorter lags: above 1
+    for voiced sound, near 0 for noise (whose autocorrelation only decays)
+    and for mains hum (whose period is longer).
+
+    Args:
+        blocks: Audio as (channels, samples) blocks; each block's trailing
+            partial frame is dropped
+    """
+    size = int(round(PERIODICITY_FRAME_SECONDS * sample_rate))
+    shortest, longest = (int(sample_rate / pitch) for pitch in reversed(VOICE_PITCH_RANGE))
+    scores = []
+    for block in blocks:
+        mono = np.atleast_2d(block).mean(axis=0)
+        n_frames = len(mono) // size
+        if n_frames == 0:
+            continue
+        frames = mono[:n_frames * size].reshape(n_frames, size)
+        frames = frames - frames.mean(axis=1, keepdims=True)
+        spectrum = np.fft.rfft(frames, 2 * size, axis=1)
+        autocorrelation = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, axis=1)[:, :longest + 1]
+        autocorrelation /= np.maximum(autocorrelation[:, :1], 1e-30)
+        climb = autocorrelation - np.minimum.accumulate(autocorrelation, axis=1)
+        scores.append(climb[:, shortest:].max(axis=1))
+    return float(np.median(np.concatenate(scores))) if scores else 0.0
+
+
+def gate_threshold(levels: np.ndarray, voiced: bool = False) -> float:
+    """
+    Frame level the speech gate counts as speech, from the recording's own levels
+
+    Within SPEECH_GATE_RANGE_DB of its loud frames, so quiet microphones
+    still pass. Quiet frames further below than that are a noise floor,
+    and speech must also be SPEECH_GATE_SNR_DB above it; fluent speech
+    with no pauses has none. A steady recording (see is_steady) passes
+    only when voiced, so background noise does not, however loud.
+    """
+    if len(levels) == 0:
+        return SPEECH_GATE_FLOOR_DB
+    if is_steady(levels) and not voiced:
+        return max(SPEECH_GATE_FLOOR_DB, float(np.max(levels)))
+    quiet, loud = np.percentile(levels, [10, 95])
+    noise_floor = float(quiet) + SPEECH_GATE_SNR_DB if loud - quiet > SPEECH_GATE_RANGE_DB else -np.inf
+    return max(SPEECH_GATE_FLOOR_DB, float(loud) - SPEECH_GATE_RANGE_DB, noise_floor)
+
+
+def speech_gate(blocks: Callable[[], Iterable[np.ndarray]], sample_rate: float,
+                frame_size: int) -> Tuple[np.ndarray, float]:
+    """
+    Frame levels of the audio and the speech gate's threshold for them
+
+    Args:
+        blocks: Returns the audio afresh as (channels, samples) blocks (see
+            frame_levels); read a second time, for periodicity, only when
+            the levels are steady
+    """
+    levels = frame_levels(blocks(), frame_size)
+    voiced = is_steady(levels) and periodicity(blocks(), sample_rate) >= PERIODICITY_THRESHOLD
+    return levels, gate_threshold(levels, voiced)
+
+
+def gated_speech_seconds(levels: np.ndarray, frame_seconds: float = GATE_FRAME_SECONDS,
+                         threshold_db: Optional[float] = None) -> float:
+    """Seconds of frames above threshold_db (default: gate_threshold of the levels)"""
+    threshold_db = gate_threshold(levels) if threshold_db is None else threshold_db
+    return float(np.sum(levels > threshold_db)) * frame_seconds
@@ -0,0 +1,372 @@
+"""
+Lazy feature graph for speech analysis
+Each Praat object (Pitch, Intensity, Harmonicity, PointProcess) is
+computed at most once per Sound and shared by every feature that needs it
+"""
+
+from dataclasses import dataclass, field
+from functools import cached_property, wraps
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+import numpy as np
+import parselmouth
+from parselmouth.praat import call
+
+import energy
+from contours import CONTOUR_DTYPES, CONTOUR_MAX_POINTS, DEFAULT_CONTOUR_DTYPE, Contour
+from metrics import StageTimer
+from pitch import DEFAULT_PITCH_BACKEND, PITCH_BACKENDS
+from scoring import THRESHOLDS_VERSION
+from syllables import intensity_peaks, pitch_voicing, zero_crossing_voicing
+
+# Result groups a caller can request, and the groups each one needs
+FEATURE_GROUPS = ("pitch", "intensity", "voice_quality", "timing", "scores")
+FEATURE_DEPENDENCIES = {
+    "pitch": {"pitch"},
+    "intensity": {"intensity"},
+    "voice_quality": {"voice_quality"},
+    "timing": {"timing"},
+    "scores": {"pitch", "intensity", "voice_quality", "timing"},
+}
+
+
+@dataclass(frozen=True)
+class AnalysisProfile:
+    """Analysis rate and time steps used for one analysis"""
+    name: str
+    sample_rate: Optional[float]  # Analysis rate; None keeps the input rate
+    pitch_time_step: float
+    intensity_time_step: float
+    harmonicity_time_step: float
+
+
+# full: today's behaviour at the upload's native rate
+# fast: anti-aliased decimation to 16 kHz (pitch, intensity and HNR need
+#       nothing above 8 kHz) and 20 ms frames; about 3x less work per request
+PROFILES = {
+    "full": AnalysisProfile("full", None, 0.01, 0.01, 0.01),
+    "fast": AnalysisProfile("fast", 16000, 0.02, 0.02, 0.02),
+}
+DEFAULT_PROFILE = "full"
+
+# praat: Sound.to_intensity, timing from the legacy global threshold
+# numpy: vectorized frame energies (see energy.py) and a VAD with hangover
+INTENSITY_BACKENDS = ("praat", "numpy")
+DEFAULT_INTENSITY_BACKEND = "praat"
+
+# HNR at the analysis rate, on a 16 kHz copy (a latency budget's downgrade), or not at all
+HNR_MODES = ("full", "downsampled", "omitted")
+HNR_DOWNSAMPLED_RATE = 16000
+
+
+class AnalysisError(ValueError):
+    """Analysis failure, tagged with the stage that raised it"""
+
+    def __init__(self, message: str, stage: Optional[str] = None):
+        super().__init__(message)
+        self.stage = stage
+
+    def __reduce__(self):
+        # Keep the stage when the error crosses the worker process boundary
+        return AnalysisError, (str(self), self.stage)
+
+
+def get_profile(name: Optional[str]) -> AnalysisProfile:
+    """
+    Look up an analysis profile by name
+
+    Raises:
+        ValueError: If the profile does not exist
+    """
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile: {name} (expected one of {', '.join(PROFILES)})")
+    return PROFILES[name]
+
+
+def resolve_features(features: Optional[Iterable[str]]) -> FrozenSet[str]:
+    """
+    Expand requested result groups with their dependencies
+
+    Raises:
+        ValueError: If an unknown group is requested
+    """
+    if features is None:
+        return frozenset(FEATURE_GROUPS)
+
+    requested = set(features)
+    unknown = requested - set(FEATURE_GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(sorted(unknown))}")
+
+    resolved = set(requested)
+    for group in requested:
+        resolved |= FEATURE_DEPENDENCIES[group]
+    return frozenset(resolved)
+
+
+@dataclass(frozen=True)
+class AnalysisOptions:
+    """
+    Per-request analysis settings
+
+    Validated on construction; features are expanded with their dependencies.
+    pitch_backend picks the pitch tracker (see pitch.py).
+    contour_points > 0 adds the requested pitch and intensity contours,
+    decimated to that many points (see contours.py).
+    """
+    features: FrozenSet[str] = field(default_factory=lambda: frozenset(FEATURE_GROUPS))
+    profile: str = DEFAULT_PROFILE
+    intensity_backend: str = DEFAULT_INTENSITY_BACKEND
+    pitch_backend: str = DEFAULT_PITCH_BACKEND
+    contour_points: int = 0
+    contour_dtype: str = DEFAULT_CONTOUR_DTYPE
+
+    def __post_init__(self):
+        object.__setattr__(self, "features", resolve_features(self.features))
+        get_profile(self.profile)
+        if self.intensity_backend not in INTENSITY_BACKENDS:
+            raise ValueError(
+                f"Unknown intensity backend: {self.intensity_backend} "
+                f"(expected one of {', '.join(INTENSITY_BACKENDS)})"
+            )
+        if self.pitch_backend not in PITCH_BACKENDS:
+            raise ValueError(
+                f"Unknown pitch backend: {self.pitch_backend} (expected one of {', '.join(PITCH_BACKENDS)})"
+            )
+        if self.contour_points != 0 and not 2 <= self.contour_points <= CONTOUR_MAX_POINTS:
+            raise ValueError(f"contour_points must be 0 or between 2 and {CONTOUR_MAX_POINTS}")
+        if self.contour_dtype not in CONTOUR_DTYPES:
+            raise ValueError(
+                f"Unknown contour dtype: {self.contour_dtype} (expected one of {', '.join(CONTOUR_DTYPES)})"
+            )
+
+    def cache_params(self) -> Dict[str, Any]:
+        """Parameters that change the result, for the result cache key"""
+        params = {
+            "features": sorted(self.features),
+            "profile": self.profile,
+            "intensity_backend": self.intensity_backend,
+            "pitch_backend": self.pitch_backend,
+            "contour_points": self.contour_points,
+            "contour_dtype": self.contour_dtype,
+        }
+        if "scores" in self.features:
+            params["thresholds"] = THRESHOLDS_VERSION
+        return params
+
+
+def timed(stage: str) -> Callable:
+    """Charge a FeatureGraph computation to a stage of the graph's timer"""
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self):
+            with self.timer.stage(stage):
+                return method(self)
+        return wrapper
+    return decorator
+
+
+class FeatureGraph:
+    """
+    Lazily evaluated analysis intermediates for one Sound
+
+    Accessing a feature computes it (and whatever it depends on) on first
+    use; later accesses reuse the cached object. Compute time is recorded
+    per stage on timer.
+
+    hnr (one of HNR_MODES) and jitter_shimmer let a latency budget
+    downgrade or omit the voice quality measures; omitted ones are None
+    in summary().
+    """
+
+    def __init__(self, sound: parselmouth.Sound, options: Optional[AnalysisOptions] = None,
+                 timer: Optional[StageTimer] = None, hnr: str = "full", jitter_shimmer: bool = True):
+        if hnr not in HNR_MODES:
+            raise ValueError(f"Unknown HNR mode: {hnr}")
+        self.source = sound
+        self.options = options or AnalysisOptions()
+        self.profile = get_profile(self.options.profile)
+        self.timer = timer or StageTimer()
+        self.hnr = hnr
+        self.measure_jitter_shimmer = jitter_shimmer
+
+    @property
+    def duration(self) -> float:
+        return self.source.duration
+
+    # Praat objects
+
+    @cached_property
+    @timed("resample")
+    def sound(self) -> parselmouth.Sound:
+        rate = self.profile.sample_rate
+        if rate is None or self.source.sampling_frequency <= rate:
+            return self.source
+        # Praat low-pass filters in the frequency domain before sinc interpolation
+        return self.source.resample(rate, 50)
+
+    @cached_property
+    @timed("resample")
+    def downsampled_sound(self) -> parselmouth.Sound:
+        if self.sound.sampling_frequency <= HNR_DOWNSAMPLED_RATE:
+            return self.sound
+        return self.sound.resample(HNR_DOWNSAMPLED_RATE, 50)
+
+    @cached_property
+    @timed("pitch")
+    def pitch(self) -> parselmouth.Pitch:
+        return PITCH_BACKENDS[self.options.pitch_backend](self.sound, self.profile.pitch_time_step)
+
+    @cached_property
+    @timed("intensity")
+    def intensity(self) -> parselmouth.Intensity:
+        return self.sound.to_intensity(time_step=self.profile.intensity_time_step)
+
+    @cached_property
+    @timed("harmonicity")
+    def harmonicity(self) -> parselmouth.Harmonicity:
+        # Praat has no Pitch-based HNR, so this is its own periodicity pass.
+        # Its cost grows with the square of the rate; at 16 kHz the mean stays within a few tenths of a dB
+        sound = self.downsampled_sound if self.hnr == "downsampled" else self.sound
+        return sound.to_harmonicity(time_step=self.profile.harmonicity_time_step)
+
+    @cached_property
+    @timed("point_process")
+    def point_process(self) -> parselmouth.Data:
+        # Glottal pulses from the existing Pitch instead of a fresh pitch pass
+        return call([self.sound, self.pitch], "To PointProcess (cc)")
+
+    # Features
+
+    @cached_property
+    def voiced_pitch(self) -> np.ndarray:
+        pitch_values = self.pitch.selected_array['frequency']
+        return pitch_values[pitch_values > 0]  # Remove unvoiced frames
+
+    @cached_property
+    @timed("pitch")
+    def pitch_stats(self) -> Dict[str, float]:
+        pitch_values = self.voiced_pitch
+        if len(pitch_values) == 0:
+            raise ValueError("No voiced segments detected in audio")
+
+        return {
+            "mean_pitch": float(np.mean(pitch_values)),
+            "std_pitch": float(np.std(pitch_values)),
+            "min_pitch": float(np.min(pitch_values)),
+            "max_pitch": float(np.max(pitch_values)),
+        }
+
+    @cached_property
+    @timed("intensity")
+    def intensity_contour(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(frame times, intensity in dB) from the selected backend"""
+        if self.options.intensity_backend == "numpy":
+            return energy.intensity_frames(
+                self.sound.values, self.sound.sampling_frequency, self.profile.intensity_time_step
+            )
+        return self.intensity.xs(), self.intensity.values[0]
+
+    @property
+    def intensity_frames(self) -> np.ndarray:
+        return self.intensity_contour[1]
+
+    @cached_property
+    def intensity_stats(self) -> Dict[str, float]:
+        intensity_values = self.intensity_frames[self.intensity_frames > 0]
+
+        if len(intensity_values) > 0:
+            return {
+                "mean_intensity": float(np.mean(intensity_values)),
+                "std_intensity": float(np.std(intensity_values)),
+                "max_intensity": float(np.max(intensity_values)),
+            }
+        return {"mean_intensity": 0.0, "std_intensity": 0.0, "max_intensity": 0.0}
+
+    @cached_property
+    def mean_hnr(self) -> float:
+        hnr_values = self.harmonicity.values[0]
+        hnr_values = hnr_values[~np.isnan(hnr_values)]
+        return float(np.mean(hnr_values)) if len(hnr_values) > 0 else 0.0
+
+    @cached_property
+    @timed("jitter_shimmer")
+    def jitter_shimmer(self) -> Tuple[float, float]:
+        jitter = 0.0
+        shimmer = 0.0
+        if len(self.voiced_pitch) == 0:
+            return jitter, shimmer
+        try:
+            jitter = call(self.point_process, "Get jitter (local)", 0, 0, 0.0001, 0.02, 1.3)
+            shimmer = call([self.sound, self.point_process], "Get shimmer (local)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
+        except Exception:
+            pass  # If jitter/shimmer calculation fails, keep as 0
+        return jitter, shimmer
+
+    @cached_property
+    @timed("timing")
+    def speaking_time(self) -> float:
+        # Use intensity to detect voiced segments; only the NumPy backend smooths with a hangover
+        hangover = energy.VAD_HANGOVER_SECONDS if self.options.intensity_backend == "numpy" else 0.0
+        speech = energy.voice_activity(self.intensity_frames, self.profile.intensity_time_step, hangover)
+
+        speech_frames = np.sum(speech)
+        total_frames = len(self.intensity_frames)
+
+        # Estimate speaking time (frames above threshold)
+        return float(speech_frames / total_frames) * self.duration if total_frames > 0 else 0.0
+
+    @cached_property
+    @timed("syllables")
+    def syllable_count(self) -> int:
+        intensity_times, intensity_db = self.intensity_contour
+        peak_times = intensity_peaks(intensity_db, intensity_times)
+        if "pitch" in self.options.features:
+            voiced = pitch_voicing(peak_times, self.pitch.selected_array['frequency'], self.pitch.xs())
+        else:
+            # Timing alone must not build a pitch track
+            voiced = zero_crossing_voicing(self.sound.values, self.sound.sampling_frequency, peak_times)
+        return int(np.count_nonzero(voiced))
+
+    def contours(self) -> Dict[str, Contour]:
+        """(frame times, values) of the requested pitch and intensity contours; unvoiced pitch frames are NaN"""
+        contours = {}
+        if "pitch" in self.options.features:
+            frequency = self.pitch.selected_array['frequency']
+            contours["pitch"] = (self.pitch.xs(), np.where(frequency > 0, frequency, np.nan))
+        if "intensity" in self.options.features:
+            contours["intensity"] = self.intensity_contour
+        return contours
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Summary features for build_results, computing only the requested groups
+
+        Groups that were not requested are filled with zeros; voice quality
+        measures omitted by hnr or jitter_shimmer are None.
+        """
+        features = self.options.features
+        values = {
+            "duration": self.duration,
+            "mean_pitch": 0.0, "std_pitch": 0.0, "min_pitch": 0.0, "max_pitch": 0.0,
+            "mean_intensity": 0.0, "std_intensity": 0.0, "max_intensity": 0.0,
+            "mean_hnr": 0.0, "jitter": 0.0, "shimmer": 0.0,
+            "speaking_time": 0.0, "syllable_count": 0,
+        }
+
+        if "pitch" in features:
+            values.update(self.pitch_stats)
+        if "intensity" in features:
+            values.update(self.intensity_stats)
+        if "voice_quality" in features:
+            values["mean_hnr"] = self.mean_hnr if self.hnr != "omitted" else None
+            if self.measure_jitter_shimmer:
+                values["jitter"], values["shimmer"] = self.jitter_shimmer
+            else:
+                values["jitter"] = values["shimmer"] = None
+        if "timing" in features:
+            values["speaking_time"] = self.speaking_time
+            values["syllable_count"] = self.syllable_count
+
+        return values
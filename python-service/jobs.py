@@ -0,0 +1,235 @@
+"""
+Persistent store for asynchronous analysis jobs
+Jobs and their results live in SQLite, so a report analysis survives
+client reconnects and identical submissions share one job. Several
+service processes may share the database
+
+Configuration (environment variables):
+    JOBS_DB_PATH            SQLite database file (default: jobs.db)
+    JOBS_RETENTION_SECONDS  How long finished jobs are kept (default: 86400)
+    JOBS_LEASE_SECONDS      A process silent this long is dead, and its unfinished jobs fail (default: 30)
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", "jobs.db")
+JOBS_RETENTION_SECONDS = float(os.environ.get("JOBS_RETENTION_SECONDS", "86400"))
+JOBS_LEASE_SECONDS = float(os.environ.get("JOBS_LEASE_SECONDS", "30"))
+
+# Poll interval for jobs owned by another service process
+POLL_SECONDS = 0.5
+
+# Owner stamped on this process's jobs; unlike a pid, never reused by a later process
+INSTANCE_ID = uuid.uuid4().hex
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    filename TEXT,
+    owner TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    results TEXT,
+    error TEXT,
+    error_status INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key);
+CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (updated);
+CREATE TABLE IF NOT EXISTS instances (
+    id TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+class JobStore:
+    """
+    SQLite-backed job records with deduplication and retention
+
+    Jobs run in the service process that accepted them (its INSTANCE_ID
+    is the job's owner), which heartbeats while it runs (see beat).
+    Opening the store, and every beat, marks failed the unfinished jobs of
+    instances without a heartbeat in the last lease seconds, so clients
+    can resubmit them; live sibling processes keep theirs. The SQLite
+    calls block, so the async methods run them in a thread.
+    """
+
+    def __init__(self, path: str = JOBS_DB_PATH, retention: float = JOBS_RETENTION_SECONDS,
+                 lease: float = JOBS_LEASE_SECONDS):
+        self.path = path
+        self.retention = retention
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._events: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._beat()
+
+    async def create(self, key: str, filename: Optional[str]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Start a job for key, or return the existing one
+
+        Queued, running and finished jobs are shared; failed jobs are not,
+        so a resubmission retries.
+
+        Returns:
+            (job, created)
+        """
+        return await asyncio.to_thread(self._create, key, filename)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def start(self, job_id: str) -> None:
+        await self._update(job_id, status=RUNNING)
+
+    async def finish(self, job_id: str, results: Dict[str, Any]) -> None:
+        await self._update(job_id, status=DONE, results=json.dumps(results, separators=(',', ':')))
+
+    async def fail(self, job_id: str, error_status: int, error: str) -> None:
+        await self._update(job_id, status=FAILED, error=error, error_status=error_status)
+
+    async def prune(self) -> int:
+        """Delete finished jobs older than the retention period"""
+        return await asyncio.to_thread(self._prune)
+
+    async def beat(self) -> None:
+        """Renew this instance's lease and fail the jobs of dead ones; call well within the lease"""
+        await asyncio.to_thread(self._beat)
+
+    def _create(self, key: str, filename: Optional[str]) -> Tuple[Dict[str, Any], bool]:
+        self._prune()
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE key = ? AND status != ? ORDER BY created DESC LIMIT 1",
+                (key, FAILED)
+            ).fetchone()
+            if row is not None:
+                return self._to_dict(row), False
+
+            job_id = uuid.uuid4().hex
+            self._db.execute(
+                "INSERT INTO jobs (id, key, status, filename, owner, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, key, QUEUED, filename, INSTANCE_ID, now, now)
+            )
+        return self._get(job_id), True
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    async def wait(self, job_id: str, timeout: float, since: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the job once it has finished, or as it is after timeout seconds
+
+        Jobs run by this process wake the waiter directly; others are polled.
+
+        Args:
+            since: Also return as soon as the status is no longer this one
+        """
+        deadline = time.monotonic() + timeout
+        job = await self.get(job_id)
+        if job is None:
+            return None
+
+        # Events exist only while someone waits, so unknown and forgotten ids hold none
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            while True:
+                # Replaced by _update after each change
+                event = self._events.setdefault(job_id, asyncio.Event())
+                job = await self.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] in FINISHED or remaining <= 0:
+                    return job
+                if since is not None and job["status"] != since:
+                    return job
+                try:
+                    await asyncio.wait_for(event.wait(), min(remaining, POLL_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters[job_id] -= 1
+            if not self._waiters[job_id]:
+                del self._waiters[job_id]
+                self._events.pop(job_id, None)
+
+    def _prune(self) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM jobs WHERE updated < ? AND status IN (?, ?)",
+                (time.time() - self.retention, DONE, FAILED)
+            )
+        return cursor.rowcount
+
+    async def _update(self, job_id: str, **fields: Any) -> None:
+        fields["updated"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        await asyncio.to_thread(self._execute, f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+        # Waiters' events are set here, on the event loop
+        event = self._events.get(job_id)
+        if event is not None:
+            event.set()
+            self._events[job_id] = asyncio.Event()
+
+    def _execute(self, sql: str, parameters: Tuple[Any, ...]) -> None:
+        with self._lock:
+            self._db.execute(sql, parameters)
+
+    def _beat(self) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO instances (id, heartbeat) VALUES (?, ?)", (INSTANCE_ID, now))
+            self._db.execute("DELETE FROM instances WHERE heartbeat < ?", (now - self.lease,))
+            # Fail unfinished jobs of dead instances (earlier runs, crashed siblings)
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, error_status = ?, updated = ? "
+                "WHERE status IN (?, ?) AND owner NOT IN (SELECT id FROM instances)",
+                (FAILED, "Interrupted by a service restart; please resubmit", 503, now, QUEUED, RUNNING)
+            )
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "filename": row["filename"],
+            "created": row["created"],
+            "updated": row["updated"],
+        }
+        if row["results"] is not None:
+            job["results"] = json.loads(row["results"])
+        if row["error"] is not None:
+            job["error"] = row["error"]
+            job["error_status"] = row["error_status"]
+        return job
+
+
+_store: Optional[JobStore] = None
+
+
+def get_job_store() -> JobStore:
+    """Return the shared job store, opening the database on first use (blocks; see JobStore)"""
+    global _store
+    if _store is None:
+        _store = JobStore(JOBS_DB_PATH)
+    return _store
@@ -0,0 +1,444 @@
+"""
+End-to-end load test for the speech analysis service
+Replays the live traffic shape against a running (or locally started)
+service: concurrent sessions each post their last interval of 48 kHz
+int16 PCM to /analyze/pcm every interval, the way useGeminiLive does,
+then upload the whole session as a WAV report to /jobs and wait for it.
+Reports throughput, latency percentiles, error rates and the service's
+CPU and memory at each session count, as a saturation curve
+
+Usage:
+    python loadtest.py --start --sessions 1 2 4 8 16       # start a local service and sweep
+    python loadtest.py --url http://localhost:8000 --pid 1234 --sessions 8 --session-seconds 120
+    python loadtest.py --start --workers 4 --output loadtest.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+from synthetic import generate_silence, generate_speech_like, to_wav_bytes
+
+# The live hook's capture rate and analysis settings (see hooks/useGeminiLive.ts)
+SAMPLE_RATE = 48000
+INTERVAL_SECONDS = 10.0
+BUDGET_MS = 1000
+CONTOUR_POINTS = 120
+
+SESSION_COUNTS = [1, 2, 4, 8, 16]
+DEFAULT_URL = "http://127.0.0.1:8000"
+
+# Distinct chunks of audio the sessions draw from; every payload is made unique so none hits the cache
+CHUNK_POOL_SIZE = 8
+
+READY_TIMEOUT_SECONDS = 120
+RESOURCE_SAMPLE_SECONDS = 0.5
+REPORT_POLL_SECONDS = 30  # Longest /jobs/{id}?wait= the service accepts
+
+_payload_ids = itertools.count(1)
+_payload_lock = threading.Lock()
+
+
+@dataclass
+class Sample:
+    """One finished request"""
+    kind: str  # "chunk" or "report"
+    status: str  # "ok", an HTTP status code, "timeout" or "error"
+    seconds: float
+    audio_seconds: float
+    ended: float = 0.0  # time.monotonic() at completion
+    late: bool = False  # Sent after the next interval had already started
+
+
+def chunk_pool(interval: float, speech_fraction: float, size: int = CHUNK_POOL_SIZE) -> List[np.ndarray]:
+    """
+    Interval-long float32 chunks: speech-like, or (for the rest) near-silence,
+    like the stretches where the user listens to the character
+    """
+    n_speech = max(1, int(round(size * speech_fraction))) if speech_fraction > 0 else 0
+    return [
+        (generate_speech_like if i < n_speech else generate_silence)(interval, SAMPLE_RATE, seed=i).astype(np.float32)
+        for i in range(size)
+    ]
+
+
+def unique(audio: np.ndarray) -> np.ndarray:
+    """A copy whose first two samples carry a fresh id, so its cache key is new"""
+    with _payload_lock:
+        payload_id = next(_payload_ids)
+    audio = audio.copy()
+    # Mid-step values, so the id survives quantization to 16 bits
+    audio[:2] = (np.array(divmod(payload_id, 32767)) + 0.5) / 32767
+    return audio
+
+
+def to_pcm16(audio: np.ndarray) -> bytes:
+    """Little-endian int16 PCM, converted as float32To16BitPCM does"""
+    clamped = np.clip(audio, -1, 1)
+    return np.where(clamped < 0, clamped * 0x8000, clamped * 0x7FFF).astype("<i2").tobytes()
+
+
+def post_chunk(http: requests.Session, url: str, audio: np.ndarray, session_id: str,
+               budget_ms: float) -> Tuple[str, Optional[float]]:
+    """
+    Post one live chunk as the hook does
+
+    Returns:
+        (status, Retry-After seconds when the service shed the chunk)
+    """
+    params = {
+        "priority": "interactive",
+        "session_id": session_id,
+        "contours": CONTOUR_POINTS,
+        "pitch_backend": "numpy",
+    }
+    headers = {
+        "Content-Type": "application/octet-stream",
+        "X-Sample-Rate": str(SAMPLE_RATE),
+        "X-Encoding": "int16",
+        "X-Analysis-Budget-Ms": str(budget_ms),
+    }
+    try:
+        response = http.post(f"{url}/analyze/pcm", params=params, headers=headers,
+                             data=to_pcm16(unique(audio)), timeout=120)
+    except requests.Timeout:
+        return "timeout", None
+    except requests.RequestException:
+        return "error", None
+    if response.ok:
+        return "ok", None
+    retry_after = response.headers.get("Retry-After")
+    return str(response.status_code), float(retry_after) if retry_after else None
+
+
+def run_report(http: requests.Session, url: str, audio: np.ndarray, timeout: float) -> str:
+    """Upload the session recording to /jobs and wait for the job to finish"""
+    content = to_wav_bytes(unique(audio), SAMPLE_RATE)
+    deadline = time.monotonic() + timeout
+    try:
+        response = http.post(f"{url}/jobs", files={"file": ("session.wav", content, "audio/wav")}, timeout=timeout)
+        if not response.ok:
+            return str(response.status_code)
+        job_id = response.json()["job_id"]
+
+        while time.monotonic() < deadline:
+            wait = min(REPORT_POLL_SECONDS, max(1, int(deadline - time.monotonic())))
+            job = http.get(f"{url}/jobs/{job_id}", params={"wait": wait}, timeout=wait + 30).json()
+            if job["status"] == "done":
+                return "ok"
+            if job["status"] == "failed":
+                return str(job.get("error_status", "error"))
+        return "timeout"
+    except requests.Timeout:
+        return "timeout"
+    except (requests.RequestException, ValueError, KeyError):
+        return "error"
+
+
+def run_session(url: str, session_id: str, pool: List[np.ndarray], args: argparse.Namespace,
+                start_delay: float, seed: int, samples: List[Sample], lock: threading.Lock) -> None:
+    """
+    One simulated voice session
+
+    Audio accrues one interval at a time. Like the hook, a session has at
+    most one chunk in flight: the audio captured meanwhile goes out as one
+    longer chunk when the response arrives, and a 429 drops the chunk and
+    pauses analysis for Retry-After seconds.
+    """
+    rng = np.random.default_rng(seed)
+    order = rng.integers(0, len(pool), int(args.session_seconds // args.interval))
+    http = requests.Session()
+
+    time.sleep(start_delay)
+    started = time.monotonic()
+    sent = 0
+    retry_at = 0.0
+
+    while sent < len(order):
+        time.sleep(max(0.0, started + (sent + 1) * args.interval - time.monotonic(), retry_at - time.monotonic()))
+        captured = min(len(order), int((time.monotonic() - started) / args.interval))
+        audio = np.concatenate([pool[i] for i in order[sent:captured]])
+        late = captured - sent > 1
+        sent = captured
+
+        request_started = time.perf_counter()
+        status, retry_after = post_chunk(http, url, audio, session_id, args.budget_ms)
+        sample = Sample("chunk", status, time.perf_counter() - request_started, len(audio) / SAMPLE_RATE,
+                        time.monotonic(), late)
+        if status == "429":
+            retry_at = time.monotonic() + (retry_after or 5)
+        with lock:
+            samples.append(sample)
+
+    if args.report:
+        audio = np.concatenate([pool[i] for i in order])
+        request_started = time.perf_counter()
+        status = run_report(http, url, audio, args.report_timeout)
+        with lock:
+            samples.append(Sample("report", status, time.perf_counter() - request_started, len(audio) / SAMPLE_RATE,
+                                  time.monotonic()))
+
+
+def process_tree_usage(pid: int) -> Tuple[float, int]:
+    """
+    (CPU seconds, resident bytes) of a process and its children, from /proc
+
+    CPU includes children that already exited (recycled workers); resident
+    memory is summed over live processes, so shared pages count repeatedly.
+    """
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = 0.0
+    rss = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(entry) != pid and int(fields[1]) != pid:
+                continue
+            cpu += (int(fields[11]) + int(fields[12])) / ticks
+            if int(entry) == pid:
+                cpu += (int(fields[13]) + int(fields[14])) / ticks
+            with open(f"/proc/{entry}/status") as f:
+                rss += next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+        except (OSError, ValueError, IndexError, StopIteration):
+            continue  # Exited while being read
+    return cpu, rss
+
+
+def metrics_usage(url: str) -> Tuple[float, int]:
+    """(CPU seconds, resident bytes) of the service's main process only, from /metrics"""
+    values = {}
+    for line in requests.get(f"{url}/metrics", timeout=10).text.splitlines():
+        name, _, value = line.partition(" ")
+        if name in ("process_cpu_seconds_total", "process_resident_memory_bytes"):
+            values[name] = float(value)
+    return values.get("process_cpu_seconds_total", 0.0), int(values.get("process_resident_memory_bytes", 0))
+
+
+class ResourceSampler(threading.Thread):
+    """Samples the service's CPU and memory while a level runs"""
+
+    def __init__(self, url: str, pid: Optional[int]):
+        super().__init__(daemon=True)
+        self.usage = (lambda: process_tree_usage(pid)) if pid else (lambda: metrics_usage(url))
+        self.scope = "process tree" if pid else "main process"
+        self.stopped = threading.Event()
+        self.peak_rss = 0
+        self.start_cpu, rss = self.usage()
+        self.start_time = time.monotonic()
+        self.end_cpu, self.end_time = self.start_cpu, self.start_time
+
+    def run(self) -> None:
+        while not self.stopped.wait(RESOURCE_SAMPLE_SECONDS):
+            self.sample()
+
+    def sample(self) -> None:
+        cpu, rss = self.usage()
+        self.end_cpu, self.end_time = cpu, time.monotonic()
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def stop(self) -> Dict[str, Any]:
+        self.stopped.set()
+        self.join()
+        self.sample()
+        elapsed = self.end_time - self.start_time
+        return {
+            "scope": self.scope,
+            "cpu_cores": round((self.end_cpu - self.start_cpu) / elapsed, 2) if elapsed > 0 else 0.0,
+            "peak_rss_mb": round(self.peak_rss / (1024 * 1024), 1),
+        }
+
+
+def summarize(samples: List[Sample], kind: str, started: float) -> Dict[str, Any]:
+    """
+    Throughput, latency percentiles (ms, successful requests) and error
+    counts for one kind of request
+
+    Throughput covers the time from started until the last of these
+    requests finished, so the report uploads at the end of a session do
+    not dilute the chunk rate.
+    """
+    selected = [s for s in samples if s.kind == kind]
+    wall_seconds = max((s.ended for s in selected), default=started) - started
+    ok = np.array([s.seconds for s in selected if s.status == "ok"])
+    statuses: Dict[str, int] = {}
+    for s in selected:
+        if s.status != "ok":
+            statuses[s.status] = statuses.get(s.status, 0) + 1
+
+    summary = {
+        "requests": len(selected),
+        "ok": len(ok),
+        "error_rate": round(1 - len(ok) / len(selected), 4) if selected else 0.0,
+        "errors": statuses,
+        "throughput_rps": round(len(ok) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        "audio_seconds_per_second": round(
+            sum(s.audio_seconds for s in selected if s.status == "ok") / wall_seconds, 2
+        ) if wall_seconds > 0 else 0.0,
+    }
+    for q in (50, 95, 99):
+        summary[f"p{q}_ms"] = round(float(np.percentile(ok, q)) * 1000, 1) if len(ok) else None
+    if kind == "chunk":
+        summary["late"] = sum(s.late for s in selected)
+    return summary
+
+
+def run_level(url: str, sessions: int, pool: List[np.ndarray], args: argparse.Namespace,
+              pid: Optional[int]) -> Dict[str, Any]:
+    """Run one session count to completion"""
+    samples: List[Sample] = []
+    lock = threading.Lock()
+    rng = np.random.default_rng(sessions)
+    threads = [
+        threading.Thread(
+            target=run_session,
+            args=(url, f"load-{sessions}-{i}", pool, args, float(rng.uniform(0, args.interval)),
+                  sessions * 1000 + i, samples, lock),
+            daemon=True,
+        )
+        for i in range(sessions)
+    ]
+
+    sampler = ResourceSampler(url, pid)
+    sampler.start()
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.monotonic() - started
+
+    return {
+        "sessions": sessions,
+        "wall_seconds": round(wall_seconds, 1),
+        "chunk": summarize(samples, "chunk", started),
+        "report": summarize(samples, "report", started),
+        "service": sampler.stop(),
+    }
+
+
+def capacity(levels: List[Dict[str, Any]], slo_ms: float, max_error_rate: float) -> int:
+    """Most sessions whose chunks met the latency SLO at p95 within the error rate (0 if none did)"""
+    passing = [
+        level["sessions"] for level in levels
+        if level["chunk"]["p95_ms"] is not None
+        and level["chunk"]["p95_ms"] <= slo_ms
+        and level["chunk"]["error_rate"] <= max_error_rate
+    ]
+    return max(passing, default=0)
+
+
+def start_service(port: int, workers: Optional[int]) -> subprocess.Popen:
+    """Start the service from this directory on port, in a process group of its own (see stop_service)"""
+    env = dict(os.environ)
+    if workers:
+        env["ANALYSIS_WORKERS"] = str(workers)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "analyze:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env, start_new_session=True,
+    )
+
+
+def stop_service(service: subprocess.Popen) -> None:
+    """Shut the service down, then kill any worker still finishing a job"""
+    service.terminate()
+    service.wait()
+    try:
+        os.killpg(service.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def wait_until_ready(url: str, timeout: float = READY_TIMEOUT_SECONDS) -> None:
+    """
+    Block until /ready answers 200
+
+    Raises:
+        TimeoutError: If the service is not ready in time
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/ready", timeout=5).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"{url} was not ready after {timeout:.0f} s")
+
+
+def print_level(level: Dict[str, Any]) -> None:
+    chunk, report, service = level["chunk"], level["report"], level["service"]
+    report_p95 = f"{report['p95_ms'] / 1000:.1f}s" if report["p95_ms"] is not None else "-"
+    print(
+        f"{level['sessions']:>8} {chunk['throughput_rps']:>8.2f} {chunk['audio_seconds_per_second']:>8.1f} "
+        f"{chunk['p50_ms'] or 0:>7.0f} {chunk['p95_ms'] or 0:>7.0f} {chunk['p99_ms'] or 0:>7.0f} "
+        f"{chunk['error_rate']:>7.1%} {chunk['late']:>5} {report_p95:>9} {report['error_rate']:>7.1%} "
+        f"{service['cpu_cores']:>6.2f} {service['peak_rss_mb']:>8.0f}",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the speech analysis service with simulated sessions")
+    parser.add_argument("--url", default=DEFAULT_URL, help="Service to test")
+    parser.add_argument("--start", action="store_true", help="Start a local service on --port and stop it afterwards")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --start")
+    parser.add_argument("--workers", type=int, help="ANALYSIS_WORKERS for --start")
+    parser.add_argument("--pid", type=int, help="Service process id, to measure its workers too (with --start: automatic)")
+    parser.add_argument("--sessions", type=int, nargs="+", default=SESSION_COUNTS, help="Concurrent session counts to sweep")
+    parser.add_argument("--session-seconds", type=float, default=60, help="Length of each session")
+    parser.add_argument("--interval", type=float, default=INTERVAL_SECONDS, help="analysisIntervalSeconds: chunk length and spacing")
+    parser.add_argument("--speech-fraction", type=float, default=0.7, help="Share of chunks with speech; the rest are near-silent")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="X-Analysis-Budget-Ms sent with each chunk")
+    parser.add_argument("--no-report", dest="report", action="store_false", help="Skip the end-of-session report upload")
+    parser.add_argument("--report-timeout", type=float, default=600, help="Seconds to wait for a report job")
+    parser.add_argument("--slo-ms", type=float, default=BUDGET_MS, help="Chunk p95 latency a session count must meet")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Chunk error rate a session count must stay within")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}" if args.start else args.url.rstrip("/")
+    service = start_service(args.port, args.workers) if args.start else None
+    pid = service.pid if service else args.pid
+    if pid is None:
+        print("No --pid given: CPU and memory cover the service's main process only, not its workers")
+
+    try:
+        wait_until_ready(url)
+        pool = chunk_pool(args.interval, args.speech_fraction)
+
+        print(f"{'sessions':>8} {'chunk/s':>8} {'audio/s':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} "
+              f"{'errors':>7} {'late':>5} {'report95':>9} {'rep err':>7} {'cpu':>6} {'rss MB':>8}")
+        levels = []
+        for sessions in args.sessions:
+            levels.append(run_level(url, sessions, pool, args, pid))
+            print_level(levels[-1])
+    finally:
+        if service is not None:
+            stop_service(service)
+
+    sustainable = capacity(levels, args.slo_ms, args.max_error_rate)
+    print(f"\nCapacity: {sustainable} sessions (chunk p95 <= {args.slo_ms:.0f} ms, errors <= {args.max_error_rate:.0%})")
+
+    if args.output:
+        settings = {key: value for key, value in vars(args).items() if key not in ("output", "start", "port", "pid")}
+        with open(args.output, "w") as f:
+            json.dump({"settings": settings, "levels": levels, "capacity": sustainable}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Parallel analysis of long recordings
+Splits a WAV upload into overlapping chunks, analyzes them across the
+worker pool and merges the per-chunk statistics into one result, plus
+per-chunk summaries for a timeline
+
+Configuration (environment variables):
+    LONG_AUDIO_MIN_SECONDS    Uploads at least this long are analyzed in chunks (default: 60)
+    LONG_AUDIO_CHUNK_SECONDS  Length of each chunk and timeline entry (default: 10)
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import energy
+from admission import admission
+from contours import Contour
+from streaming import RunningStats, analyze_window
+from syllables import syllable_nuclei
+from wav_io import WavInfo, bytes_per_frame, decode_pcm
+from workers import run_in_pool, run_measured
+
+LONG_AUDIO_MIN_SECONDS = float(os.environ.get("LONG_AUDIO_MIN_SECONDS", "60"))
+LONG_AUDIO_CHUNK_SECONDS = float(os.environ.get("LONG_AUDIO_CHUNK_SECONDS", "10"))
+
+# Audio read on either side of a chunk, so pitch tracking and analysis
+# frames at the chunk edges see the same signal as a single pass would
+LONG_AUDIO_CONTEXT_SECONDS = 0.5
+
+
+def wav_duration(info: WavInfo) -> float:
+    """Duration in seconds of the PCM payload described by info"""
+    frame = bytes_per_frame(info)
+    return info.data_size // frame / info.sample_rate if frame else 0.0
+
+
+def plan_chunks(n_frames: int, sample_rate: int, chunk_seconds: float = LONG_AUDIO_CHUNK_SECONDS,
+                context_seconds: float = LONG_AUDIO_CONTEXT_SECONDS) -> List[Tuple[int, int, int, int]]:
+    """
+    Split a recording into chunks with context on both sides
+
+    A remainder shorter than half a chunk is folded into the last chunk.
+
+    Returns:
+        (first, last, start, end) sample indices per chunk: the chunk reads
+        samples [first, last) and reports analysis frames in [start, end)
+    """
+    size = max(1, int(round(chunk_seconds * sample_rate)))
+    context = int(round(context_seconds * sample_rate))
+
+    bounds = list(range(0, n_frames, size)) + [n_frames]
+    if len(bounds) > 2 and bounds[-1] - bounds[-2] < size // 2:
+        del bounds[-2]
+
+    return [
+        (max(0, start - context), min(n_frames, end + context), start, end)
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def chunk_bytes(content: bytes, info: WavInfo, first: int, last: int) -> bytes:
+    """PCM bytes of sample frames [first, last)"""
+    frame = bytes_per_frame(info)
+    return content[info.data_offset + first * frame:info.data_offset + last * frame]
+
+
+def analyze_chunk(data: bytes, info: WavInfo, first: int, start: int, end: int) -> Dict[str, Any]:
+    """
+    Decode one chunk's PCM and analyze its frames in [start, end)
+
+    data holds the samples from sample index first on. Runs in a worker
+    process; returned frame times are relative to the whole recording.
+    """
+    rate = info.sample_rate
+    values = decode_pcm(data, info._replace(data_offset=0, data_size=len(data)))
+    chunk = analyze_window(values, rate, (start - first) / rate, (end - first) / rate, contours=True)
+
+    offset = first / rate
+    chunk["intensity_times"] += offset
+    chunk["pitch_times"] += offset
+    return chunk
+
+
+def summarize(duration: float, pitch: RunningStats, intensity: RunningStats, hnr: RunningStats,
+              periods: int, jitter_sum: float, shimmer_sum: float, speaking_time: float,
+              syllable_count: int) -> Optional[Dict[str, float]]:
+    """Summary features for build_results, or None if nothing was voiced"""
+    if pitch.count == 0:
+        return None
+
+    return {
+        "duration": duration,
+        "mean_pitch": pitch.mean,
+        "std_pitch": pitch.std,
+        "min_pitch": pitch.min,
+        "max_pitch": pitch.max,
+        "mean_intensity": intensity.mean,
+        "std_intensity": intensity.std,
+        "max_intensity": intensity.max if intensity.count > 0 else 0.0,
+        "mean_hnr": hnr.mean,
+        "jitter": jitter_sum / periods if periods > 0 else 0.0,
+        "shimmer": shimmer_sum / periods if periods > 0 else 0.0,
+        "speaking_time": speaking_time,
+        "syllable_count": syllable_count,
+    }
+
+
+def merge_chunks(chunks: List[Dict[str, Any]],
+                 bounds: List[Tuple[float, float]]) -> Tuple[Optional[Dict[str, float]], List[Dict[str, Any]]]:
+    """
+    Combine per-chunk analyses
+
+    Pitch, intensity and HNR statistics are pooled exactly and jitter and
+    shimmer are averaged weighted by period count. Speaking time is summed
+    over chunks using one silence threshold for the whole recording, and
+    syllables are detected once over the joined contours.
+
+    Args:
+        chunks: analyze_chunk results, in order
+        bounds: (start, end) seconds reported by each chunk
+
+    Returns:
+        (summary for the whole recording, [{"start", "end", "summary"}] per chunk)
+    """
+    all_frames = np.concatenate([chunk["intensity_frames"] for chunk in chunks])
+    threshold = energy.silence_threshold(all_frames)
+
+    nuclei = syllable_nuclei(
+        all_frames,
+        np.concatenate([chunk["intensity_times"] for chunk in chunks]),
+        np.concatenate([chunk["pitch_contour"] for chunk in chunks]),
+        np.concatenate([chunk["pitch_times"] for chunk in chunks]),
+    )
+
+    total = {
+        "pitch": RunningStats(), "intensity": RunningStats(), "hnr": RunningStats(),
+        "periods": 0, "jitter_sum": 0.0, "shimmer_sum": 0.0, "speaking_time": 0.0,
+    }
+    timeline = []
+
+    for chunk, (start, end) in zip(chunks, bounds):
+        frames = chunk["intensity_frames"]
+        intensity = RunningStats.from_values(frames[frames > 0])
+        speaking_time = float(np.mean(frames > threshold)) * (end - start) if len(frames) > 0 else 0.0
+        periods = chunk["periods"]
+        syllables = int(np.sum((nuclei >= start) & (nuclei < end)))
+
+        timeline.append({
+            "start": start,
+            "end": end,
+            "summary": summarize(
+                end - start, chunk["pitch"], intensity, chunk["hnr"], periods,
+                chunk["jitter"] * periods, chunk["shimmer"] * periods, speaking_time, syllables
+            ),
+        })
+
+        total["pitch"].merge(chunk["pitch"])
+        total["intensity"].merge(intensity)
+        total["hnr"].merge(chunk["hnr"])
+        total["periods"] += periods
+        total["jitter_sum"] += chunk["jitter"] * periods
+        total["shimmer_sum"] += chunk["shimmer"] * periods
+        total["speaking_time"] += speaking_time
+
+    duration = bounds[-1][1] - bounds[0][0] if bounds else 0.0
+    return summarize(duration, syllable_count=len(nuclei), **total), timeline
+
+
+def joined_contours(chunks: List[Dict[str, Any]]) -> Dict[str, Contour]:
+    """Pitch (NaN where unvoiced) and intensity contours of the whole recording"""
+    pitch = np.concatenate([chunk["pitch_contour"] for chunk in chunks])
+    return {
+        "pitch": (np.concatenate([chunk["pitch_times"] for chunk in chunks]), np.where(pitch > 0, pitch, np.nan)),
+        "intensity": (
+            np.concatenate([chunk["intensity_times"] for chunk in chunks]),
+            np.concatenate([chunk["intensity_frames"] for chunk in chunks]),
+        ),
+    }
+
+
+async def analyze_long_wav(content: bytes, info: WavInfo, peaks: Optional[List[int]] = None,
+                           contours: Optional[Dict[str, Contour]] = None
+                           ) -> Tuple[Optional[Dict[str, float]], List[Dict[str, Any]]]:
+    """
+    Analyze a WAV upload in overlapping chunks across the worker pool
+
+    Chunks are admitted as bulk jobs, so live-meter requests run ahead of
+    them, and each chunk's timeout covers its own analysis rather than
+    time spent queued behind others. Check admission before calling;
+    chunks are follow-up jobs, so they are never shed once admitted. If
+    any chunk fails, the others are cancelled before the error is raised.
+
+    Only admitted chunks are copied out of content (which may be memory
+    mapped), so memory use does not grow with the recording's length.
+
+    Args:
+        peaks: Collects each chunk's worker peak memory in bytes
+        contours: Receives the joined contours (see joined_contours)
+
+    Returns:
+        merge_chunks output
+    """
+    rate = info.sample_rate
+
+    async def run(first: int, last: int, start: int, end: int) -> Dict[str, Any]:
+        async with admission.slot("bulk", bounded=False):
+            chunk, peak = await run_in_pool(
+                run_measured, analyze_chunk, chunk_bytes(content, info, first, last), info, first, start, end
+            )
+        if peaks is not None and peak is not None:
+            peaks.append(peak)
+        return chunk
+
+    plan = plan_chunks(info.data_size // bytes_per_frame(info), rate)
+    tasks = [asyncio.create_task(run(*bounds)) for bounds in plan]
+    try:
+        chunks = await asyncio.gather(*tasks)
+    except BaseException:
+        # One chunk failed (or the request went away): stop the rest before
+        # the caller closes the content they slice
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    if contours is not None:
+        contours.update(joined_contours(chunks))
+    return merge_chunks(list(chunks), [(start / rate, end / rate) for _, _, start, end in plan])
@@ -0,0 +1,108 @@
+"""
+Instrumentation for the speech analysis service
+Per-stage timers for the analysis hot path, the Server-Timing header,
+and the Prometheus metrics served from /metrics
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+import workers
+from admission import admission
+
+# Seconds; covers cache hits (~1 ms) up to the job timeout
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Bytes; worker peak resident memory per request
+MEMORY_BUCKETS = tuple(float(mb << 20) for mb in (64, 128, 256, 512, 1024, 2048, 4096))
+
+REQUEST_SECONDS = Histogram(
+    "analysis_request_seconds", "End-to-end analysis latency", ["endpoint"], buckets=LATENCY_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    "analysis_stage_seconds", "Time spent in each analysis stage", ["stage"], buckets=LATENCY_BUCKETS
+)
+PEAK_MEMORY = Histogram(
+    "analysis_peak_memory_bytes", "Peak worker resident memory per request", ["endpoint"], buckets=MEMORY_BUCKETS
+)
+IN_FLIGHT = Gauge("analysis_requests_in_flight", "Analysis requests being handled", ["endpoint"])
+WORKER_JOBS = Gauge("analysis_worker_jobs", "Jobs submitted to the worker pool and not yet finished")
+QUEUE_DEPTH = Gauge("analysis_queue_depth", "Jobs waiting for a free worker process")
+AUDIO_SECONDS = Counter("analysis_audio_seconds", "Seconds of audio analyzed", ["endpoint"])
+INSUFFICIENT_SPEECH = Counter(
+    "analysis_insufficient_speech", "Uploads answered by the speech gate without analysis", ["endpoint"]
+)
+ERRORS = Counter("analysis_errors", "Failed analyses by the stage that failed", ["stage"])
+REJECTED = Counter("analysis_rejected", "Jobs shed by admission control", ["reason"])
+STARTUP_SECONDS = Gauge("analysis_startup_seconds", "Service start-up time by phase", ["phase"])
+WARM_UP_SECONDS = Histogram(
+    "analysis_worker_warm_up_seconds", "Worker warm-up time by phase", ["phase"], buckets=LATENCY_BUCKETS
+)
+
+WORKER_JOBS.set_function(workers.active_jobs)
+QUEUE_DEPTH.set_function(lambda: admission.queued + workers.queue_depth())
+
+
+class StageTimer:
+    """
+    Wall time per named analysis stage
+
+    Stages may nest; time spent in an inner stage is not also charged to
+    the stage around it, so the stages add up to the time measured.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.failed_stage: Optional[str] = None
+        self._stack: List[list] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self._add(parent[0], start - parent[1])
+        entry = [name, start]
+        self._stack.append(entry)
+
+        try:
+            yield
+        except Exception:
+            # The innermost stage is the one that failed
+            if self.failed_stage is None:
+                self.failed_stage = name
+            raise
+        finally:
+            end = time.perf_counter()
+            self._stack.pop()
+            self._add(name, end - entry[1])
+            if self._stack:
+                self._stack[-1][1] = end
+
+    @property
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+    def _add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+def observe_stages(stages: Dict[str, float]) -> None:
+    """Record stage timings in the stage latency histogram"""
+    for name, seconds in stages.items():
+        STAGE_SECONDS.labels(name).observe(seconds)
+
+
+def observe_warm_up(report: Dict[str, Any]) -> None:
+    """Record a worker's warm-up report (see warmup.py)"""
+    for key, value in report.items():
+        if key.endswith("_seconds"):
+            WARM_UP_SECONDS.labels(key[:-len("_seconds")]).observe(value)
+
+
+def server_timing_header(stages: Dict[str, float]) -> str:
+    """Format stage timings as a Server-Timing header value (durations in ms)"""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items())
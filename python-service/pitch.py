@@ -0,0 +1,184 @@
+"""
+Pitch tracking backends
+praat runs Sound.to_pitch (autocorrelation with a Viterbi path search);
+numpy is a vectorized normalized-autocorrelation tracker that frames the
+whole signal, computes every frame's autocorrelation in one batched FFT
+and makes the voicing decisions for all frames at once
+
+Both return a parselmouth Pitch, so the PointProcess, jitter and shimmer
+measures downstream work unchanged with either backend
+"""
+
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import parselmouth
+from parselmouth.praat import call
+
+from energy import frame_times
+
+# Praat's to_pitch defaults
+PITCH_FLOOR = 75.0
+PITCH_CEILING = 600.0
+PERIODS_PER_WINDOW = 3.0
+SILENCE_THRESHOLD = 0.03
+VOICING_THRESHOLD = 0.45
+OCTAVE_COST = 0.01
+
+# The tracker decimates to about this rate; F0 and the harmonics that carry it sit well below 4 kHz
+ANALYSIS_RATE = 8000
+DECIMATION_TAPS_PER_FACTOR = 8
+DECIMATION_CUTOFF = 0.9  # Of the decimated Nyquist frequency
+
+# Upper bound on the temporary (frames x FFT size) block, in samples
+BLOCK_SAMPLES = 1 << 20
+
+# (sound, time step) -> Pitch
+PitchBackend = Callable[[parselmouth.Sound, float], parselmouth.Pitch]
+
+
+def praat_pitch(sound: parselmouth.Sound, time_step: float) -> parselmouth.Pitch:
+    return sound.to_pitch(time_step=time_step)
+
+
+def decimate(samples: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Low-pass filter and keep every factor-th sample
+
+    A windowed-sinc FIR evaluated only at the kept samples (a strided
+    window view times the taps), a block at a time. Output sample j is
+    centred on input sample j * factor.
+    """
+    if factor == 1:
+        return samples
+    half = DECIMATION_TAPS_PER_FACTOR * factor // 2
+    n = np.arange(-half, half + 1)
+    cutoff = DECIMATION_CUTOFF / factor
+    taps = cutoff * np.sinc(cutoff * n) * np.hamming(len(n))
+    taps /= taps.sum()
+
+    view = np.lib.stride_tricks.sliding_window_view(np.pad(samples, (half, half)), len(taps))[::factor]
+    block = max(1, BLOCK_SAMPLES // len(taps))
+    return np.concatenate([view[start:start + block] @ taps for start in range(0, len(view), block)])
+
+
+def autocorrelation_frames(samples: np.ndarray, sample_rate: float, time_step: float = 0.01,
+                           floor: float = PITCH_FLOOR,
+                           ceiling: float = PITCH_CEILING) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pitch contour by normalized autocorrelation
+
+    The signal is decimated to about ANALYSIS_RATE, then cut into frames
+    PERIODS_PER_WINDOW periods of the floor long, centred where Praat
+    centres its pitch frames. Each block of frames is mean-subtracted,
+    Hanning-windowed and autocorrelated with one batched real FFT; dividing
+    by the window's own autocorrelation normalizes the result, as in Praat's
+    ac method. The best lag per frame maximizes correlation minus an octave
+    cost and is refined by parabolic interpolation. A frame is voiced when
+    that beats Praat's unvoiced strength, which rises as the frame's peak
+    gets small relative to the recording's.
+
+    Args:
+        samples: Audio as (samples,) or (channels, samples); channels are averaged
+
+    Returns:
+        (times, frequency in Hz), with 0 for unvoiced frames
+    """
+    samples = np.atleast_2d(samples).mean(axis=0)
+    window_duration = PERIODS_PER_WINDOW / floor
+    times = frame_times(len(samples), sample_rate, window_duration, time_step)
+    if len(times) == 0:
+        return times, np.zeros(0)
+
+    factor = max(1, int(sample_rate // ANALYSIS_RATE))
+    samples = decimate(samples - samples.mean(), factor)
+    rate = sample_rate / factor
+
+    half = int(0.5 * window_duration * rate)
+    length = 2 * half
+    min_lag = max(2, int(np.ceil(rate / ceiling)))
+    max_lag = min(int(np.floor(rate / floor)), length // 2)
+    n_fft = 1 << int(np.ceil(np.log2(length + max_lag + 1)))
+
+    window = np.hanning(length + 2)[1:-1]
+    window_ac = np.fft.irfft(np.abs(np.fft.rfft(window, n_fft)) ** 2, n_fft)[:max_lag + 2]
+    window_ac /= window_ac[0]
+
+    octave_cost = OCTAVE_COST * np.log2(floor * np.arange(min_lag, max_lag + 1) / rate)
+    # Praat's local peak: the windowed frame within half a longest period of the centre
+    peak_half = int(0.5 * rate / floor)
+    span = np.arange(max(0, half - peak_half), min(length, half + peak_half))
+
+    global_peak = np.max(np.abs(samples))
+    # Nearest decimated sample to each frame centre (input sample i sits at (i + 0.5) / sample_rate)
+    mids = np.floor((times * sample_rate - 0.5) / factor + 0.5).astype(np.int64)
+    padded = np.pad(samples, (half, half))
+    view = np.lib.stride_tricks.sliding_window_view(padded, length)
+
+    # Frames whose peak is under SILENCE_THRESHOLD of the recording's have an unvoiced
+    # strength above 1, which no correlation can beat; only the others are analyzed
+    cumulative = np.concatenate([[0.0], np.cumsum(padded)])
+    means = (cumulative[mids + length] - cumulative[mids]) / length
+    local_peak = np.abs((padded[mids[:, None] + span] - means[:, None]) * window[span]).max(axis=1)
+    relative = local_peak / global_peak if global_peak > 0 else np.zeros(len(mids))
+    candidates = np.flatnonzero(relative > SILENCE_THRESHOLD)
+
+    frequency = np.zeros(len(times))
+    block = max(1, BLOCK_SAMPLES // n_fft)
+    for start in range(0, len(candidates), block):
+        index = candidates[start:start + block]
+        frames = view[mids[index]]
+        frames = (frames - means[index, None]) * window
+
+        spectrum = np.fft.rfft(frames, n_fft, axis=1)
+        ac = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n_fft, axis=1)
+        ac = ac[:, min_lag - 1:max_lag + 2] / ac[:, :1] / window_ac[min_lag - 1:max_lag + 2]
+
+        # Interior local maxima only, scored with the octave cost
+        centre = ac[:, 1:-1]
+        peaks = (centre > ac[:, :-2]) & (centre >= ac[:, 2:])
+        best = np.argmax(np.where(peaks, centre - octave_cost, -np.inf), axis=1)
+        rows = np.arange(len(best))
+
+        # Parabolic refinement of the peak's lag and height; like Praat, a strength above 1 is reflected
+        left, middle, right = ac[rows, best], ac[rows, best + 1], ac[rows, best + 2]
+        curvature = left - 2 * middle + right
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shift = np.where(curvature < 0, np.clip(0.5 * (left - right) / curvature, -0.5, 0.5), 0.0)
+        strength = middle - 0.25 * (left - right) * shift
+        strength = np.where(strength > 1, 1 / strength, strength)
+        f0 = rate / (min_lag + best + shift)
+
+        unvoiced = VOICING_THRESHOLD + np.maximum(
+            0.0, 2.0 - relative[index] / (SILENCE_THRESHOLD / (1.0 + VOICING_THRESHOLD))
+        )
+        voiced = peaks[rows, best] & (strength - OCTAVE_COST * np.log2(ceiling / f0) > unvoiced)
+        frequency[index] = np.where(voiced, f0, 0.0)
+
+    return times, frequency
+
+
+def numpy_pitch(sound: parselmouth.Sound, time_step: float) -> parselmouth.Pitch:
+    """
+    Pitch from autocorrelation_frames, as a Praat Pitch object
+
+    Raises:
+        ValueError: If the sound is shorter than one analysis window
+    """
+    times, frequency = autocorrelation_frames(sound.values, sound.sampling_frequency, time_step)
+    if len(times) == 0:
+        raise ValueError("Sound too short for pitch analysis")
+
+    # A one-row Matrix on the frame grid converts to a Pitch with one candidate per frame
+    matrix = call("Create Matrix", "f0", sound.xmin, sound.xmax, len(times), time_step, sound.xmin + times[0],
+                  1, 1, 1, 1, 1, "0")
+    matrix.values[0, :] = frequency
+    return call(matrix, "To Pitch")
+
+
+# Selectable per request as AnalysisOptions.pitch_backend
+PITCH_BACKENDS: Dict[str, PitchBackend] = {
+    "praat": praat_pitch,
+    "numpy": numpy_pitch,
+}
+DEFAULT_PITCH_BACKEND = "praat"
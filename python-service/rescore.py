@@ -0,0 +1,189 @@
+"""
+Offline re-scoring of stored recordings
+Analyzes a directory of recordings once, in a process pool, into a table
+of summary features (NPZ); re-scoring the table after a threshold change
+is then one NumPy pass that never touches the audio again
+
+Usage:
+    python rescore.py extract recordings/ features.npz --workers 8   # only new or changed files are analyzed
+    python rescore.py score features.npz --output scores.csv
+    python rescore.py score features.npz --thresholds new.json --compare current.json
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import parselmouth
+
+import scoring
+from features import PROFILES, AnalysisOptions, FeatureGraph
+
+# Columns of the feature table: the build_results arguments (None is stored as NaN)
+FEATURE_COLUMNS = (
+    "duration", "mean_pitch", "std_pitch", "min_pitch", "max_pitch",
+    "mean_intensity", "std_intensity", "max_intensity",
+    "mean_hnr", "jitter", "shimmer", "speaking_time", "syllable_count",
+)
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".aif", ".aiff")
+
+PROGRESS_EVERY = 100
+
+
+def find_recordings(directory: str) -> List[str]:
+    """Audio files under directory, sorted"""
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(directory)
+        for name in names
+        if name.lower().endswith(AUDIO_EXTENSIONS) and not name.startswith(".")
+    )
+
+
+def extract_file(path: str, profile: str) -> List[float]:
+    """Summary features of one recording, in FEATURE_COLUMNS order: what analyze_audio_file scores"""
+    summary = FeatureGraph(parselmouth.Sound(path), AnalysisOptions(profile=profile)).summary()
+    return [np.nan if summary[column] is None else float(summary[column]) for column in FEATURE_COLUMNS]
+
+
+def load_table(path: str) -> Dict[str, np.ndarray]:
+    """A feature table written by save_table"""
+    with np.load(path) as table:
+        return {name: table[name] for name in table.files}
+
+
+def save_table(path: str, table: Dict[str, np.ndarray]) -> None:
+    np.savez_compressed(path, **table)
+
+
+def extract(directory: str, output: str, workers: int, profile: str) -> Dict[str, np.ndarray]:
+    """
+    Build (or bring up to date) the feature table for the recordings under directory
+
+    Rows of an existing table at output are kept for files whose size and
+    modification time are unchanged, if it was extracted with the same
+    profile; every other file is analyzed.
+    """
+    paths = find_recordings(directory)
+    stats = {path: os.stat(path) for path in paths}
+    previous: Dict[str, Tuple[int, float, np.ndarray]] = {}
+    if os.path.exists(output):
+        table = load_table(output)
+        if str(table["profile"]) == profile:
+            for i, path in enumerate(table["path"]):
+                row = np.array([table[column][i] for column in FEATURE_COLUMNS])
+                previous[str(path)] = (int(table["size"][i]), float(table["mtime"][i]), row)
+
+    rows: Dict[str, np.ndarray] = {}
+    pending = []
+    for path in paths:
+        known = previous.get(path)
+        if known is not None and known[:2] == (stats[path].st_size, stats[path].st_mtime):
+            rows[path] = known[2]
+        else:
+            pending.append(path)
+    print(f"{len(paths)} recordings: {len(rows)} unchanged, {len(pending)} to analyze", flush=True)
+
+    failed = 0
+    started = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(extract_file, path, profile): path for path in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                try:
+                    rows[path] = np.array(future.result())
+                except Exception as e:
+                    failed += 1
+                    print(f"  {path}: {e}", file=sys.stderr)
+                if done % PROGRESS_EVERY == 0 or done == len(pending):
+                    elapsed = time.perf_counter() - started
+                    print(f"  {done}/{len(pending)} analyzed in {elapsed:.1f} s", flush=True)
+
+    kept = [path for path in paths if path in rows]
+    values = np.array([rows[path] for path in kept]).reshape(len(kept), len(FEATURE_COLUMNS))
+    table = {column: values[:, i] for i, column in enumerate(FEATURE_COLUMNS)}
+    table.update({
+        "path": np.array(kept, dtype=str),
+        "size": np.array([stats[path].st_size for path in kept], dtype=np.int64),
+        "mtime": np.array([stats[path].st_mtime for path in kept], dtype=np.float64),
+        "profile": np.array(profile),
+    })
+    save_table(output, table)
+    print(f"Wrote {len(kept)} rows to {output}" + (f" ({failed} recordings failed)" if failed else ""))
+    return table
+
+
+def describe(scores: Dict[str, np.ndarray]) -> str:
+    return "  ".join(
+        f"{name} mean {values.mean():.1f} p10/p50/p90 {np.percentile(values, 10):.0f}/"
+        f"{np.percentile(values, 50):.0f}/{np.percentile(values, 90):.0f}"
+        for name, values in scores.items()
+    ) if len(scores["overall"]) else "no rows"
+
+
+def score(table_path: str, thresholds_path: Optional[str], compare_path: Optional[str],
+          output: Optional[str]) -> Dict[str, Any]:
+    """Re-score a feature table, optionally against a second threshold table"""
+    table = load_table(table_path)
+    thresholds = scoring.load_thresholds(thresholds_path) if thresholds_path else scoring.THRESHOLDS
+
+    started = time.perf_counter()
+    scores = scoring.score_features(table, thresholds)
+    elapsed = time.perf_counter() - started
+    print(f"Scored {len(table['path'])} recordings in {elapsed * 1000:.1f} ms")
+    print(f"  {describe(scores)}")
+
+    baseline = None
+    if compare_path:
+        baseline = scoring.score_features(table, scoring.load_thresholds(compare_path))
+        changed = np.round(scores["overall"], 2) != np.round(baseline["overall"], 2)
+        shift = scores["overall"] - baseline["overall"]
+        print(f"Against {compare_path}: {describe(baseline)}")
+        if len(changed):
+            print(f"  {changed.sum()} of {len(changed)} overall scores changed, mean shift {shift.mean():+.2f}")
+
+    if output:
+        with open(output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["path", "confidence", "fluency", "overall"] + (["previous_overall"] if baseline is not None else []))
+            for i, path in enumerate(table["path"]):
+                row = [path] + [round(float(scores[name][i]), 2) for name in ("confidence", "fluency", "overall")]
+                if baseline is not None:
+                    row.append(round(float(baseline["overall"][i]), 2))
+                writer.writerow(row)
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze recordings into a feature table and re-score it offline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = commands.add_parser("extract", help="Analyze recordings into a feature table")
+    extract_parser.add_argument("directory", help="Directory searched recursively for recordings")
+    extract_parser.add_argument("table", help="Feature table (.npz) to write or bring up to date")
+    extract_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Analysis processes")
+    extract_parser.add_argument("--profile", default="full", choices=sorted(PROFILES), help="Analysis profile")
+
+    score_parser = commands.add_parser("score", help="Score a feature table")
+    score_parser.add_argument("table", help="Feature table written by extract")
+    score_parser.add_argument("--thresholds", help="Threshold overrides (JSON, see scoring.py); default: SCORING_THRESHOLDS")
+    score_parser.add_argument("--compare", help="Second threshold file to compare the scores against")
+    score_parser.add_argument("--output", help="Write per-recording scores as CSV")
+
+    args = parser.parse_args()
+    if args.command == "extract":
+        extract(args.directory, args.table, args.workers, args.profile)
+    else:
+        score(args.table, args.thresholds, args.compare, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Content-addressed result cache for speech analysis
+Identical uploads (proxy retries, the final flush, the session report)
+are answered from memory instead of re-running Praat
+
+Configuration (environment variables):
+    RESULT_CACHE_MAX_BYTES    Memory budget for cached results (default: 64 MB, 0 = disabled)
+    RESULT_CACHE_TTL_SECONDS  How long a result stays valid (default: 3600)
+    RESULT_CACHE_DIR          Directory for entries evicted from memory (default: no disk spill)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from wav_io import is_wav, parse_wav_header
+
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("RESULT_CACHE_TTL_SECONDS", "3600"))
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR") or None
+
+
+def cache_key(content: bytes, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Hash the audio payload together with the analysis parameters
+
+    For WAV uploads only the format and PCM data are hashed, so the same
+    audio with different header metadata maps to the same entry.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(params or {}, sort_keys=True).encode())
+
+    if is_wav(content):
+        try:
+            info = parse_wav_header(content)
+            digest.update(f"{info.format_tag}:{info.channels}:{info.sample_rate}:{info.bits_per_sample}".encode())
+            digest.update(memoryview(content)[info.data_offset:info.data_offset + info.data_size])
+            return digest.hexdigest()
+        except ValueError:
+            pass  # Malformed header; fall back to hashing the whole upload
+
+    digest.update(content)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of analysis results with byte-size accounting and a TTL
+
+    Results are stored JSON-encoded, which gives an exact size for the
+    memory budget and means callers can never mutate a cached entry.
+    Entries evicted from memory are written to disk_dir when it is set.
+    """
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_MAX_BYTES, ttl: float = RESULT_CACHE_TTL_SECONDS,
+                 disk_dir: Optional[str] = RESULT_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                data, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(data)
+                self._remove(key)
+                self.expirations += 1
+
+            spilled = self._read_disk(key, now)
+            if spilled is not None:
+                data, expires = spilled
+                self.disk_hits += 1
+                self._insert(key, data, expires)
+                return json.loads(data)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result, evicting least recently used entries to fit"""
+        if not self.enabled:
+            return
+
+        data = json.dumps(result, separators=(',', ':')).encode()
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._insert(key, data, time.time() + self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _insert(self, key: str, data: bytes, expires: float) -> None:
+        self._entries[key] = (data, expires)
+        self.current_bytes += len(data)
+
+        while self.current_bytes > self.max_bytes:
+            old_key, (old_data, old_expires) = self._entries.popitem(last=False)
+            self.current_bytes -= len(old_data)
+            self.evictions += 1
+            self._write_disk(old_key, old_data, old_expires)
+
+    def _remove(self, key: str) -> None:
+        data, _ = self._entries.pop(key)
+        self.current_bytes -= len(data)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _write_disk(self, key: str, data: bytes, expires: float) -> None:
+        if not self.disk_dir or expires <= time.time():
+            return
+        # Write then rename so readers never see a partial entry
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            os.utime(path, (expires, expires))
+        except OSError:
+            pass  # Disk spill is best-effort
+
+        if self.evictions % 256 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Delete spilled entries that expired without being read"""
+        now = time.time()
+        try:
+            names = os.listdir(self.disk_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.disk_dir, name)
+            try:
+                if name.endswith('.json') and os.path.getmtime(path) <= now:
+                    os.unlink(path)
+                    self.expirations += 1
+            except OSError:
+                pass
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[bytes, float]]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            # The file's mtime holds its expiry time
+            expires = os.path.getmtime(path)
+            if expires <= now:
+                os.unlink(path)
+                self.expirations += 1
+                return None
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.unlink(path)
+            return data, expires
+        except OSError:
+            return None
+
+
+result_cache = ResultCache()
@@ -0,0 +1,202 @@
+"""
+Confidence and fluency scoring
+The score thresholds as data, applied to one result at a time (the
+service) or to arrays of summary features (rescore.py re-scores a whole
+feature table in one NumPy pass)
+
+Configuration (environment variables):
+    SCORING_THRESHOLDS  JSON file whose entries replace those of DEFAULT_THRESHOLDS (default: none)
+"""
+
+import copy
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# Bands are checked in order and the first match scores; "missing" entries
+# score voice quality measures that were not computed (NaN)
+DEFAULT_THRESHOLDS: Dict[str, Dict[str, Any]] = {
+    "confidence": {
+        "base": 50,
+        # [dB, points]: mean intensity at least dB (typical speaking intensity: 50-70 dB)
+        "intensity_at_least": [[65, 25], [55, 15], [45, 5]],
+        # [%, points]: pitch coefficient of variation below % (stable pitch)
+        "pitch_cv_below": [[10, 25], [20, 15], [30, 5]],
+        # [dB, points]: mean HNR above dB (clear voice)
+        "hnr_above": [[15, 15], [10, 8]],
+        "hnr_missing": 8,
+        # [jitter, shimmer, points]: both below (steady voice)
+        "jitter_shimmer_below": [[0.01, 0.05, 10], [0.02, 0.1, 5]],
+        "jitter_shimmer_missing": 5,
+    },
+    "fluency": {
+        "base": 50,
+        # [low, high, points]: syllables per minute within [low, high]; "other" for any other rate above 0
+        "speech_rate_within": [[150, 200, 35], [120, 220, 25], [100, 250, 15]],
+        "speech_rate_other": 5,
+        # [%, points]: share of silence below %
+        "pause_ratio_below": [[20, 35], [30, 25], [40, 15], [50, 5]],
+        # [low, high, points]: syllables per minute of speaking time within [low, high], else above low
+        "articulation_rate_within": [[180, 250, 30], [150, 280, 20]],
+        "articulation_rate_above": [[100, 10]],
+    },
+}
+
+
+def load_thresholds(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    DEFAULT_THRESHOLDS with the entries of a JSON file (same shape) replacing the defaults
+
+    Raises:
+        ValueError: If the file names a score or entry that does not exist
+    """
+    thresholds = copy.deepcopy(DEFAULT_THRESHOLDS)
+    if not path:
+        return thresholds
+
+    with open(path) as f:
+        overrides = json.load(f)
+    for score, entries in overrides.items():
+        if score not in thresholds:
+            raise ValueError(f"Unknown score in {path}: {score}")
+        unknown = set(entries) - set(thresholds[score])
+        if unknown:
+            raise ValueError(f"Unknown {score} thresholds in {path}: {', '.join(sorted(unknown))}")
+        thresholds[score].update(entries)
+    return thresholds
+
+
+def thresholds_version(thresholds: Dict[str, Dict[str, Any]]) -> str:
+    """Short fingerprint of a threshold table, so cached scores follow threshold changes"""
+    return hashlib.sha256(json.dumps(thresholds, sort_keys=True).encode()).hexdigest()[:12]
+
+
+THRESHOLDS = load_thresholds(os.environ.get("SCORING_THRESHOLDS"))
+THRESHOLDS_VERSION = thresholds_version(THRESHOLDS)
+
+
+def first_band(bands: List[List[float]], matches: Callable[..., bool], default: float = 0.0) -> float:
+    """Points of the first band whose bounds match; default if none does"""
+    return next((band[-1] for band in bands if matches(*band[:-1])), default)
+
+
+def confidence_score(mean_intensity: float, pitch_cv: float, mean_hnr: Optional[float],
+                     jitter: Optional[float], shimmer: Optional[float],
+                     thresholds: Optional[Dict[str, Dict[str, Any]]] = None) -> float:
+    """Confidence score (0-100) of one result; voice quality measures not computed are None"""
+    t = (thresholds or THRESHOLDS)["confidence"]
+    score = t["base"]
+    score += first_band(t["intensity_at_least"], lambda db: mean_intensity >= db)
+    score += first_band(t["pitch_cv_below"], lambda percent: pitch_cv < percent)
+    if mean_hnr is None:
+        score += t["hnr_missing"]
+    else:
+        score += first_band(t["hnr_above"], lambda db: mean_hnr > db)
+    if jitter is None or shimmer is None:
+        score += t["jitter_shimmer_missing"]
+    else:
+        score += first_band(t["jitter_shimmer_below"], lambda j, s: jitter < j and shimmer < s)
+    return min(100, max(0, score))
+
+
+def fluency_score(speech_rate: float, pause_ratio: float, articulation_rate: float,
+                  thresholds: Optional[Dict[str, Dict[str, Any]]] = None) -> float:
+    """Fluency score (0-100) of one result"""
+    t = (thresholds or THRESHOLDS)["fluency"]
+    score = t["base"]
+    score += first_band(t["speech_rate_within"], lambda low, high: low <= speech_rate <= high,
+                        t["speech_rate_other"] if speech_rate > 0 else 0)
+    score += first_band(t["pause_ratio_below"], lambda percent: pause_ratio < percent)
+    score += first_band(t["articulation_rate_within"], lambda low, high: low <= articulation_rate <= high,
+                        first_band(t["articulation_rate_above"], lambda low: articulation_rate > low))
+    return min(100, max(0, score))
+
+
+def banded(conditions: List[np.ndarray], points: List[float], default: Any = 0.0) -> np.ndarray:
+    """Points of the first condition that holds, elementwise; default where none does"""
+    if not conditions:
+        return np.asarray(default, dtype=float)
+    return np.select(conditions, points, default)
+
+
+def confidence_scores(mean_intensity, pitch_cv, mean_hnr, jitter, shimmer,
+                      thresholds: Optional[Dict[str, Dict[str, Any]]] = None) -> np.ndarray:
+    """
+    Confidence score (0-100) per element, as confidence_score
+
+    Voice quality measures that were not computed are NaN.
+    """
+    t = (thresholds or THRESHOLDS)["confidence"]
+    intensity, cv, hnr, jitter, shimmer = (
+        np.asarray(a, dtype=float) for a in (mean_intensity, pitch_cv, mean_hnr, jitter, shimmer)
+    )
+    zeros = np.zeros(np.broadcast_shapes(intensity.shape, cv.shape, hnr.shape, jitter.shape, shimmer.shape))
+
+    score = t["base"] + zeros
+    score += banded([intensity >= db for db, _ in t["intensity_at_least"]],
+                    [p for _, p in t["intensity_at_least"]])
+    score += banded([cv < percent for percent, _ in t["pitch_cv_below"]],
+                    [p for _, p in t["pitch_cv_below"]])
+    score += np.where(
+        np.isnan(hnr), t["hnr_missing"],
+        banded([hnr > db for db, _ in t["hnr_above"]], [p for _, p in t["hnr_above"]]),
+    )
+    score += np.where(
+        np.isnan(jitter) | np.isnan(shimmer), t["jitter_shimmer_missing"],
+        banded([(jitter < j) & (shimmer < s) for j, s, _ in t["jitter_shimmer_below"]],
+               [p for _, _, p in t["jitter_shimmer_below"]]),
+    )
+    return np.clip(score, 0, 100)
+
+
+def fluency_scores(speech_rate, pause_ratio, articulation_rate,
+                   thresholds: Optional[Dict[str, Dict[str, Any]]] = None) -> np.ndarray:
+    """Fluency score (0-100) per element, as fluency_score"""
+    t = (thresholds or THRESHOLDS)["fluency"]
+    rate, pauses, articulation = (np.asarray(a, dtype=float) for a in (speech_rate, pause_ratio, articulation_rate))
+    zeros = np.zeros(np.broadcast_shapes(rate.shape, pauses.shape, articulation.shape))
+
+    score = t["base"] + zeros
+    score += banded([(low <= rate) & (rate <= high) for low, high, _ in t["speech_rate_within"]],
+                    [p for _, _, p in t["speech_rate_within"]],
+                    np.where(rate > 0, t["speech_rate_other"], 0))
+    score += banded([pauses < percent for percent, _ in t["pause_ratio_below"]],
+                    [p for _, p in t["pause_ratio_below"]])
+    score += banded(
+        [(low <= articulation) & (articulation <= high) for low, high, _ in t["articulation_rate_within"]]
+        + [articulation > low for low, _ in t["articulation_rate_above"]],
+        [p for _, _, p in t["articulation_rate_within"]] + [p for _, p in t["articulation_rate_above"]],
+    )
+    return np.clip(score, 0, 100)
+
+
+def score_features(features: Dict[str, np.ndarray],
+                   thresholds: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, np.ndarray]:
+    """
+    Scores for a table of summary features (the build_results arguments, one array each)
+
+    Derives the pitch coefficient of variation and the timing rates the
+    way build_results does, then scores every row at once.
+
+    Returns:
+        "confidence", "fluency" and "overall" arrays
+    """
+    duration = np.asarray(features["duration"], dtype=float)
+    mean_pitch = np.asarray(features["mean_pitch"], dtype=float)
+    std_pitch = np.asarray(features["std_pitch"], dtype=float)
+    speaking_time = np.asarray(features["speaking_time"], dtype=float)
+    syllables = np.asarray(features["syllable_count"], dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pitch_cv = np.where(mean_pitch > 0, std_pitch / mean_pitch * 100, 0.0)
+        pause_ratio = np.where(duration > 0, (duration - speaking_time) / duration * 100, 0.0)
+        speech_rate = np.where(duration > 0, syllables * 60 / duration, 0.0)
+        articulation_rate = np.where(speaking_time > 0, syllables * 60 / speaking_time, 0.0)
+
+    confidence = confidence_scores(features["mean_intensity"], pitch_cv, features["mean_hnr"],
+                                   features["jitter"], features["shimmer"], thresholds)
+    fluency = fluency_scores(speech_rate, pause_ratio, articulation_rate, thresholds)
+    return {"confidence": confidence, "fluency": fluency, "overall": (confidence + fluency) / 2}
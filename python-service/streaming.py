@@ -0,0 +1,336 @@
+"""
+Incremental speech analysis for streamed PCM
+Keeps mergeable per-session statistics so each window of audio is
+analyzed once instead of re-running Praat over the whole recording
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+import parselmouth
+from parselmouth.praat import call
+
+from pitch import DEFAULT_PITCH_BACKEND, PITCH_BACKENDS
+from syllables import syllable_nuclei
+
+STREAM_WINDOW_SECONDS = float(os.environ.get("STREAM_WINDOW_SECONDS", "0.5"))
+STREAM_SESSION_IDLE_SECONDS = float(os.environ.get("STREAM_SESSION_IDLE_SECONDS", "600"))
+
+# Audio on either side of a window so Praat's analysis frames near the
+# window edges see the same context they would in a single pass
+CONTEXT_SECONDS = 0.05
+
+# Windows shorter than this cannot be pitch-analyzed (3 periods at 75 Hz)
+MIN_ANALYSIS_SECONDS = 0.05
+
+PCM_DTYPES = {
+    "int16": np.dtype('<i2'),
+    "float32": np.dtype('<f4'),
+}
+
+
+@dataclass
+class RunningStats:
+    """
+    Mergeable count/mean/M2 accumulator with min and max
+
+    Uses Chan et al.'s parallel update, so merging two accumulators gives
+    exactly the statistics of the combined samples
+    """
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = float('inf')
+    max: float = float('-inf')
+
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> "RunningStats":
+        if len(values) == 0:
+            return cls()
+        mean = float(np.mean(values))
+        return cls(
+            count=len(values),
+            mean=mean,
+            m2=float(np.sum((values - mean) ** 2)),
+            min=float(np.min(values)),
+            max=float(np.max(values)),
+        )
+
+    def merge(self, other: "RunningStats") -> None:
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation (matches np.std)"""
+        return float(np.sqrt(self.m2 / self.count)) if self.count > 0 else 0.0
+
+
+def analyze_window(
+    samples: np.ndarray,
+    sample_rate: int,
+    start: float,
+    end: Optional[float],
+    contours: bool = False,
+    pitch_backend: str = DEFAULT_PITCH_BACKEND,
+) -> Dict[str, Any]:
+    """
+    Analyze one window of a stream
+
+    Only frames whose time falls in [start, end) are reported; the audio
+    outside that range is context. Runs in a worker process.
+
+    Args:
+        contours: Also return the window's pitch contour and frame times,
+            for callers that detect syllables over the merged contours
+        pitch_backend: Pitch tracker (see pitch.py)
+
+    Returns:
+        Per-window accumulators and raw intensity frames for the session to merge
+    """
+    sound = parselmouth.Sound(samples, sampling_frequency=sample_rate)
+    end = sound.duration if end is None else end
+
+    def in_window(times: np.ndarray) -> np.ndarray:
+        return (times >= start) & (times < end)
+
+    pitch = PITCH_BACKENDS[pitch_backend](sound, 0.01)
+    pitch_contour = pitch.selected_array['frequency']
+    pitch_in_window = in_window(pitch.xs())
+    pitch_values = pitch_contour[pitch_in_window]
+    pitch_values = pitch_values[pitch_values > 0]
+
+    intensity = sound.to_intensity(time_step=0.01)
+    intensity_in_window = in_window(intensity.xs())
+    intensity_frames = intensity.values[0][intensity_in_window]
+
+    # Detect over the whole buffer so context frames can supply dips, count only this window
+    nuclei = syllable_nuclei(intensity.values[0], intensity.xs(), pitch_contour, pitch.xs())
+
+    harmonicity = sound.to_harmonicity()
+    hnr_values = harmonicity.values[0][in_window(harmonicity.xs())]
+    hnr_values = hnr_values[~np.isnan(hnr_values)]
+
+    # Jitter/shimmer are period averages, so weight them by period count when merging
+    jitter = shimmer = 0.0
+    periods = 0
+    if len(pitch_values) > 0:
+        try:
+            point_process = call([sound, pitch], "To PointProcess (cc)")
+            periods = call(point_process, "Get number of periods", start, end, 0.0001, 0.02, 1.3)
+            jitter = call(point_process, "Get jitter (local)", start, end, 0.0001, 0.02, 1.3)
+            shimmer = call([sound, point_process], "Get shimmer (local)", start, end, 0.0001, 0.02, 1.3, 1.6)
+        except Exception:
+            periods = 0  # Too few periods in this window; leave it out of the average
+
+    window = {
+        "pitch": RunningStats.from_values(pitch_values),
+        "intensity_frames": intensity_frames,
+        "hnr": RunningStats.from_values(hnr_values),
+        "jitter": float(jitter) if np.isfinite(jitter) else 0.0,
+        "shimmer": float(shimmer) if np.isfinite(shimmer) else 0.0,
+        "periods": int(periods),
+        "syllables": int(np.sum(in_window(nuclei))),
+    }
+    if contours:
+        window["intensity_times"] = intensity.xs()[intensity_in_window]
+        window["pitch_contour"] = pitch_contour[pitch_in_window]
+        window["pitch_times"] = pitch.xs()[pitch_in_window]
+    return window
+
+
+class StreamSession:
+    """
+    Per-session state for streamed analysis
+
+    Buffers incoming PCM, hands out fixed-length windows (with context on
+    both sides) for analysis, and merges each window's statistics into
+    running totals.
+    """
+
+    def __init__(self, sample_rate: int, encoding: str = "int16", channels: int = 1,
+                 window_seconds: float = STREAM_WINDOW_SECONDS, pitch_backend: str = DEFAULT_PITCH_BACKEND):
+        if encoding not in PCM_DTYPES:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+        if pitch_backend not in PITCH_BACKENDS:
+            raise ValueError(f"Unknown pitch backend: {pitch_backend}")
+        if sample_rate <= 0 or channels <= 0 or window_seconds <= 0:
+            raise ValueError("sample_rate, channels and window_seconds must be positive")
+
+        self.sample_rate = sample_rate
+        self.encoding = encoding
+        self.channels = channels
+        self.pitch_backend = pitch_backend
+        self.window_size = max(1, int(round(window_seconds * sample_rate)))
+        self.context_size = int(round(CONTEXT_SECONDS * sample_rate))
+
+        self._dtype = PCM_DTYPES[encoding]
+        self._pending = b''                      # Bytes not yet forming a whole frame
+        self._buffer = np.zeros(0, dtype=np.float64)
+        self._buffer_start = 0                   # Absolute sample index of _buffer[0]
+        self._analyzed = 0                       # Absolute sample index analyzed up to
+
+        self.windows = 0
+        self.pitch = RunningStats()
+        self.intensity = RunningStats()
+        self.hnr = RunningStats()
+        self.speech_frames = 0
+        self.total_frames = 0
+        self.syllables = 0
+        self.periods = 0
+        self.jitter_sum = 0.0
+        self.shimmer_sum = 0.0
+        self.last_active = time.monotonic()
+
+    def matches(self, sample_rate: int, encoding: str, channels: int,
+                window_seconds: float, pitch_backend: str) -> bool:
+        """Whether a reconnect with these settings can resume this session"""
+        window_size = max(1, int(round(window_seconds * sample_rate)))
+        return (self.sample_rate, self.encoding, self.channels, self.window_size, self.pitch_backend) == (
+            sample_rate, encoding, channels, window_size, pitch_backend)
+
+    def feed(self, data: bytes) -> None:
+        """Append raw little-endian PCM bytes to the session buffer"""
+        self.last_active = time.monotonic()
+        data = self._pending + data
+        frame_bytes = self._dtype.itemsize * self.channels
+        usable = len(data) - len(data) % frame_bytes
+        self._pending = data[usable:]
+        if usable == 0:
+            return
+
+        samples = np.frombuffer(data, dtype=self._dtype, count=usable // self._dtype.itemsize)
+        if self.encoding == "int16":
+            samples = np.multiply(samples, 1.0 / 32768, dtype=np.float64)
+        else:
+            samples = samples.astype(np.float64)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+
+        self._buffer = np.concatenate([self._buffer, samples])
+
+    @property
+    def received(self) -> int:
+        """Total number of samples received"""
+        return self._buffer_start + len(self._buffer)
+
+    def window_ready(self) -> bool:
+        """A full window plus trailing context is buffered"""
+        return self.received >= self._analyzed + self.window_size + self.context_size
+
+    def next_window(self, final: bool = False) -> Optional[tuple]:
+        """
+        Take the next window to analyze as (samples, sample_rate, start, end)
+
+        With final=True, returns whatever remains (or None if nothing does).
+        """
+        offset = self._analyzed - self._buffer_start
+        if final:
+            length = self.received - self._analyzed
+            if length <= 0:
+                return None
+            samples = self._buffer
+            end = None
+        else:
+            length = self.window_size
+            samples = self._buffer[:offset + length + self.context_size]
+            end = (offset + length) / self.sample_rate
+
+        start = offset / self.sample_rate
+        self._analyzed += length
+
+        # Keep only the context needed in front of the next window
+        keep_from = max(0, self._analyzed - self.context_size - self._buffer_start)
+        self._buffer = self._buffer[keep_from:]
+        self._buffer_start += keep_from
+
+        if len(samples) < MIN_ANALYSIS_SECONDS * self.sample_rate:
+            # Too short for Praat; count it as silence
+            self.total_frames += int(round(length / self.sample_rate / 0.01))
+            return None
+
+        return samples, self.sample_rate, start, end
+
+    def merge(self, window: Dict[str, Any]) -> None:
+        """Fold one window's statistics into the session totals"""
+        self.windows += 1
+        self.pitch.merge(window["pitch"])
+
+        intensity_frames = window["intensity_frames"]
+        self.intensity.merge(RunningStats.from_values(intensity_frames[intensity_frames > 0]))
+        self.hnr.merge(window["hnr"])
+
+        # Same rule as the batch path, with the running mean as reference
+        silence_threshold = self.intensity.mean * 0.3 if self.intensity.mean > 0 else 40
+        self.speech_frames += int(np.sum(intensity_frames > silence_threshold))
+        self.total_frames += len(intensity_frames)
+        self.syllables += window["syllables"]
+
+        if window["periods"] > 0:
+            self.periods += window["periods"]
+            self.jitter_sum += window["jitter"] * window["periods"]
+            self.shimmer_sum += window["shimmer"] * window["periods"]
+
+    def summary(self) -> Optional[Dict[str, float]]:
+        """
+        Summary features for build_results, or None until speech is heard
+        """
+        if self.pitch.count == 0:
+            return None
+
+        duration = self._analyzed / self.sample_rate
+        speaking_time = (self.speech_frames / self.total_frames) * duration if self.total_frames > 0 else 0
+
+        return {
+            "duration": duration,
+            "mean_pitch": self.pitch.mean,
+            "std_pitch": self.pitch.std,
+            "min_pitch": self.pitch.min,
+            "max_pitch": self.pitch.max,
+            "mean_intensity": self.intensity.mean,
+            "std_intensity": self.intensity.std,
+            "max_intensity": self.intensity.max if self.intensity.count > 0 else 0.0,
+            "mean_hnr": self.hnr.mean,
+            "jitter": self.jitter_sum / self.periods if self.periods > 0 else 0.0,
+            "shimmer": self.shimmer_sum / self.periods if self.periods > 0 else 0.0,
+            "speaking_time": speaking_time,
+            "syllable_count": self.syllables,
+        }
+
+
+# Sessions live in this process; reconnecting to the same session id resumes them
+_sessions: Dict[str, StreamSession] = {}
+
+
+def get_session(session_id: str, sample_rate: int, encoding: str, channels: int,
+                window_seconds: float, pitch_backend: str = DEFAULT_PITCH_BACKEND) -> StreamSession:
+    """Return the session for session_id, starting a new one if needed (or if any setting changed)"""
+    now = time.monotonic()
+    for key in [k for k, v in _sessions.items() if now - v.last_active > STREAM_SESSION_IDLE_SECONDS]:
+        del _sessions[key]
+
+    session = _sessions.get(session_id)
+    if session is None or not session.matches(sample_rate, encoding, channels, window_seconds, pitch_backend):
+        session = StreamSession(sample_rate, encoding, channels, window_seconds, pitch_backend)
+        _sessions[session_id] = session
+    return session
+
+
+def end_session(session_id: str) -> None:
+    """Forget a finished session"""
+    _sessions.pop(session_id, None)
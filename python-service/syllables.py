@@ -0,0 +1,101 @@
+"""
+Syllable-nucleus detection from intensity and pitch contours
+After de Jong & Wempe (2009): a nucleus is an intensity peak above a
+silence threshold, preceded by a dip of at least MIN_DIP_DB, and voiced.
+Vectorized over the contours the analysis already computes; without a
+pitch contour, voicing comes from the zero-crossing rate at each peak.
+"""
+
+import numpy as np
+
+# Peaks must be within this many dB of the 99th-percentile intensity
+SILENCE_DB = -25.0
+# Intensity must fall at least this far between two nuclei
+MIN_DIP_DB = 2.0
+# Zero-crossing voicing: peaks whose surrounding window crosses zero more
+# often than this per second are unvoiced (fricatives, noise)
+VOICED_MAX_CROSSINGS = 3000.0
+VOICING_WINDOW_SECONDS = 0.03
+
+
+def syllable_nuclei(
+    intensity_db: np.ndarray,
+    intensity_times: np.ndarray,
+    pitch_values: np.ndarray,
+    pitch_times: np.ndarray,
+) -> np.ndarray:
+    """
+    Find syllable nuclei
+
+    Args:
+        intensity_db: Intensity contour in dB
+        intensity_times: Frame times of the intensity contour
+        pitch_values: Pitch contour in Hz (0 = unvoiced)
+        pitch_times: Frame times of the pitch contour
+
+    Returns:
+        Times of the detected nuclei
+    """
+    if len(pitch_values) == 0:
+        return np.zeros(0)
+    peak_times = intensity_peaks(intensity_db, intensity_times)
+    return peak_times[pitch_voicing(peak_times, pitch_values, pitch_times)]
+
+
+def intensity_peaks(intensity_db: np.ndarray, intensity_times: np.ndarray) -> np.ndarray:
+    """Times of the intensity peaks that qualify as nuclei if voiced"""
+    if len(intensity_db) < 3:
+        return np.zeros(0)
+
+    audible = intensity_db[intensity_db > -300]
+    if len(audible) == 0:
+        return np.zeros(0)
+    threshold = max(np.quantile(audible, 0.99) + SILENCE_DB, float(np.min(audible)))
+
+    # Local maxima (the first frame of a plateau counts) above the threshold
+    centre = intensity_db[1:-1]
+    is_peak = (centre > intensity_db[:-2]) & (centre >= intensity_db[2:]) & (centre > threshold)
+    peaks = np.flatnonzero(is_peak) + 1
+    if len(peaks) == 0:
+        return np.zeros(0)
+
+    # Deepest point between each peak and the one before it (or the start)
+    segment_starts = np.concatenate([[0], peaks[:-1]])
+    dips = np.minimum.reduceat(intensity_db[:peaks[-1]], segment_starts)
+    peaks = peaks[intensity_db[peaks] - dips >= MIN_DIP_DB]
+    return intensity_times[peaks]
+
+
+def pitch_voicing(peak_times: np.ndarray, pitch_values: np.ndarray, pitch_times: np.ndarray) -> np.ndarray:
+    """Whether the pitch frame nearest each peak is voiced"""
+    if len(peak_times) == 0 or len(pitch_values) == 0:
+        return np.zeros(len(peak_times), dtype=bool)
+    after = np.clip(np.searchsorted(pitch_times, peak_times), 0, len(pitch_times) - 1)
+    before = np.maximum(after - 1, 0)
+    closer_before = np.abs(peak_times - pitch_times[before]) < np.abs(pitch_times[after] - peak_times)
+    pitch_index = np.where(closer_before, before, after)
+    return pitch_values[pitch_index] > 0
+
+
+def zero_crossing_voicing(samples: np.ndarray, sample_rate: float, peak_times: np.ndarray) -> np.ndarray:
+    """
+    Whether each peak is voiced, from the zero-crossing rate around it
+
+    A stand-in for pitch_voicing when no pitch contour was computed: only
+    VOICING_WINDOW_SECONDS around each peak is read, so it costs next to
+    nothing next to a pitch track.
+
+    Args:
+        samples: Audio as (samples,) or (channels, samples)
+    """
+    signal = np.atleast_2d(samples).mean(axis=0)
+    length = min(len(signal), max(2, int(round(VOICING_WINDOW_SECONDS * sample_rate))))
+    if len(peak_times) == 0 or length < 2:
+        return np.zeros(len(peak_times), dtype=bool)
+
+    starts = np.round(peak_times * sample_rate).astype(np.int64) - length // 2
+    starts = np.clip(starts, 0, len(signal) - length)
+    frames = np.lib.stride_tricks.sliding_window_view(signal, length)[starts]
+    negative = np.signbit(frames - frames.mean(axis=1, keepdims=True))
+    crossings = np.count_nonzero(negative[:, 1:] != negative[:, :-1], axis=1)
+    return crossings * sample_rate / length < VOICED_MAX_CROSSINGS
@@ -0,0 +1,56 @@
+"""
+Synthetic test audio
+Speech-like and silent signals and a WAV encoder, shared by worker
+warm-up, the benchmark, the load test and the tests
+"""
+
+import io
+import wave
+
+import numpy as np
+
+
+def generate_speech_like(duration: float, sample_rate: int, seed: int = 0,
+                         syllables: bool = True, pauses: bool = True) -> np.ndarray:
+    """
+    Synthetic speech-like signal: harmonic source with a gliding F0,
+    a syllable-rate envelope, occasional pauses and background noise
+
+    syllables=False leaves out the envelope (one held vowel), and
+    pauses=False the pauses (fluent speech).
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+
+    f0 = 140 + 25 * np.sin(2 * np.pi * 0.7 * t) + 10 * np.sin(2 * np.pi * 3.1 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    audio = np.zeros_like(t)
+    for k in range(1, 20):
+        audio += np.sin(k * phase) / k
+    if syllables:
+        audio *= (0.5 * (1 + np.sin(2 * np.pi * 4 * t))) ** 1.5
+
+    # One 400 ms pause every ~3 s
+    for start in rng.uniform(0, max(duration - 0.5, 0.1), size=max(1, int(duration / 3))):
+        if pauses:
+            audio[int(start * sample_rate):int((start + 0.4) * sample_rate)] = 0
+
+    audio += 0.005 * rng.standard_normal(len(t))
+    return 0.3 * audio / np.max(np.abs(audio))
+
+
+def generate_silence(duration: float, sample_rate: int, seed: int = 0) -> np.ndarray:
+    """Low-level background noise with no speech"""
+    rng = np.random.default_rng(seed)
+    return 0.001 * rng.standard_normal(int(duration * sample_rate))
+
+
+def to_wav_bytes(audio: np.ndarray, sample_rate: int) -> bytes:
+    """Encode as 16-bit mono WAV, like the browser client"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'w') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes((np.clip(audio, -1, 1) * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
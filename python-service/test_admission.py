@@ -0,0 +1,225 @@
+"""
+Tests for admission control and /analyze under overload
+"""
+
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, QueueFull, Superseded
+from long_audio import analyze_long_wav
+from synthetic import generate_speech_like, to_wav_bytes
+from wav_io import parse_wav_header
+
+
+async def hold(controller, order, name, priority="interactive", key=None, release=None):
+    async with controller.slot(priority, key=key):
+        order.append(name)
+        if release is not None:
+            await release.wait()
+
+
+def test_interactive_jobs_run_before_bulk():
+    async def scenario():
+        controller = AdmissionController(slots=1, max_queued=10)
+        order = []
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(controller, order, "first", release=release))]
+        await asyncio.sleep(0)
+        for name, priority in [("bulk-1", "bulk"), ("live-1", "interactive"), ("bulk-2", "bulk"), ("live-2", "interactive")]:
+            tasks.append(asyncio.create_task(hold(controller, order, name, priority)))
+            await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "live-1", "live-2", "bulk-1", "bulk-2"]
+
+
+def test_full_queue_sheds_bulk_then_rejects():
+    async def scenario():
+        controller = AdmissionController(slots=1, max_queued=1)
+        order = []
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(controller, order, "running", release=release))
+        await asyncio.sleep(0)
+
+        bulk = asyncio.create_task(hold(controller, order, "bulk", "bulk"))
+        await asyncio.sleep(0)
+        # An interactive job displaces the queued bulk job...
+        live = asyncio.create_task(hold(controller, order, "live"))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFull):
+            await bulk
+
+        # ...but nothing displaces an interactive job
+        with pytest.raises(QueueFull) as excinfo:
+            await hold(controller, order, "late")
+        assert excinfo.value.retry_after >= 1
+
+        release.set()
+        await asyncio.gather(running, live)
+        return order, controller.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["running", "live"]
+    assert stats["rejected"] == 2 and stats["queued"] == 0 and stats["running"] == 0
+
+
+def test_newer_chunk_supersedes_queued_one():
+    async def scenario():
+        controller = AdmissionController(slots=1, max_queued=10)
+        order = []
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(controller, order, "running", key="s1", release=release))
+        await asyncio.sleep(0)
+
+        stale = asyncio.create_task(hold(controller, order, "stale", key="s1"))
+        other = asyncio.create_task(hold(controller, order, "other", key="s2"))
+        await asyncio.sleep(0)
+        fresh = asyncio.create_task(hold(controller, order, "fresh", key="s1"))
+        await asyncio.sleep(0)
+        with pytest.raises(Superseded):
+            await stale
+
+        release.set()
+        await asyncio.gather(running, other, fresh)
+        return order
+
+    # The running job is never superseded; only the queued one is dropped
+    assert asyncio.run(scenario()) == ["running", "other", "fresh"]
+
+
+def test_cancelled_waiter_frees_its_place():
+    async def scenario():
+        controller = AdmissionController(slots=1, max_queued=1)
+        order = []
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(controller, order, "running", release=release))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(hold(controller, order, "gone"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.sleep(0)
+
+        queued = asyncio.create_task(hold(controller, order, "next"))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(running, queued)
+        return order, controller.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["running", "next"]
+    assert stats["running"] == 0 and stats["queued"] == 0
+
+
+def test_follow_up_jobs_are_neither_counted_nor_shed():
+    async def scenario():
+        controller = AdmissionController(slots=1, max_queued=1)
+        order = []
+        release = asyncio.Event()
+        running = asyncio.create_task(hold(controller, order, "running", release=release))
+        await asyncio.sleep(0)
+
+        async def follow_up(name):
+            async with controller.slot("bulk", bounded=False):
+                order.append(name)
+
+        chunks = [asyncio.create_task(follow_up(f"chunk-{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        # Three queued chunks leave the one bounded place free...
+        live = asyncio.create_task(hold(controller, order, "live"))
+        await asyncio.sleep(0)
+        # ...and a full queue rejects the newcomer rather than shedding a chunk
+        with pytest.raises(QueueFull):
+            await hold(controller, order, "late")
+
+        release.set()
+        await asyncio.gather(running, live, *chunks)
+        return order, controller.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["running", "live", "chunk-0", "chunk-1", "chunk-2"]
+    assert stats["rejected"] == 1 and stats["queued"] == 0 and stats["running"] == 0
+
+
+def long_wav(seconds=25, rate=8000):
+    content = to_wav_bytes(generate_speech_like(seconds, rate, seed=5), rate)
+    return content, parse_wav_header(content)
+
+
+def test_live_chunk_during_a_chunked_report(monkeypatch):
+    async def scenario():
+        controller = AdmissionController(slots=1, max_queued=1)
+        monkeypatch.setattr("long_audio.admission", controller)
+        release = asyncio.Event()
+
+        async def run_in_pool(func, *args):
+            await release.wait()
+            return await asyncio.to_thread(func, *args)
+
+        monkeypatch.setattr("long_audio.run_in_pool", run_in_pool)
+        report = asyncio.create_task(analyze_long_wav(*long_wav()))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert controller.stats()["running"] == 1 and controller.stats()["queued"] >= 1
+
+        # The report's queued chunks neither block nor get shed by a live chunk
+        order = []
+        live = asyncio.create_task(hold(controller, order, "live"))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.wait_for(live, 10)
+        summary, timeline = await asyncio.wait_for(report, 30)
+        return order, summary, timeline, controller.stats()
+
+    order, summary, timeline, stats = asyncio.run(scenario())
+    assert order == ["live"]
+    assert summary["duration"] == pytest.approx(25, abs=0.01) and len(timeline) >= 2
+    assert stats["rejected"] == 0 and stats["running"] == 0
+
+
+def test_failed_chunk_cancels_the_rest(monkeypatch):
+    async def scenario():
+        controller = AdmissionController(slots=2, max_queued=1)
+        monkeypatch.setattr("long_audio.admission", controller)
+        started, cancelled = [], []
+
+        async def run_in_pool(func, *args):
+            started.append(args[3])
+            if len(started) == 1:
+                await asyncio.sleep(0)
+                raise RuntimeError("chunk failed")
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(args[3])
+                raise
+
+        monkeypatch.setattr("long_audio.run_in_pool", run_in_pool)
+        with pytest.raises(RuntimeError, match="chunk failed"):
+            await asyncio.wait_for(analyze_long_wav(*long_wav()), 10)
+        return started, cancelled, controller.stats()
+
+    started, cancelled, stats = asyncio.run(scenario())
+    # Every chunk but the failed one was stopped, and none kept its slot
+    assert len(started) >= 2 and cancelled == started[1:]
+    assert stats["running"] == 0 and stats["queued"] == 0
+
+
+def test_full_queue_answers_429_but_cached_results_are_served(client, monkeypatch):
+    cached = to_wav_bytes(generate_speech_like(1, 16000, seed=3), 16000)
+    fresh = to_wav_bytes(generate_speech_like(1, 16000, seed=4), 16000)
+    assert client.post("/analyze", files={"file": ("a.wav", cached, "audio/wav")}).status_code == 200
+
+    # The only worker is busy and there is no room to queue
+    busy = AdmissionController(slots=1, max_queued=0)
+    busy.running = 1
+    monkeypatch.setattr("analyze.admission", busy)
+    response = client.post("/analyze", files={"file": ("b.wav", fresh, "audio/wav")})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert client.get("/queue/stats").json()["rejected"] == 1
+    assert 'analysis_rejected_total{reason="queue_full"}' in client.get("/metrics").text
+
+    assert client.post("/analyze", files={"file": ("a.wav", cached, "audio/wav")}).status_code == 200
@@ -0,0 +1,97 @@
+"""
+Tests for batch clip extraction and /analyze/batch
+"""
+
+import io
+import json
+from functools import partial
+import tarfile
+import zipfile
+
+import pytest
+
+from batch import ArchiveTooLarge, archive_items
+from synthetic import generate_speech_like, to_wav_bytes
+
+
+def make_zip(files, compression=zipfile.ZIP_STORED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def make_tar(files, mode='w:gz'):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+CLIPS = {"turn-1.wav": b"RIFF1", "turns/turn-2.wav": b"RIFF2", "__MACOSX/._turn-1.wav": b"x", ".DS_Store": b"x"}
+
+
+@pytest.mark.parametrize("build", [make_zip, make_tar, lambda files: make_tar(files, 'w')])
+def test_archive_items_skip_metadata(build):
+    assert archive_items(build(CLIPS)) == [("turn-1.wav", b"RIFF1"), ("turns/turn-2.wav", b"RIFF2")]
+
+
+def test_archive_items_limits():
+    with pytest.raises(ValueError):
+        archive_items(make_zip(CLIPS), max_items=1)
+    with pytest.raises(ValueError):
+        archive_items(b"RIFF....WAVE")
+
+
+def test_archive_items_refuse_oversized_members(tmp_path):
+    bomb = make_zip({"a.wav": bytes(10_000), "b.wav": bytes(10_000)}, zipfile.ZIP_DEFLATED)
+    assert len(bomb) < 1000
+    with pytest.raises(ArchiveTooLarge, match="a.wav"):
+        archive_items(bomb, max_clip_bytes=5_000)
+    with pytest.raises(ArchiveTooLarge, match="15000-byte limit"):
+        archive_items(make_tar({"a.wav": bytes(10_000), "b.wav": bytes(10_000)}), max_bytes=15_000)
+
+    # Spooled archives are read from their file
+    path = tmp_path / "clips.zip"
+    path.write_bytes(make_zip(CLIPS))
+    assert archive_items(str(path))[0] == ("turn-1.wav", b"RIFF1")
+
+
+def batch_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_endpoint_streams_one_line_per_clip(client):
+    speech = to_wav_bytes(generate_speech_like(1, 16000), 16000)
+    files = [
+        ("files", ("a.wav", speech, "audio/wav")),
+        ("files", ("broken.wav", b"RIFF....WAVEnot audio", "audio/wav")),
+        ("archive", ("clips.tar.gz", make_tar({"turns/b.wav": speech}), "application/gzip")),
+    ]
+    response = client.post("/analyze/batch", params={"features": "pitch,timing"}, files=files)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = batch_lines(response)
+    assert lines[-1] == {"done": True, "total": 3, "succeeded": 2, "failed": 1}
+    by_name = {line["filename"]: line for line in lines[:-1]}
+    assert sorted(by_name) == ["a.wav", "broken.wav", "turns/b.wav"]
+    assert by_name["turns/b.wav"]["results"]["pitch"] == by_name["a.wav"]["results"]["pitch"]
+    assert set(by_name["a.wav"]["results"]) >= {"duration", "pitch", "timing"}
+    assert not by_name["broken.wav"]["success"] and "No data chunk" in by_name["broken.wav"]["error"]
+
+
+def test_batch_endpoint_rejects_bad_requests(client, monkeypatch):
+    assert client.post("/analyze/batch", params={"profile": "fast"}).status_code == 400
+    response = client.post("/analyze/batch", files={"archive": ("clips.zip", b"not an archive", "application/zip")})
+    assert response.status_code == 400
+
+    monkeypatch.setattr("analyze.archive_items", partial(archive_items, max_clip_bytes=1000))
+    archive = make_zip({"a.wav": bytes(5000)})
+    response = client.post("/analyze/batch", files={"archive": ("clips.zip", archive, "application/zip")})
+    assert response.status_code == 413
+    assert "a.wav" in response.json()["detail"]
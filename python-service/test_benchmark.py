@@ -0,0 +1,62 @@
+"""
+Tests for the offline benchmark and its committed baseline
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from benchmark import BACKEND_PAIRS, DEFAULT_BASELINE, QUICK_DURATIONS, SAMPLE_RATES, SIGNALS, case_name, compare
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STAGES = {
+    "decode_wav", "sound", "pitch", "pitch_numpy", "intensity", "intensity_numpy", "harmonicity",
+    "point_process", "jitter_shimmer", "syllables", "analyze_full", "analyze_fast",
+}
+
+
+def test_tiny_case_reports_every_stage(tmp_path):
+    output = tmp_path / "results.json"
+    completed = subprocess.run(
+        [sys.executable, "benchmark.py", "--durations", "1", "--rates", "16000", "--signals", "speech",
+         "--repeat", "1", "--output", str(output), "--baseline", DEFAULT_BASELINE, "--threshold", "1000",
+         "--rss-threshold", "1000"],
+        cwd=HERE, capture_output=True, text=True, timeout=300,
+    )
+    assert completed.returncode == 0, completed.stdout + completed.stderr
+    assert "No regressions" in completed.stdout
+
+    report = json.loads(output.read_text())
+    assert set(report["meta"]) == {"parselmouth", "numpy"}
+    case = report["cases"]["speech-1s-16k"]
+    assert set(case) == {"stages", "speedups", "peak_rss_mb"}
+    assert set(case["stages"]) == STAGES
+    assert all(stage["seconds"] > 0 and "error" not in stage for stage in case["stages"].values())
+    assert set(case["speedups"]) == {numpy_stage for numpy_stage, _ in BACKEND_PAIRS}
+
+
+def test_baseline_covers_the_quick_cases():
+    with open(os.path.join(HERE, DEFAULT_BASELINE)) as f:
+        baseline = json.load(f)
+
+    for signal in SIGNALS:
+        for duration in QUICK_DURATIONS:
+            for sample_rate in SAMPLE_RATES:
+                case = baseline["cases"][case_name(signal, duration, sample_rate)]
+                assert set(case["stages"]) == STAGES
+                assert case["peak_rss_mb"] > 0
+
+
+def test_compare_flags_slower_stages_and_memory_growth():
+    baseline = {"speech-1s-16k": {"stages": {"pitch": {"seconds": 0.01}, "sound": {"seconds": 0.0001}},
+                                  "peak_rss_mb": 100}}
+    results = [{"case": "speech-1s-16k", "peak_rss_mb": 130,
+                "stages": {"pitch": {"seconds": 0.02}, "sound": {"seconds": 0.001}}}]
+
+    regressions = compare(results, baseline, threshold=1.25, rss_threshold=1.2, min_seconds=0.005)
+
+    # "sound" is too fast to time reliably and is not compared
+    assert len(regressions) == 2
+    assert regressions[0].startswith("speech-1s-16k pitch: 0.0200s vs baseline 0.0100s")
+    assert "peak RSS" in regressions[1]
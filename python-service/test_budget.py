@@ -0,0 +1,104 @@
+"""
+Tests for deadline-aware analysis planning and budgeted requests
+"""
+
+import numpy as np
+import parselmouth
+
+from analyze import analyze_sound
+from budget import CostModel, Plan, candidate_plans, coverage, reported_plan
+from features import FEATURE_GROUPS
+from synthetic import generate_speech_like
+
+ALL = frozenset(FEATURE_GROUPS)
+
+
+def test_tighter_budgets_downgrade_in_priority_order():
+    model = CostModel(headroom=1.0)
+    plans = [model.plan(budget, "full", 10.0, 48000, ALL)[0] for budget in (60, 0.6, 0.3, 0.12, 0.01)]
+
+    assert plans == [
+        Plan("full"),
+        Plan("full", "downsampled"),
+        Plan("fast"),
+        Plan("fast", "omitted"),
+        Plan("fast", "omitted", jitter_shimmer=False),
+    ]
+
+
+def test_a_slow_worker_plans_cheaper():
+    model = CostModel(headroom=1.0)
+    plan, predicted = model.plan(0.6, "full", 10.0, 48000, ALL)
+    for _ in range(10):
+        # Every stage took three times its reference cost
+        model.observe(plan, 10.0, 48000, ALL, {"harmonicity": 3 * predicted})
+
+    assert model.speed > 2
+    assert model.plan(0.6, "full", 10.0, 48000, ALL)[0] == Plan("fast")
+
+
+def test_first_observation_after_reset_calibrates():
+    model = CostModel(headroom=1.0)
+    plan, predicted = model.plan(60, "full", 10.0, 48000, ALL)
+    model.observe(plan, 10.0, 48000, ALL, {"harmonicity": 0.5 * predicted})
+    assert model.speed == 0.5
+
+    model.observe(plan, 10.0, 48000, ALL, {"harmonicity": 1.5 * predicted})
+    assert 0.5 < model.speed < 1.5
+    model.reset()
+    assert model.speed == 1.0 and not model.calibrated
+
+
+def test_coverage_reports_downgrades():
+    assert coverage(Plan("full"), "full", ALL)["estimated"] == []
+
+    report = coverage(Plan("fast", "omitted"), "full", frozenset({"pitch", "voice_quality"}))
+    assert report["estimated"] == ["pitch", "voice_quality.jitter", "voice_quality.shimmer"]
+    assert report["omitted"] == ["voice_quality.harmonics_to_noise_ratio"]
+    assert report["computed"] == []
+
+    # The service recovers each plan from its report
+    for plan in candidate_plans("full", 48000):
+        assert reported_plan({"profile": plan.profile, **coverage(plan, "full", ALL)}, "full", 48000, ALL) == plan
+
+
+def test_budgeted_analysis_omits_voice_quality_and_reports_it():
+    sound = parselmouth.Sound(generate_speech_like(1, 48000), sampling_frequency=48000)
+    results = analyze_sound(sound, budget=0.000001)
+
+    assert results["budget"]["profile"] == "fast"
+    assert results["budget"]["omitted"] == [
+        "voice_quality.harmonics_to_noise_ratio", "voice_quality.jitter", "voice_quality.shimmer"
+    ]
+    assert results["voice_quality"] == {"harmonics_to_noise_ratio": None, "jitter": None, "shimmer": None}
+    assert results["pitch"]["mean"] > 0
+    assert 0 <= results["scores"]["confidence"] <= 100
+
+    assert "budget" not in analyze_sound(sound)
+
+
+def test_cached_results_are_served_only_to_budgets_they_fit(client):
+    speech = generate_speech_like(1, 48000, seed=7)
+    pcm = (np.clip(speech, -1, 1) * 32767).astype('<i2').tobytes()
+
+    def analyze(budget_ms=None):
+        headers = {"X-Sample-Rate": "48000"}
+        if budget_ms is not None:
+            headers["X-Analysis-Budget-Ms"] = str(budget_ms)
+        response = client.post("/analyze/pcm", content=pcm, headers=headers)
+        assert response.status_code == 200
+        return response.json()["results"]
+
+    tight = analyze(1)
+    assert tight["budget"]["omitted"] and "cached" not in tight["budget"]
+    again = analyze(1)
+    assert again["budget"]["cached"] and again["budget"]["omitted"] == tight["budget"]["omitted"]
+    assert {**again, "budget": None} == {**tight, "budget": None}
+
+    # A budget that affords the full analysis gets it, not the downgraded results
+    generous = analyze(60000)
+    assert generous["budget"]["estimated"] == generous["budget"]["omitted"] == []
+    assert generous["voice_quality"]["harmonics_to_noise_ratio"] is not None
+    served = analyze(60000)
+    assert served["budget"]["cached"] and served["budget"]["omitted"] == []
+    assert "budget" not in analyze()
@@ -0,0 +1,92 @@
+"""
+Tests for silence compaction and /compact
+"""
+
+import json
+from email.parser import BytesParser
+
+import numpy as np
+
+from compaction import compact_pcm, keep_segments
+from synthetic import generate_silence, generate_speech_like, to_wav_bytes
+from wav_io import parse_wav_header, read_wav_bytes
+
+
+def burst(duration, sample_rate, frequency=200.0):
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    return 0.3 * np.sin(2 * np.pi * frequency * t)
+
+
+def test_only_long_pauses_are_shortened():
+    speech = np.zeros(100, dtype=bool)
+    speech[10:20] = speech[24:30] = speech[70:80] = True
+
+    # The 4-frame pause is kept, the 40-frame one and the edges shrink to 10 frames
+    assert keep_segments(speech, 10) == [(5, 35), (65, 85)]
+    assert keep_segments(np.zeros(10, dtype=bool), 10) == []
+
+
+def test_compaction_trims_dead_air_and_maps_times_back():
+    rate = 48000
+    silence = np.zeros(10 * rate)
+    audio = np.concatenate([silence[:rate], burst(2, rate), silence, burst(1, rate, 300), silence[:2 * rate]])
+    content = to_wav_bytes(audio, rate)
+
+    result = compact_pcm(content, parse_wav_header(content), max_pause=0.5)
+
+    assert result["original_duration"] == 16.0
+    assert result["compacted_duration"] == 4.0
+    assert result["sample_rate"] == 16000 and result["channels"] == 1
+
+    (first_compacted, first_original, first_length), (second_compacted, second_original, _) = result["segments"]
+    assert (first_compacted, first_original, first_length) == (0.0, 0.75, 2.5)
+    assert second_compacted == 2.5 and second_original == 12.75
+
+    samples, out_rate = read_wav_bytes(result["audio"])
+    assert out_rate == 16000
+    # The second burst starts max_pause / 2 into its segment
+    onset = np.argmax(np.abs(samples[0]) > 0.1) / out_rate
+    second_onset = (second_compacted + 0.25) * out_rate
+    assert abs(onset - 0.25) < 0.01
+    assert np.abs(samples[0, int(second_onset) + 80:int(second_onset) + 400]).max() > 0.2
+
+
+def test_background_noise_is_cut_like_silence():
+    rate = 16000
+    speech = generate_speech_like(2, rate, pauses=False)
+    gap = np.zeros(4 * rate)
+    audio = np.concatenate([gap[:rate], speech, gap, speech, gap[:rate]])
+    # A noise bed about 45 dB (Praat scale) under everything
+    audio += 3 * generate_silence(len(audio) / rate, rate)
+    content = to_wav_bytes(audio, rate)
+
+    result = compact_pcm(content, parse_wav_header(content), max_pause=0.5)
+    assert result["original_duration"] == 10.0
+    assert 4.0 <= result["compacted_duration"] <= 5.6
+    assert len(result["segments"]) == 2
+
+    noise = to_wav_bytes(3 * generate_silence(3, rate), rate)
+    assert compact_pcm(noise, parse_wav_header(noise))["segments"] == []
+
+
+def test_compact_endpoint_returns_the_wav_and_its_time_map_as_form_data(client):
+    rate = 16000
+    audio = np.concatenate([burst(1, rate), np.zeros(5 * rate), burst(1, rate, 300)])
+    response = client.post("/compact", params={"max_pause": 0.5},
+                           files={"file": ("user.wav", to_wav_bytes(audio, rate), "audio/wav")})
+    assert response.status_code == 200
+    assert "total;dur=" in response.headers["server-timing"]
+
+    message = BytesParser().parsebytes(
+        b"Content-Type: " + response.headers["content-type"].encode() + b"\r\n\r\n" + response.content
+    )
+    metadata, wav = (part.get_payload(decode=True) for part in message.get_payload())
+    metadata = json.loads(metadata)
+    assert metadata["filename"] == "user.wav" and "audio" not in metadata
+    assert metadata["original_duration"] == 7.0 and metadata["compacted_duration"] == 2.5
+    samples, out_rate = read_wav_bytes(wav)
+    assert samples.shape[1] / out_rate == 2.5
+
+    assert client.post("/compact", files={"file": ("notes.txt", b"hi", "text/plain")}).status_code == 400
+    response = client.post("/compact", files={"file": ("clip.ogg", b"OggS" + bytes(100), "audio/ogg")})
+    assert response.status_code == 400
@@ -0,0 +1,127 @@
+"""
+Tests for compressed upload decoding
+Fixtures are encoded on the fly with PyAV's bundled encoders
+"""
+
+import asyncio
+import io
+import pickle
+from functools import partial
+
+import numpy as np
+import pytest
+
+import compressed
+from analyze import analyze_audio_bytes
+from compressed import DecodedTooLarge, UnsupportedAudio, check_decodable, compressed_format, decode_compressed
+from synthetic import generate_silence, generate_speech_like, to_wav_bytes
+
+av = pytest.importorskip("av")
+
+RATE = 48000
+FORMATS = [("webm", "libopus"), ("ogg", "libopus"), ("mp4", "aac")]
+
+
+def encode(samples, container_format, codec, rate=RATE):
+    """Encode mono float samples the way MediaRecorder would (20 ms frames)"""
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format=container_format) as container:
+        stream = container.add_stream(codec, rate=rate)
+        stream.layout = "mono"
+        samples = samples.astype(np.float32)
+        frame_size = rate // 50
+        for start in range(0, len(samples), frame_size):
+            frame = av.AudioFrame.from_ndarray(samples[None, start:start + frame_size], format="flt", layout="mono")
+            frame.sample_rate = rate
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("container_format, codec", FORMATS)
+def test_decodes_to_float32_pcm(container_format, codec):
+    samples = generate_speech_like(2, RATE)
+    content = encode(samples, container_format, codec)
+    assert compressed_format(content) == container_format
+    assert len(content) < len(to_wav_bytes(samples, RATE)) / 5
+
+    pcm, info = decode_compressed(content)
+    decoded = np.frombuffer(pcm, dtype=np.float32)
+    assert (info.sample_rate, info.channels, info.bits_per_sample) == (RATE, 1, 32)
+    assert len(decoded) == pytest.approx(len(samples), abs=0.03 * RATE)
+    assert np.sqrt(np.mean(decoded ** 2)) == pytest.approx(np.sqrt(np.mean(samples ** 2)), rel=0.1)
+
+
+def test_analysis_matches_the_wav_upload():
+    samples = generate_speech_like(5, RATE, seed=3)
+    expected = analyze_audio_bytes(to_wav_bytes(samples, RATE))
+    results = analyze_audio_bytes(encode(samples, "webm", "libopus"))
+
+    assert results["pitch"]["mean"] == pytest.approx(expected["pitch"]["mean"], abs=0.5)
+    assert results["intensity"]["mean"] == pytest.approx(expected["intensity"]["mean"], abs=0.5)
+    assert results["timing"]["syllable_count"] == pytest.approx(expected["timing"]["syllable_count"], abs=1)
+    assert results["scores"] == expected["scores"]
+
+
+def test_silent_uploads_are_gated():
+    results = analyze_audio_bytes(encode(generate_silence(2, RATE), "ogg", "libopus"))
+    assert results["insufficient_speech"]
+
+
+def test_rejects_undecodable_and_overlong_uploads(monkeypatch):
+    with pytest.raises(UnsupportedAudio):
+        decode_compressed(b"OggS" + bytes(500))
+    with pytest.raises(DecodedTooLarge, match="more than the 192000-byte limit"):
+        decode_compressed(encode(generate_speech_like(2, RATE), "webm", "libopus"), max_bytes=RATE * 4)
+
+    monkeypatch.setattr(compressed, "av", None)
+    with pytest.raises(UnsupportedAudio, match="pip install av"):
+        check_decodable(b"\x1a\x45\xdf\xa3" + bytes(20))
+    check_decodable(to_wav_bytes(np.zeros(100), RATE))
+
+
+def test_decoded_too_large_survives_pickling():
+    # Raised in a worker process and re-raised in the service
+    error = pickle.loads(pickle.dumps(DecodedTooLarge(1000)))
+    assert isinstance(error, DecodedTooLarge) and error.max_bytes == 1000
+    assert str(error) == str(DecodedTooLarge(1000))
+
+
+def test_flush_only_output_sets_the_format(monkeypatch):
+    resampler_type = av.AudioResampler
+
+    class FlushOnlyResampler:
+        """Holds every frame back until the flush, as some resamplers do"""
+
+        def __init__(self, **kwargs):
+            self.resampler = resampler_type(**kwargs)
+            self.held = []
+
+        def resample(self, frame):
+            if frame is not None:
+                self.held += self.resampler.resample(frame)
+                return []
+            return self.held + self.resampler.resample(None)
+
+    monkeypatch.setattr(av, "AudioResampler", FlushOnlyResampler)
+    pcm, info = decode_compressed(encode(generate_speech_like(1, RATE), "ogg", "libopus"))
+    assert (info.sample_rate, info.channels) == (RATE, 1)
+    assert len(pcm) == pytest.approx(RATE * 4, rel=0.05)
+
+
+def test_endpoints_reject_undecodable_and_overlong_uploads(client, monkeypatch):
+    content = encode(generate_speech_like(2, RATE), "webm", "libopus")
+    response = client.post("/analyze", files={"file": ("chunk.webm", b"OggS" + bytes(500), "audio/ogg")})
+    assert response.status_code == 415
+
+    # Run the worker job in this process, so it sees the lower limit
+    async def run_inline(func, *args, timeout=None):
+        return await asyncio.to_thread(func, *args)
+
+    monkeypatch.setattr("analyze.run_in_pool", run_inline)
+    monkeypatch.setattr("analyze.decode_compressed", partial(decode_compressed, max_bytes=RATE * 4))
+    response = client.post("/analyze", files={"file": ("chunk.webm", content, "audio/webm")})
+    assert response.status_code == 413
+    assert "byte limit" in response.json()["detail"]
@@ -0,0 +1,63 @@
+"""
+Tests for contour decimation and encoding
+"""
+
+import base64
+
+import numpy as np
+import parselmouth
+import pytest
+
+from analyze import analyze_sound
+from contours import decimate, pack_contours
+from features import AnalysisOptions
+
+
+def decode(packed, key):
+    dtype = {"float16": "<f2", "float32": "<f4"}[packed["dtype"]] if key == "values" else "<f4"
+    return np.frombuffer(base64.b64decode(packed[key]), dtype=dtype)
+
+
+def test_decimation_keeps_peaks_and_gaps():
+    times = np.arange(10000) * 0.01
+    values = np.sin(times)
+    values[1234] = 50.0  # One-frame spike that striding would miss
+    values[5000:6000] = np.nan  # Unvoiced stretch
+
+    kept_times, kept = decimate(times, values, 200)
+
+    assert len(kept) <= 200
+    assert np.all(np.diff(kept_times) > 0)
+    assert 50.0 in kept
+    assert np.nanmin(kept) == pytest.approx(np.nanmin(values))
+    gap = (kept_times >= 50.2) & (kept_times < 59.8)
+    assert gap.any() and np.isnan(kept[gap]).all()
+
+
+def test_short_contours_are_kept_whole():
+    times, values = np.arange(5.0), np.arange(5.0)
+    assert decimate(times, values, 10)[1] is values
+
+
+def test_packed_contours_round_trip():
+    times = np.arange(3000) * 0.01
+    values = 150 + 20 * np.sin(times)
+    packed = pack_contours({"pitch": (times, values)}, 1000, "float16")["pitch"]
+
+    assert packed["count"] == 1000
+    assert np.allclose(decode(packed, "values"), decimate(times, values, 1000)[1], atol=0.1)
+    assert np.allclose(decode(packed, "times"), decimate(times, values, 1000)[0], atol=1e-5)
+
+
+def test_analysis_returns_requested_contours():
+    t = np.arange(32000) / 16000
+    sound = parselmouth.Sound(0.5 * np.sin(2 * np.pi * 150 * t), sampling_frequency=16000)
+    results = analyze_sound(sound, AnalysisOptions(features=["pitch"], contour_points=50))
+
+    assert set(results["contours"]) == {"pitch"}
+    pitch = decode(results["contours"]["pitch"], "values")
+    assert len(pitch) <= 50
+    assert np.nanmean(pitch) == pytest.approx(150, abs=1)
+
+    with pytest.raises(ValueError):
+        AnalysisOptions(contour_points=1)
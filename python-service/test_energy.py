@@ -0,0 +1,136 @@
+"""
+Parity tests for the NumPy intensity/VAD backend against Praat, and
+tests for the speech gate
+"""
+
+import numpy as np
+import parselmouth
+import pytest
+
+import energy
+from analyze import analyze_audio_bytes, analyze_sound, gated_speech_seconds
+from energy import apply_hangover, frame_levels, gathered_window_sums, intensity_frames, polyphase_window_sums
+from features import AnalysisOptions
+from synthetic import generate_speech_like
+from wav_io import pcm_wav_info
+
+
+def to_pcm(audio):
+    return np.round(audio * 32767).astype('<i2').tobytes()
+
+
+# 22050 Hz puts frames a fractional number of samples apart (the gathered path)
+@pytest.mark.parametrize("sample_rate,time_step", [(16000, 0.01), (48000, 0.01), (16000, 0.02), (22050, 0.01)])
+def test_intensity_matches_praat(sample_rate, time_step):
+    audio = generate_speech_like(3, sample_rate)
+    reference = parselmouth.Sound(audio, sampling_frequency=sample_rate).to_intensity(time_step=time_step)
+
+    times, intensity_db = intensity_frames(audio, sample_rate, time_step)
+
+    np.testing.assert_allclose(times, reference.xs(), atol=1e-9)
+    np.testing.assert_allclose(intensity_db, reference.values[0], atol=1e-3)
+
+
+@pytest.mark.parametrize("first", [-700, -480, 0, 130])
+def test_polyphase_sums_match_frame_by_frame_sums(first):
+    channel = np.random.default_rng(0).standard_normal(4000)
+    window = np.hanning(1001)
+    starts = first + 480 * np.arange(9)  # The last frames run past the end
+
+    polyphase = polyphase_window_sums(channel, first, 480, len(starts), window)
+    for got, expected in zip(polyphase, gathered_window_sums(channel, starts, window)):
+        np.testing.assert_allclose(got, expected, atol=1e-9)
+
+
+def test_stereo_intensity_matches_praat():
+    audio = np.stack([generate_speech_like(3, 16000, seed=1), generate_speech_like(3, 16000, seed=2)])
+    reference = parselmouth.Sound(audio, sampling_frequency=16000).to_intensity(time_step=0.01)
+
+    _, intensity_db = intensity_frames(audio, 16000, 0.01)
+
+    np.testing.assert_allclose(intensity_db, reference.values[0], atol=1e-3)
+
+
+def test_backends_agree_on_results():
+    sound = parselmouth.Sound(generate_speech_like(3, 16000), sampling_frequency=16000)
+    praat = analyze_sound(sound, AnalysisOptions(features=["intensity", "timing"]))
+    numpy = analyze_sound(sound, AnalysisOptions(features=["intensity", "timing"], intensity_backend="numpy"))
+
+    assert numpy["intensity"] == praat["intensity"]
+    # The NumPy VAD's hangover can only add speech time
+    assert numpy["timing"]["speaking_time"] >= praat["timing"]["speaking_time"]
+    assert abs(numpy["timing"]["speaking_time"] - praat["timing"]["speaking_time"]) < 0.2
+
+
+def test_hangover_bridges_short_gaps():
+    speech = np.array([1, 0, 0, 1, 0, 0, 0, 0, 1], dtype=bool)
+    smoothed = apply_hangover(speech, 2)
+
+    assert smoothed.tolist() == [True, True, True, True, True, True, False, False, True]
+
+
+def test_speech_gate_skips_silent_chunks():
+    sample_rate = 16000
+    rng = np.random.default_rng(1)
+    silence = 0.0005 * rng.standard_normal(2 * sample_rate)
+    speech = np.concatenate([silence, generate_speech_like(3, sample_rate)])
+
+    pcm_silence = to_pcm(silence)
+    results = analyze_audio_bytes(pcm_silence, pcm_info=pcm_wav_info("int16", sample_rate, 1, len(pcm_silence)))
+    assert results["insufficient_speech"] is True
+    assert results["duration"] == 2.0
+    assert results["timing"]["silence_time"] == 2.0
+    assert results["scores"]["overall"] == 0
+
+    pcm_speech = to_pcm(speech)
+    info = pcm_wav_info("int16", sample_rate, 1, len(pcm_speech))
+    assert 1.0 < gated_speech_seconds(pcm_speech, info) < 3.0
+    assert "insufficient_speech" not in analyze_audio_bytes(pcm_speech, pcm_info=info)
+
+
+def test_frame_levels_match_praat_scale():
+    # A full-scale sine is 91 dB in Praat's intensity
+    tone = np.sin(2 * np.pi * 200 * np.arange(16000) / 16000)
+    levels = frame_levels([tone[None, :]], 160)
+    assert len(levels) == 100
+    np.testing.assert_allclose(levels, 10 * np.log10(0.5 / 4e-10), atol=0.1)
+
+
+@pytest.mark.parametrize("gain, noise, speech", [
+    (1, 0, True),
+    (0.02, 0, True),          # Quiet microphone: speech peaking around 44 dB
+    (1, 0.03, True),          # Noisy room, 14 dB SNR
+    (0, 0.001, False),        # Background noise only...
+    (0, 0.01, False),         # ...however loud (54 dB)
+])
+def test_speech_gate_is_relative_to_the_recording(gain, noise, speech):
+    sample_rate = 16000
+    rng = np.random.default_rng(2)
+    audio = gain * generate_speech_like(3, sample_rate) + noise * rng.standard_normal(3 * sample_rate)
+    seconds = energy.gated_speech_seconds(frame_levels([audio[None, :]], sample_rate // 100))
+    assert (seconds >= energy.SPEECH_GATE_MIN_SECONDS) == speech
+
+
+def brown_noise(n, rng):
+    walk = np.cumsum(rng.standard_normal(n))
+    return walk - np.convolve(walk, np.ones(801) / 801, mode='same')  # Without the drift
+
+
+@pytest.mark.parametrize("make, speech", [
+    (lambda t, rng: generate_speech_like(3, 16000, pauses=False), True),              # Fluent speech
+    (lambda t, rng: generate_speech_like(3, 16000, syllables=False, pauses=False), True),  # One held vowel
+    (lambda t, rng: 0.3 * sum(np.sin(2 * np.pi * 50 * k * t) / k for k in range(1, 8)), False),  # Mains hum
+    (lambda t, rng: 0.01 * brown_noise(len(t), rng), False),
+    (lambda t, rng: 0.05 * rng.standard_normal(len(t)), False),
+])
+def test_speech_gate_without_pauses(make, speech):
+    sample_rate = 16000
+    t = np.arange(3 * sample_rate) / sample_rate
+    # About -10 dBFS, where a pause-free chunk used to be gated entirely
+    audio = make(t, np.random.default_rng(4))
+    audio *= 0.3 / np.max(np.abs(audio))
+
+    pcm = to_pcm(audio)
+    seconds = gated_speech_seconds(pcm, pcm_wav_info("int16", sample_rate, 1, len(pcm)))
+    assert (seconds >= 2.0) == speech  # Most of the chunk, or next to none
+    assert (seconds >= energy.SPEECH_GATE_MIN_SECONDS) == speech
@@ -0,0 +1,77 @@
+"""
+Tests for the lazy feature graph
+"""
+
+import numpy as np
+import parselmouth
+import pytest
+
+from analyze import analyze_sound
+from features import AnalysisOptions, FeatureGraph, resolve_features
+from synthetic import generate_speech_like
+
+
+def voiced_sound():
+    return parselmouth.Sound(generate_speech_like(1, 16000), sampling_frequency=16000)
+
+
+def test_resolve_features_adds_dependencies():
+    assert resolve_features(["timing"]) == {"timing"}
+    assert resolve_features(["scores"]) == {"pitch", "intensity", "voice_quality", "timing", "scores"}
+    with pytest.raises(ValueError):
+        resolve_features(["loudness"])
+
+
+def test_only_requested_objects_are_computed():
+    graph = FeatureGraph(voiced_sound(), AnalysisOptions(features=["timing"]))
+    graph.summary()
+
+    assert "intensity" in graph.__dict__
+    assert "pitch" not in graph.__dict__
+    assert "harmonicity" not in graph.__dict__
+    assert "point_process" not in graph.__dict__
+
+
+def test_pitch_is_shared_with_point_process():
+    graph = FeatureGraph(voiced_sound())
+    pitch = graph.pitch
+    graph.jitter_shimmer
+
+    assert graph.pitch is pitch
+    assert "point_process" in graph.__dict__
+
+
+def test_partial_results_contain_requested_groups():
+    results = analyze_sound(voiced_sound(), AnalysisOptions(features=["pitch", "timing"]))
+
+    assert set(results) == {"duration", "pitch", "timing"}
+    assert results["pitch"] == analyze_sound(voiced_sound())["pitch"]
+    assert 120 < results["pitch"]["mean"] < 170  # The synthetic F0 glides around 140 Hz
+
+
+def test_syllable_count_follows_syllable_rate():
+    sample_rate = 16000
+    t = np.arange(4 * sample_rate) / sample_rate
+    phase = 2 * np.pi * np.cumsum(130 + 20 * np.sin(2 * np.pi * 0.5 * t)) / sample_rate
+    source = sum(np.sin(k * phase) / k for k in range(1, 15))
+
+    for rate in (3, 5):
+        envelope = (0.5 * (1 - np.cos(2 * np.pi * rate * t))) ** 2
+        sound = parselmouth.Sound(0.3 * source * envelope, sampling_frequency=sample_rate)
+        # Voicing from the pitch track, and from zero crossings when only timing is requested
+        for features in (["timing", "pitch"], ["timing"]):
+            graph = FeatureGraph(sound, AnalysisOptions(features=features))
+
+            assert abs(graph.syllable_count - 4 * rate) <= 1
+
+
+def test_noise_bursts_are_not_syllables():
+    sample_rate = 16000
+    t = np.arange(2 * sample_rate) / sample_rate
+    envelope = (0.5 * (1 - np.cos(2 * np.pi * 4 * t))) ** 2
+    noise = np.random.default_rng(0).standard_normal(len(t))
+    graph = FeatureGraph(parselmouth.Sound(0.1 * noise * envelope, sampling_frequency=sample_rate),
+                         AnalysisOptions(features=["timing"]))
+
+    assert graph.syllable_count == 0
+    assert "pitch" not in graph.__dict__
@@ -0,0 +1,178 @@
+"""
+Tests for the persistent job store and the /jobs endpoints
+"""
+
+import asyncio
+import os
+import time
+
+from jobs import DONE, FAILED, QUEUED, RUNNING, JobStore
+from synthetic import generate_speech_like, to_wav_bytes
+
+
+def make_store(tmp_path, **kwargs):
+    return JobStore(str(tmp_path / "jobs.db"), **kwargs)
+
+
+def test_identical_submissions_share_a_job(tmp_path):
+    store = make_store(tmp_path)
+
+    async def scenario():
+        job, created = await store.create("key-a", "a.wav")
+        again, created_again = await store.create("key-a", "copy.wav")
+        other, created_other = await store.create("key-b", "b.wav")
+
+        assert created and not created_again and created_other
+        assert again["job_id"] == job["job_id"]
+        assert other["job_id"] != job["job_id"]
+        assert job["status"] == QUEUED
+
+    asyncio.run(scenario())
+
+
+def test_failed_jobs_are_retried(tmp_path):
+    store = make_store(tmp_path)
+
+    async def scenario():
+        job, _ = await store.create("key", "a.wav")
+        await store.fail(job["job_id"], 504, "Analysis timed out")
+
+        failed = await store.get(job["job_id"])
+        assert failed["status"] == FAILED
+        assert failed["error_status"] == 504
+
+        retry, created = await store.create("key", "a.wav")
+        assert created and retry["job_id"] != job["job_id"]
+
+    asyncio.run(scenario())
+
+
+def test_results_survive_reopening(tmp_path):
+    store = make_store(tmp_path)
+
+    async def scenario():
+        job, _ = await store.create("key", "a.wav")
+        await store.start(job["job_id"])
+        await store.finish(job["job_id"], {"duration": 2.5, "fluency_score": 80})
+
+        reopened = make_store(tmp_path)
+        assert (await reopened.get(job["job_id"]))["results"] == {"duration": 2.5, "fluency_score": 80}
+        assert (await reopened.create("key", "a.wav"))[1] is False
+
+    asyncio.run(scenario())
+
+
+def test_retention_prunes_finished_jobs_only(tmp_path):
+    store = make_store(tmp_path, retention=0)
+
+    async def scenario():
+        done, _ = await store.create("done", None)
+        pending, _ = await store.create("pending", None)
+        await store.finish(done["job_id"], {})
+        time.sleep(0.01)
+
+        assert await store.prune() == 1
+        assert await store.get(done["job_id"]) is None
+        assert await store.get(pending["job_id"]) is not None
+
+    asyncio.run(scenario())
+
+
+def test_jobs_of_other_instances_fail_on_startup(tmp_path):
+    store = make_store(tmp_path)
+    # An earlier run, and one stamped with a pid that is alive again (ours)
+    earlier, _ = asyncio.run(store.create("earlier", None))
+    reused_pid, _ = asyncio.run(store.create("reused-pid", None))
+    own, _ = asyncio.run(store.create("own", None))
+    store._db.execute("UPDATE jobs SET owner = ? WHERE id = ?", ("0" * 32, earlier["job_id"]))
+    store._db.execute("UPDATE jobs SET owner = ? WHERE id = ?", (os.getpid(), reused_pid["job_id"]))
+
+    reopened = make_store(tmp_path)
+    for job in (earlier, reused_pid):
+        recovered = asyncio.run(reopened.get(job["job_id"]))
+        assert recovered["status"] == FAILED
+        assert recovered["error_status"] == 503
+    assert asyncio.run(reopened.get(own["job_id"]))["status"] == QUEUED
+
+
+def test_live_siblings_keep_their_jobs(tmp_path):
+    store = make_store(tmp_path, lease=30)
+    sibling, _ = asyncio.run(store.create("sibling", None))
+    store._db.execute("UPDATE jobs SET owner = ? WHERE id = ?", ("sibling", sibling["job_id"]))
+    store._db.execute("INSERT INTO instances (id, heartbeat) VALUES (?, ?)", ("sibling", time.time()))
+
+    # Another process starting up leaves a sibling with a fresh heartbeat alone...
+    reopened = make_store(tmp_path, lease=30)
+    assert asyncio.run(reopened.get(sibling["job_id"]))["status"] == QUEUED
+
+    # ...until the sibling stops heartbeating
+    store._db.execute("UPDATE instances SET heartbeat = ? WHERE id = ?", (time.time() - 60, "sibling"))
+    asyncio.run(reopened.beat())
+    recovered = asyncio.run(reopened.get(sibling["job_id"]))
+    assert recovered["status"] == FAILED and recovered["error_status"] == 503
+
+
+def test_waiting_leaves_no_events_behind(tmp_path):
+    store = make_store(tmp_path)
+    job, _ = asyncio.run(store.create("key", None))
+
+    async def scenario():
+        assert await store.wait("no-such-job", 0.1) is None
+        assert (await store.wait(job["job_id"], 0.1))["status"] == QUEUED
+        waiter = asyncio.create_task(store.wait(job["job_id"], 5))
+        await asyncio.sleep(0.05)
+        await store.finish(job["job_id"], {})
+        assert (await waiter)["status"] == DONE
+
+    asyncio.run(scenario())
+    assert store._events == {} and store._waiters == {}
+
+
+def test_wait_returns_when_the_job_finishes(tmp_path):
+    store = make_store(tmp_path)
+    job, _ = asyncio.run(store.create("key", None))
+    job_id = job["job_id"]
+
+    async def scenario():
+        async def work():
+            await asyncio.sleep(0.05)
+            await store.start(job_id)
+            await asyncio.sleep(0.05)
+            await store.finish(job_id, {"duration": 1.0})
+
+        task = asyncio.create_task(work())
+        started = time.monotonic()
+        running = await store.wait(job_id, 5, since=QUEUED)
+        finished = await store.wait(job_id, 5)
+        await task
+        return running, finished, time.monotonic() - started
+
+    running, finished, elapsed = asyncio.run(scenario())
+    assert running["status"] == RUNNING
+    assert finished["status"] == DONE
+    assert elapsed < 1
+
+
+def test_jobs_endpoints(client):
+    speech = to_wav_bytes(generate_speech_like(1, 16000), 16000)
+    upload = {"file": ("session.wav", speech, "audio/wav")}
+
+    response = client.post("/jobs", params={"features": "timing"}, files=upload)
+    assert response.status_code == 202
+    job = response.json()
+    assert response.headers["location"] == f"/jobs/{job['job_id']}"
+    assert not job["deduplicated"]
+
+    finished = client.get(f"/jobs/{job['job_id']}", params={"wait": 30}).json()
+    assert finished["status"] == DONE and finished["filename"] == "session.wav"
+    assert set(finished["results"]) >= {"duration", "timing"}
+
+    again = client.post("/jobs", params={"features": "timing"}, files=upload).json()
+    assert again["job_id"] == job["job_id"] and again["deduplicated"]
+
+    events = client.get(f"/jobs/{job['job_id']}/events")
+    assert events.headers["content-type"].startswith("text/event-stream")
+    assert events.text.startswith("event: status\ndata: ") and '"status": "done"' in events.text
+
+    assert client.get("/jobs/unknown").status_code == 404
+    assert client.post("/jobs", files={"file": ("notes.txt", b"hi", "text/plain")}).status_code == 400
@@ -0,0 +1,55 @@
+"""
+Tests for the load test's bookkeeping
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from loadtest import Sample, capacity, process_tree_usage, summarize, to_pcm16, unique
+from synthetic import to_wav_bytes
+
+
+def test_summary_counts_only_successes_in_latency_and_throughput():
+    samples = [Sample("chunk", "ok", seconds, 10.0, ended=30.0) for seconds in np.linspace(0.1, 1.0, 10)]
+    samples += [Sample("chunk", "429", 0.01, 10.0, ended=40.0), Sample("chunk", "ok", 0.5, 20.0, 70.0, late=True)]
+    samples += [Sample("report", "ok", 30.0, 60.0, ended=110.0)]
+
+    summary = summarize(samples, "chunk", started=10.0)
+
+    assert summary["requests"] == 12
+    assert summary["ok"] == 11
+    assert summary["errors"] == {"429": 1}
+    assert summary["error_rate"] == pytest.approx(1 / 12, abs=1e-4)
+    assert summary["throughput_rps"] == pytest.approx(11 / 60, abs=1e-3)
+    assert summary["audio_seconds_per_second"] == pytest.approx(120 / 60)
+    assert summary["p50_ms"] == 500.0
+    assert summary["late"] == 1
+    report = summarize(samples, "report", started=10.0)
+    assert report["p95_ms"] == 30000.0
+    assert report["throughput_rps"] == pytest.approx(1 / 100)
+
+
+def test_capacity_is_the_largest_level_within_slo_and_error_rate():
+    def level(sessions, p95_ms, error_rate):
+        return {"sessions": sessions, "chunk": {"p95_ms": p95_ms, "error_rate": error_rate}}
+
+    levels = [level(1, 400, 0.0), level(2, 800, 0.0), level(4, 900, 0.05), level(8, 3000, 0.0)]
+    assert capacity(levels, slo_ms=1000, max_error_rate=0.01) == 2
+    assert capacity([level(1, None, 1.0)], slo_ms=1000, max_error_rate=0.01) == 0
+
+
+def test_payloads_never_repeat():
+    audio = np.zeros(100, dtype=np.float32)
+    first, second = unique(audio), unique(audio)
+    assert to_pcm16(first) != to_pcm16(second)
+    assert to_wav_bytes(first, 48000) != to_wav_bytes(second, 48000)
+    assert not audio.any()
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+def test_process_usage_reads_this_process():
+    cpu, rss = process_tree_usage(os.getpid())
+    assert cpu > 0
+    assert rss > 10 * 1024 * 1024
@@ -0,0 +1,49 @@
+"""
+Tests for chunked analysis of long recordings
+"""
+
+import numpy as np
+import parselmouth
+
+from features import FeatureGraph
+from long_audio import analyze_chunk, chunk_bytes, merge_chunks, plan_chunks
+from synthetic import generate_speech_like, to_wav_bytes
+from wav_io import parse_wav_header
+
+
+def test_plan_covers_every_sample_once():
+    plan = plan_chunks(104_000, 1000, chunk_seconds=10, context_seconds=0.5)
+
+    assert [(start, end) for _, _, start, end in plan] == [
+        (0, 10_000), (10_000, 20_000), (20_000, 30_000), (30_000, 40_000), (40_000, 50_000),
+        (50_000, 60_000), (60_000, 70_000), (70_000, 80_000), (80_000, 90_000), (90_000, 104_000),
+    ]
+    assert plan[0][:2] == (0, 10_500)
+    assert plan[1][:2] == (9_500, 20_500)
+    assert plan[-1][:2] == (89_500, 104_000)
+
+
+def test_chunked_matches_single_pass():
+    sample_rate = 16000
+    content = to_wav_bytes(generate_speech_like(12.0, sample_rate, seed=3), sample_rate)
+    info = parse_wav_header(content)
+
+    plan = plan_chunks(info.data_size // 2, sample_rate, chunk_seconds=3)
+    chunks = [
+        analyze_chunk(chunk_bytes(content, info, first, last), info, first, start, end)
+        for first, last, start, end in plan
+    ]
+    summary, timeline = merge_chunks(chunks, [(start / sample_rate, end / sample_rate) for _, _, start, end in plan])
+
+    samples = np.frombuffer(content, dtype='<i2', offset=info.data_offset) / 32768
+    expected = FeatureGraph(parselmouth.Sound(samples, sampling_frequency=sample_rate)).summary()
+
+    assert len(timeline) == 4
+    assert np.isclose(summary["duration"], expected["duration"])
+    assert abs(summary["mean_pitch"] - expected["mean_pitch"]) < 0.5
+    assert summary["min_pitch"] == expected["min_pitch"] and summary["max_pitch"] == expected["max_pitch"]
+    assert abs(summary["mean_intensity"] - expected["mean_intensity"]) < 0.1
+    assert abs(summary["mean_hnr"] - expected["mean_hnr"]) < 1
+    assert abs(summary["speaking_time"] - expected["speaking_time"]) < 0.1
+    assert abs(summary["syllable_count"] - expected["syllable_count"]) <= 1
+    assert sum(entry["summary"]["syllable_count"] for entry in timeline) == summary["syllable_count"]
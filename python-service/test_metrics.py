@@ -0,0 +1,79 @@
+"""
+Tests for stage timing, error tagging and /metrics
+"""
+
+import pickle
+import time
+
+import numpy as np
+import parselmouth
+import pytest
+
+from analyze import analyze_sound
+from features import AnalysisError, AnalysisOptions
+from metrics import StageTimer, server_timing_header
+from synthetic import generate_speech_like, to_wav_bytes
+
+
+def test_nested_stages_are_exclusive():
+    timer = StageTimer()
+    with timer.stage("outer"):
+        time.sleep(0.02)
+        with timer.stage("inner"):
+            time.sleep(0.03)
+
+    assert timer.stages["inner"] >= 0.03
+    assert 0.02 <= timer.stages["outer"] < 0.03
+    assert timer.total == pytest.approx(timer.stages["outer"] + timer.stages["inner"])
+
+
+def test_failed_stage_is_the_innermost():
+    timer = StageTimer()
+    with pytest.raises(RuntimeError):
+        with timer.stage("outer"):
+            with timer.stage("inner"):
+                raise RuntimeError("boom")
+    assert timer.failed_stage == "inner"
+
+
+def test_analysis_records_stages():
+    t = np.arange(16000) / 16000
+    sound = parselmouth.Sound(0.5 * np.sin(2 * np.pi * 150 * t), sampling_frequency=16000)
+    timer = StageTimer()
+    analyze_sound(sound, AnalysisOptions(features=["pitch", "timing"]), timer)
+
+    assert {"pitch", "intensity", "syllables", "scoring"} <= set(timer.stages)
+    assert "harmonicity" not in timer.stages
+
+
+def test_analysis_error_keeps_stage_across_processes():
+    silent = parselmouth.Sound(np.zeros(16000), sampling_frequency=16000)
+    with pytest.raises(AnalysisError) as excinfo:
+        analyze_sound(silent, AnalysisOptions(features=["pitch"]))
+    assert excinfo.value.stage == "pitch"
+
+    restored = pickle.loads(pickle.dumps(excinfo.value))
+    assert restored.stage == "pitch"
+    assert str(restored) == str(excinfo.value)
+
+
+def test_server_timing_header():
+    assert server_timing_header({"pitch": 0.0123, "total": 0.05}) == "pitch;dur=12.3, total;dur=50.0"
+
+
+def test_analyze_reports_timings_and_metrics(client):
+    speech = to_wav_bytes(generate_speech_like(2, 16000, seed=2), 16000)
+    response = client.post("/analyze", params={"features": "pitch,timing"},
+                           files={"file": ("chunk.wav", speech, "audio/wav")})
+    assert response.status_code == 200
+    timings = dict(entry.split(";dur=") for entry in response.headers["server-timing"].split(", "))
+    assert {"read", "cache", "queue", "pool", "pitch", "total"} <= set(timings)
+    assert int(response.headers["x-peak-memory"]) > 0
+
+    metrics = client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain")
+    for sample in ('analysis_request_seconds_count{endpoint="analyze"}',
+                   'analysis_stage_seconds_count{stage="pitch"}',
+                   'analysis_audio_seconds_total{endpoint="analyze"}',
+                   'analysis_peak_memory_bytes_count{endpoint="analyze"}'):
+        assert sample in metrics.text
@@ -0,0 +1,65 @@
+"""
+Agreement tests for the NumPy pitch backend against Praat
+"""
+
+import numpy as np
+import parselmouth
+import pytest
+
+from analyze import analyze_sound
+from features import AnalysisOptions
+from pitch import autocorrelation_frames, numpy_pitch
+from streaming import analyze_window
+from synthetic import generate_silence, generate_speech_like
+
+
+@pytest.mark.parametrize("sample_rate,time_step,seed", [(16000, 0.01, 0), (48000, 0.01, 1), (16000, 0.02, 2)])
+def test_pitch_matches_praat(sample_rate, time_step, seed):
+    sound = parselmouth.Sound(generate_speech_like(5, sample_rate, seed=seed), sampling_frequency=sample_rate)
+    reference = sound.to_pitch(time_step=time_step)
+    expected = reference.selected_array['frequency']
+
+    pitch = numpy_pitch(sound, time_step)
+    frequency = pitch.selected_array['frequency']
+
+    np.testing.assert_allclose(pitch.xs(), reference.xs(), atol=1e-9)
+    assert np.mean((frequency > 0) == (expected > 0)) > 0.97
+    both = (frequency > 0) & (expected > 0)
+    cents = 1200 * np.abs(np.log2(frequency[both] / expected[both]))
+    assert np.percentile(cents, 95) < 5
+
+
+def test_tone_and_silence():
+    t = np.arange(16000) / 16000
+    _, frequency = autocorrelation_frames(0.3 * np.sin(2 * np.pi * 220 * t), 16000)
+    assert np.all(frequency > 0)
+    assert np.median(frequency) == pytest.approx(220, abs=0.5)
+
+    _, frequency = autocorrelation_frames(generate_silence(1, 16000), 16000)
+    assert np.all(frequency == 0)
+    _, frequency = autocorrelation_frames(np.zeros(16000), 16000)
+    assert np.all(frequency == 0)
+
+
+def test_backends_agree_on_results():
+    sound = parselmouth.Sound(generate_speech_like(4, 16000, seed=3), sampling_frequency=16000)
+    praat = analyze_sound(sound, AnalysisOptions())
+    numpy = analyze_sound(sound, AnalysisOptions(pitch_backend="numpy"))
+
+    assert numpy["pitch"]["mean"] == pytest.approx(praat["pitch"]["mean"], abs=1)
+    assert numpy["pitch"]["std"] == pytest.approx(praat["pitch"]["std"], abs=1)
+    # Jitter and shimmer come from the same PointProcess step on either Pitch
+    assert numpy["voice_quality"]["jitter"] == pytest.approx(praat["voice_quality"]["jitter"], rel=0.1)
+    assert numpy["timing"]["syllable_count"] == pytest.approx(praat["timing"]["syllable_count"], abs=1)
+
+    with pytest.raises(ValueError):
+        AnalysisOptions(pitch_backend="yin")
+
+
+def test_stream_windows_use_the_selected_backend():
+    samples = generate_speech_like(1, 16000, seed=4)
+    praat = analyze_window(samples, 16000, 0.05, 0.55)
+    numpy = analyze_window(samples, 16000, 0.05, 0.55, pitch_backend="numpy")
+
+    assert numpy["pitch"].count == pytest.approx(praat["pitch"].count, abs=3)
+    assert numpy["pitch"].mean == pytest.approx(praat["pitch"].mean, abs=1)
@@ -0,0 +1,74 @@
+"""
+Tests for offline feature extraction and re-scoring
+"""
+
+import os
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from analyze import analyze_audio_file
+from rescore import extract, load_table, score
+from synthetic import generate_speech_like, to_wav_bytes
+
+
+@pytest.fixture
+def recordings(tmp_path):
+    directory = tmp_path / "recordings"
+    (directory / "day-2").mkdir(parents=True)
+    for i, name in enumerate(["a.wav", "day-2/b.wav", "day-2/c.wav"]):
+        (directory / name).write_bytes(to_wav_bytes(generate_speech_like(2 + i, 16000, seed=i), 16000))
+    (directory / "notes.txt").write_text("not a recording")
+    return directory
+
+
+def test_extract_then_score_matches_the_service(recordings, tmp_path):
+    table_path = str(tmp_path / "features.npz")
+    table = extract(str(recordings), table_path, workers=1, profile="full")
+
+    assert [os.path.relpath(path, recordings) for path in table["path"]] == ["a.wav", "day-2/b.wav", "day-2/c.wav"]
+    scores = score(table_path, None, None, str(tmp_path / "scores.csv"))
+    for i, path in enumerate(table["path"]):
+        expected = analyze_audio_file(str(path))["scores"]
+        assert {name: round(float(scores[name][i]), 2) for name in expected} == expected
+    assert (tmp_path / "scores.csv").read_text().count("\n") == 4
+
+
+def test_extract_only_analyzes_new_and_changed_files(recordings, tmp_path, monkeypatch):
+    table_path = str(tmp_path / "features.npz")
+    extract(str(recordings), table_path, workers=1, profile="full")
+    before = load_table(table_path)
+
+    (recordings / "d.wav").write_bytes(to_wav_bytes(generate_speech_like(2, 16000, seed=9), 16000))
+    (recordings / "day-2" / "c.wav").unlink()
+    analyzed = []
+    monkeypatch.setattr("rescore.ProcessPoolExecutor", RecordingPool.factory(analyzed))
+    table = extract(str(recordings), table_path, workers=1, profile="full")
+
+    assert analyzed == [str(recordings / "d.wav")]
+    assert [os.path.relpath(path, recordings) for path in table["path"]] == ["a.wav", "d.wav", "day-2/b.wav"]
+    np.testing.assert_array_equal(table["duration"][[0, 2]], before["duration"][:2])
+
+
+class RecordingPool:
+    """Runs jobs inline and records the paths analyzed"""
+
+    def __init__(self, analyzed):
+        self.analyzed = analyzed
+
+    @classmethod
+    def factory(cls, analyzed):
+        return lambda *args, **kwargs: cls(analyzed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, func, path, *args):
+        self.analyzed.append(path)
+        future = Future()
+        future.set_result(func(path, *args))
+        return future
@@ -0,0 +1,67 @@
+"""
+Tests for the content-addressed result cache
+"""
+
+import io
+import time
+import wave
+
+import numpy as np
+
+from result_cache import ResultCache, cache_key
+
+
+def wav_bytes(samples, sample_rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'w') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+def test_key_depends_on_audio_and_params():
+    samples = np.arange(1000)
+    content = wav_bytes(samples)
+
+    assert cache_key(content) == cache_key(wav_bytes(samples))
+    assert cache_key(content) != cache_key(wav_bytes(samples + 1))
+    assert cache_key(content) != cache_key(wav_bytes(samples, sample_rate=48000))
+    assert cache_key(content, {"profile": "fast"}) != cache_key(content, {"profile": "full"})
+
+
+def test_lru_eviction_by_bytes():
+    result = {"duration": 1.0, "padding": "x" * 100}
+    cache = ResultCache(max_bytes=300, ttl=60, disk_dir=None)
+
+    cache.put("a", result)
+    cache.put("b", result)
+    assert cache.get("a") == result  # "a" is now most recently used
+    cache.put("c", result)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == result
+    assert cache.get("c") == result
+    assert cache.evictions == 1
+    assert cache.current_bytes <= 300
+
+
+def test_ttl_expiry():
+    cache = ResultCache(max_bytes=1000, ttl=0.01, disk_dir=None)
+    cache.put("a", {"duration": 1.0})
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+
+def test_disk_spill(tmp_path):
+    result = {"duration": 1.0, "padding": "x" * 100}
+    cache = ResultCache(max_bytes=200, ttl=60, disk_dir=str(tmp_path))
+
+    cache.put("a", result)
+    cache.put("b", result)  # Evicts "a" to disk
+
+    assert cache.get("a") == result
+    assert cache.disk_hits == 1
@@ -0,0 +1,67 @@
+"""
+Tests for threshold tables and vectorized scoring
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+import scoring
+from analyze import build_results
+from features import AnalysisOptions
+
+
+def random_features(n, seed=0):
+    rng = np.random.default_rng(seed)
+    duration = rng.uniform(1, 60, n)
+    features = {
+        "duration": duration,
+        "mean_pitch": np.where(rng.random(n) < 0.05, 0.0, rng.uniform(80, 300, n)),
+        "std_pitch": rng.uniform(0, 80, n),
+        "min_pitch": rng.uniform(75, 100, n),
+        "max_pitch": rng.uniform(300, 600, n),
+        "mean_intensity": rng.uniform(35, 75, n),
+        "std_intensity": rng.uniform(0, 15, n),
+        "max_intensity": rng.uniform(60, 90, n),
+        "mean_hnr": np.where(rng.random(n) < 0.1, np.nan, rng.uniform(0, 25, n)),
+        "jitter": np.where(rng.random(n) < 0.1, np.nan, rng.uniform(0, 0.03, n)),
+        "shimmer": rng.uniform(0, 0.15, n),
+        "speaking_time": duration * rng.uniform(0, 1, n),
+        "syllable_count": rng.integers(0, 300, n).astype(float),
+    }
+    return features
+
+
+def test_table_scores_match_build_results():
+    features = random_features(2000)
+    scores = scoring.score_features(features)
+
+    for i in range(len(features["duration"])):
+        row = {name: values[i].item() for name, values in features.items()}
+        row["syllable_count"] = int(row["syllable_count"])
+        for name in ("mean_hnr", "jitter"):
+            if np.isnan(row[name]):
+                row[name] = None
+        expected = build_results(**row)["scores"]
+        assert {name: round(float(scores[name][i]), 2) for name in expected} == expected
+
+
+def test_threshold_overrides(tmp_path):
+    path = tmp_path / "thresholds.json"
+    path.write_text(json.dumps({"fluency": {"pause_ratio_below": [[25, 35]]}}))
+    thresholds = scoring.load_thresholds(str(path))
+
+    assert thresholds["fluency"]["pause_ratio_below"] == [[25, 35]]
+    assert thresholds["confidence"] == scoring.DEFAULT_THRESHOLDS["confidence"]
+    assert scoring.fluency_scores([0, 0], [22, 28], [0, 0], thresholds).tolist() == [85, 50]
+    assert scoring.thresholds_version(thresholds) != scoring.THRESHOLDS_VERSION
+
+    path.write_text(json.dumps({"fluency": {"pause_ratio_under": [[25, 35]]}}))
+    with pytest.raises(ValueError, match="pause_ratio_under"):
+        scoring.load_thresholds(str(path))
+
+
+def test_cached_scores_follow_the_thresholds():
+    assert AnalysisOptions().cache_params()["thresholds"] == scoring.THRESHOLDS_VERSION
+    assert "thresholds" not in AnalysisOptions(features=frozenset({"pitch"})).cache_params()
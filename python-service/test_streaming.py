@@ -0,0 +1,79 @@
+"""
+Tests for incremental streaming analysis and /ws/analyze
+"""
+
+import numpy as np
+import pytest
+from fastapi import WebSocketDisconnect
+
+from streaming import RunningStats, StreamSession, analyze_window, end_session, get_session
+
+
+def test_running_stats_merge_is_exact():
+    rng = np.random.default_rng(0)
+    values = rng.normal(150, 25, size=1000)
+
+    merged = RunningStats()
+    for part in np.array_split(values, 7):
+        merged.merge(RunningStats.from_values(part))
+
+    assert merged.count == len(values)
+    assert np.isclose(merged.mean, np.mean(values))
+    assert np.isclose(merged.std, np.std(values))
+    assert merged.min == np.min(values)
+    assert merged.max == np.max(values)
+
+
+def test_session_covers_every_sample_once():
+    sample_rate = 16000
+    t = np.arange(3 * sample_rate) / sample_rate
+    audio = (0.5 * np.sin(2 * np.pi * 150 * t) * 32767).astype('<i2')
+
+    session = StreamSession(sample_rate, window_seconds=0.5)
+    # Odd-sized messages so frames are split across messages
+    data = audio.tobytes()
+    for i in range(0, len(data), 1001):
+        session.feed(data[i:i + 1001])
+        while session.window_ready():
+            session.merge(analyze_window(*session.next_window()))
+    session.merge(analyze_window(*session.next_window(final=True)))
+
+    summary = session.summary()
+    assert summary is not None
+    assert np.isclose(summary["duration"], 3.0)
+    assert abs(summary["mean_pitch"] - 150) < 2
+    assert session.total_frames > 250
+
+
+def test_reconnect_resumes_only_with_the_same_settings():
+    session = get_session("s1", 16000, "int16", 1, 0.5, "praat")
+    assert get_session("s1", 16000, "int16", 1, 0.5, "praat") is session
+    assert get_session("s1", 16000, "int16", 1, 1.0, "praat").window_size == 16000
+    assert get_session("s1", 16000, "int16", 1, 1.0, "numpy").pitch_backend == "numpy"
+    end_session("s1")
+
+
+def test_websocket_sends_metrics_per_window_and_a_final_summary(client):
+    sample_rate = 16000
+    t = np.arange(int(2.5 * sample_rate)) / sample_rate
+    audio = (0.5 * np.sin(2 * np.pi * 150 * t) * 32767).astype('<i2')
+
+    with client.websocket_connect(f"/ws/analyze/ws-test?sample_rate={sample_rate}&window_seconds=1") as websocket:
+        websocket.send_bytes(audio.tobytes())
+        windows = [websocket.receive_json(), websocket.receive_json()]
+        websocket.send_text('{"type": "end"}')
+        final = websocket.receive_json()
+
+    assert [message["type"] for message in windows] == ["metrics", "metrics"]
+    assert [message["window"] for message in windows] == [1, 2]
+    assert final["type"] == "final" and final["session_id"] == "ws-test"
+    assert final["results"]["duration"] == pytest.approx(2.5)
+    assert final["results"]["pitch"]["mean"] == pytest.approx(150, abs=2)
+
+
+def test_websocket_rejects_bad_settings(client):
+    with client.websocket_connect("/ws/analyze/ws-bad?encoding=mp3") as websocket:
+        assert websocket.receive_json() == {"type": "error", "detail": "Unsupported encoding: mp3"}
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1003
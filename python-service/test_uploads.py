@@ -0,0 +1,71 @@
+"""
+Tests for spooled uploads
+"""
+
+import asyncio
+import os
+import tempfile
+from functools import partial
+
+import pytest
+
+from synthetic import generate_speech_like, to_wav_bytes
+from uploads import UploadTooLarge, open_source, read_upload
+
+
+async def body(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def read(*chunks, **limits):
+    return asyncio.run(read_upload(body(*chunks), **limits))
+
+
+def test_small_uploads_stay_in_memory():
+    upload = read(b"RIFF", b"1234", spool_bytes=100)
+    assert upload.path is None
+    assert upload.source == b"RIFF1234"
+    with open_source(upload.source) as content:
+        assert content == b"RIFF1234"
+    upload.close()
+
+
+def test_large_uploads_are_spooled_and_memory_mapped():
+    chunks = [bytes([i]) * 1000 for i in range(5)]
+    upload = read(*chunks, spool_bytes=2500)
+    path = upload.path
+
+    assert os.path.getsize(path) == 5000
+    assert upload.size == 5000
+    assert upload.content[999:1001] == b"\x00\x01"
+    with open_source(upload.source) as content:
+        assert content[:] == b"".join(chunks)
+
+    upload.close()
+    assert not os.path.exists(path)
+
+
+def test_oversized_uploads_are_rejected_and_cleaned_up(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    with pytest.raises(UploadTooLarge):
+        read(b"x" * 600, b"x" * 600, max_bytes=1000, spool_bytes=500)
+    assert os.listdir(tmp_path) == []
+
+
+def test_endpoints_spool_large_uploads_and_reject_oversized_ones(client, monkeypatch):
+    monkeypatch.setattr("analyze.read_upload", partial(read_upload, max_bytes=200_000, spool_bytes=10_000))
+    spooled = to_wav_bytes(generate_speech_like(1, 16000, seed=6), 16000)
+    oversized = to_wav_bytes(generate_speech_like(8, 16000, seed=6), 16000)
+
+    response = client.post("/analyze", files={"file": ("spooled.wav", spooled, "audio/wav")})
+    assert response.status_code == 200
+    assert response.json()["results"]["duration"] == pytest.approx(1, abs=0.01)
+
+    response = client.post("/analyze", files={"file": ("long.wav", oversized, "audio/wav")})
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Upload is larger than the 200000-byte limit"
+    response = client.post("/analyze/pcm", content=oversized[44:], headers={"X-Sample-Rate": "16000"})
+    assert response.status_code == 413
+    assert client.post("/jobs", files={"file": ("long.wav", oversized, "audio/wav")}).status_code == 413
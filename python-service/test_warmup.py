@@ -0,0 +1,66 @@
+"""
+Tests for worker warm-up and readiness
+"""
+
+import queue
+import time
+
+import workers
+from budget import cost_model
+
+
+def test_worker_reports_its_warm_up():
+    reports = queue.Queue()
+    workers._initialize_worker(reports)
+
+    report = reports.get_nowait()
+    assert "error" not in report
+    assert set(report) == {
+        "pid", "ready_at", "import_seconds", "first_analysis_seconds", "other_paths_seconds", "warm_analysis_seconds"
+    }
+    assert all(report[key] > 0 for key in report if key.endswith("_seconds"))
+    # Calibrated by the warm run alone
+    assert cost_model.calibrated and cost_model.speed != 1.0
+
+
+def test_ready_once_every_worker_has_warmed_up(monkeypatch):
+    reports = queue.Queue()
+    started = time.time()
+    monkeypatch.setattr(workers, "POOL_SIZE", 2)
+    monkeypatch.setattr(workers, "_pool", object())
+    monkeypatch.setattr(workers, "_pool_started", started)
+    monkeypatch.setattr(workers, "_reports", reports)
+    monkeypatch.setattr(workers, "_warm_reports", [])
+    monkeypatch.setattr(workers, "_ready_seconds", None)
+
+    reports.put({"pid": 1, "ready_at": started + 1.0, "import_seconds": 0.5})
+    assert len(workers.collect_warm_up()) == 1
+    assert not workers.pool_ready()
+    assert workers.startup_report()["warm_workers"] == 1
+
+    reports.put({"pid": 2, "ready_at": started + 1.5, "import_seconds": 0.6})
+    workers.collect_warm_up()
+    assert workers.pool_ready()
+    report = workers.startup_report()
+    assert report["ready_seconds"] == 1.5
+    assert report["worker_warm_up"][1] == {"pid": 2, "import_seconds": 0.6}
+
+
+def test_ready_endpoint(client, monkeypatch):
+    # The client's workers skip warm-up, so they report ready as soon as they start
+    deadline = time.monotonic() + 30
+    while (response := client.get("/ready")).status_code != 200 and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["status"] == "ready" and report["import_seconds"] > 0
+    assert report["warm_workers"] == report["workers"] == workers.POOL_SIZE
+
+    # Until every worker has reported
+    monkeypatch.setattr(workers, "_reports", queue.Queue())
+    monkeypatch.setattr(workers, "_warm_reports", [])
+    monkeypatch.setattr(workers, "_ready_seconds", None)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming" and response.headers["retry-after"] == "1"
+    assert client.get("/health").status_code == 200
@@ -0,0 +1,162 @@
+"""
+Tests for in-memory WAV decoding
+Checks that read_wav_bytes matches Praat's own WAV reader
+"""
+
+import mmap
+import struct
+import wave
+
+import numpy as np
+import parselmouth
+import pytest
+from parselmouth.praat import call
+
+import wav_io
+from synthetic import generate_speech_like, to_wav_bytes
+from wav_io import MalformedWav, decode_pcm, parse_wav_header, pcm_wav_info, read_wav_bytes
+
+
+def write_wav(path, audio, sample_rate=48000, sample_width=2):
+    """Write a (samples, channels) float array as integer PCM"""
+    scale = float(1 << (8 * sample_width - 1)) - 1
+    pcm = np.round(audio * scale).astype('<i4')
+
+    if sample_width == 2:
+        data = pcm.astype('<i2').tobytes()
+    else:
+        # 24-bit: keep the low three bytes of each little-endian int32
+        data = pcm.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+
+    with wave.open(str(path), 'w') as wav_file:
+        wav_file.setnchannels(audio.shape[1])
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(data)
+
+
+def synthetic_audio(channels, duration=0.5, sample_rate=48000):
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    tones = [0.5 * np.sin(2 * np.pi * (150 + 50 * c) * t) for c in range(channels)]
+    return np.stack(tones, axis=1)
+
+
+def assert_matches_praat(path):
+    values, sample_rate = read_wav_bytes(path.read_bytes())
+    reference = parselmouth.Sound(str(path))
+
+    assert sample_rate == reference.sampling_frequency
+    assert values.shape == reference.values.shape
+    np.testing.assert_allclose(values, reference.values, atol=1e-9)
+
+
+def test_mono_16bit(tmp_path):
+    path = tmp_path / 'mono.wav'
+    write_wav(path, synthetic_audio(1))
+    assert_matches_praat(path)
+
+
+def test_stereo_16bit(tmp_path):
+    path = tmp_path / 'stereo.wav'
+    write_wav(path, synthetic_audio(2), sample_rate=16000)
+    assert_matches_praat(path)
+
+
+def test_mono_24bit(tmp_path):
+    path = tmp_path / 'mono24.wav'
+    write_wav(path, synthetic_audio(1), sample_width=3)
+    assert_matches_praat(path)
+
+
+def test_rejects_non_wav():
+    with pytest.raises(ValueError):
+        read_wav_bytes(b'OggS' + bytes(100))
+
+
+def truncated_wav(fmt_bytes):
+    """A WAV header cut off fmt_bytes into its 16-byte fmt chunk"""
+    return b"RIFF" + struct.pack('<I', 36) + b"WAVE" + b"fmt " + struct.pack('<I', 16) + bytes(fmt_bytes)
+
+
+@pytest.mark.parametrize("fmt_bytes", [0, 4, 15])
+def test_rejects_truncated_headers(fmt_bytes):
+    with pytest.raises(MalformedWav, match="Truncated fmt chunk"):
+        parse_wav_header(truncated_wav(fmt_bytes))
+
+
+def test_raw_pcm_matches_wav(tmp_path):
+    path = tmp_path / "stereo.wav"
+    write_wav(path, synthetic_audio(2))
+    content = path.read_bytes()
+    header = parse_wav_header(content)
+    pcm = content[header.data_offset:header.data_offset + header.data_size]
+
+    values = decode_pcm(pcm, pcm_wav_info("int16", 48000, 2, len(pcm)))
+    expected, _ = read_wav_bytes(content)
+    assert np.array_equal(values, expected)
+
+    audio = synthetic_audio(1)[:, 0]
+    values = decode_pcm(audio.astype('<f4').tobytes(), pcm_wav_info("float32", 48000, 1, 4 * len(audio)))
+    assert np.allclose(values[0], audio, atol=1e-7)
+
+
+def test_raw_pcm_rejects_partial_frames():
+    with pytest.raises(ValueError):
+        pcm_wav_info("int16", 16000, 2, 6)
+    with pytest.raises(ValueError):
+        pcm_wav_info("int24", 16000, 1, 6)
+
+
+def test_blockwise_decode_from_mmap_into_sound(tmp_path, monkeypatch):
+    monkeypatch.setattr(wav_io, "DECODE_BLOCK_FRAMES", 1000)
+    path = tmp_path / "stereo24.wav"
+    write_wav(path, synthetic_audio(2), sample_width=3)
+    reference = parselmouth.Sound(str(path))
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        info = parse_wav_header(content)
+        sound = call("Create Sound from formula", "upload", 2, 0, reference.duration, 48000, "0")
+        decode_pcm(content, info, out=sound.values)
+
+    assert sound.n_samples == reference.n_samples
+    np.testing.assert_allclose(sound.values, reference.values, atol=1e-9)
+
+
+def test_pcm_endpoint_matches_the_wav_upload(client):
+    speech = generate_speech_like(2, 16000, seed=5)
+    pcm = (np.clip(speech, -1, 1) * 32767).astype('<i2')  # As to_wav_bytes encodes it
+    wav = client.post("/analyze", files={"file": ("chunk.wav", to_wav_bytes(speech, 16000), "audio/wav")}).json()
+
+    response = client.post("/analyze/pcm", content=pcm.tobytes(),
+                           headers={"X-Sample-Rate": "16000", "X-Encoding": "int16"})
+    assert response.status_code == 200
+    assert response.json()["results"] == wav["results"]
+
+    # Settings as query parameters; float32 PCM
+    response = client.post("/analyze/pcm", params={"sample_rate": 16000, "encoding": "float32", "features": "timing"},
+                           content=(pcm / 32767).astype('<f4').tobytes())
+    assert response.status_code == 200
+    assert response.json()["results"]["timing"] == wav["results"]["timing"]
+
+
+def test_pcm_endpoint_rejects_bad_formats(client):
+    for headers in ({}, {"X-Sample-Rate": "fast"}, {"X-Sample-Rate": "16000", "X-Encoding": "int24"},
+                    {"X-Sample-Rate": "16000", "X-Channels": "2"}):
+        assert client.post("/analyze/pcm", content=bytes(3202), headers=headers).status_code == 400
+
+    # Explicit zeros are rejected, not replaced by the headers or defaults
+    for params in ({"sample_rate": 16000, "channels": 0}, {"sample_rate": 0}):
+        response = client.post("/analyze/pcm", params=params, content=bytes(3200), headers={"X-Sample-Rate": "16000"})
+        assert response.status_code == 400
+        assert "must be positive" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("content, status", [
+    (truncated_wav(4), 400),
+    (b"RIFF\x04\x00\x00\x00WAVE", 400),  # No data chunk
+    (b"", 400),
+    (b"hello world" * 50, 415),
+])
+def test_analyze_rejects_malformed_uploads(client, content, status):
+    response = client.post("/analyze", files={"file": ("a.wav", content, "audio/wav")})
+    assert response.status_code == status
@@ -0,0 +1,61 @@
+"""
+Tests for the worker pool and /analyze
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+import workers
+from synthetic import generate_speech_like, to_wav_bytes
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Spawned workers read the environment, not this process's patched module
+    monkeypatch.setenv("ANALYSIS_WARM_UP", "0")
+    monkeypatch.setattr(workers, "POOL_SIZE", 1)
+    workers.shutdown_pool()
+    workers.start_pool()
+    yield
+    workers.shutdown_pool()
+
+
+def test_timed_out_job_does_not_block_the_next_one(pool):
+    async def run():
+        stuck_pid = await workers.run_in_pool(os.getpid)
+        with pytest.raises(asyncio.TimeoutError):
+            await workers.run_in_pool(time.sleep, 60, timeout=0.5)
+
+        started = time.perf_counter()
+        pid = await workers.run_in_pool(os.getpid, timeout=20)
+        return stuck_pid, pid, time.perf_counter() - started
+
+    stuck_pid, pid, seconds = asyncio.run(run())
+    assert pid != stuck_pid
+    assert seconds < 20
+    assert not workers._retired
+    # The worker stuck in the sleep is killed rather than left holding a CPU
+    deadline = time.time() + 5
+    while time.time() < deadline and os.path.exists(f"/proc/{stuck_pid}"):
+        time.sleep(0.05)
+    assert not os.path.exists(f"/proc/{stuck_pid}") or open(f"/proc/{stuck_pid}/stat").read().split()[2] == "Z"
+    assert workers.active_jobs() == 0
+
+
+def test_analyze_endpoint(client):
+    speech = to_wav_bytes(generate_speech_like(2, 16000, seed=1), 16000)
+    response = client.post("/analyze", files={"file": ("chunk.wav", speech, "audio/wav")})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] and body["filename"] == "chunk.wav"
+    assert set(body["results"]) >= {"duration", "pitch", "intensity", "timing", "scores"}
+    assert body["results"]["duration"] == pytest.approx(2, abs=0.01)
+
+    # Not audio, and an unknown option
+    assert client.post("/analyze", files={"file": ("notes.txt", b"hi", "text/plain")}).status_code == 400
+    response = client.post("/analyze", params={"profile": "slowest"}, files={"file": ("chunk.wav", speech, "audio/wav")})
+    assert response.status_code == 400
@@ -0,0 +1,145 @@
+"""
+Bounded-memory upload handling
+Request bodies are streamed into a spooled buffer: small uploads (live
+chunks) stay in memory, larger ones go to a temp file that the service
+and the worker processes memory-map instead of copying
+
+Configuration (environment variables):
+    UPLOAD_MAX_BYTES    Largest accepted upload; larger ones get 413 (default: 1 GB)
+    UPLOAD_SPOOL_BYTES  Uploads larger than this are kept on disk (default: 4 MB)
+"""
+
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator, Optional, Union
+
+from fastapi import UploadFile
+
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", str(1 << 30)))
+UPLOAD_SPOOL_BYTES = int(os.environ.get("UPLOAD_SPOOL_BYTES", str(4 << 20)))
+
+# Bytes read from the request per iteration
+UPLOAD_READ_BYTES = 1 << 20
+
+# What a worker process is given: the upload itself, or the path of its spool file
+Source = Union[bytes, str]
+
+
+class UploadTooLarge(ValueError):
+    """The request body is larger than UPLOAD_MAX_BYTES"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload is larger than the {max_bytes}-byte limit")
+        self.max_bytes = max_bytes
+
+
+class Upload:
+    """
+    A spooled request body
+
+    content is the payload as a bytes-like object: the bytes themselves, or
+    a read-only memory map of the spool file. source is what to pass to a
+    worker process, which reads it with open_source. Call close() when the
+    analysis is done to release the spool file.
+    """
+
+    def __init__(self, content: bytes = b"", path: Optional[str] = None):
+        self.path = path
+        self.content = content
+        if path is not None and os.path.getsize(path) > 0:
+            with open(path, 'rb') as spool:
+                self.content = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def source(self) -> Source:
+        return self.path if self.path is not None else self.content
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+    def close(self) -> None:
+        if isinstance(self.content, mmap.mmap):
+            try:
+                self.content.close()
+            except BufferError:
+                pass  # A view is still alive; the map is released with it
+        self.content = b""
+        if self.path is not None:
+            os.unlink(self.path)
+            self.path = None
+
+
+async def read_upload(chunks: AsyncIterator[bytes], max_bytes: int = UPLOAD_MAX_BYTES,
+                      spool_bytes: int = UPLOAD_SPOOL_BYTES) -> Upload:
+    """
+    Stream a request body into an Upload
+
+    Raises:
+        UploadTooLarge: As soon as more than max_bytes have been received
+    """
+    buffer = bytearray()
+    spool = None
+    size = 0
+
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            if spool is None and size > spool_bytes:
+                spool = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+                spool.write(buffer)
+                buffer = bytearray()
+            if spool is not None:
+                spool.write(chunk)
+            else:
+                buffer += chunk
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+        raise
+
+    if spool is None:
+        return Upload(bytes(buffer))
+    spool.close()
+    return Upload(path=spool.name)
+
+
+async def file_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    """Read a multipart file part piecewise"""
+    while True:
+        chunk = await file.read(UPLOAD_READ_BYTES)
+        if not chunk:
+            return
+        yield chunk
+
+
+@contextmanager
+def open_source(source: Source) -> Iterator[bytes]:
+    """
+    The upload's payload, for use in a worker process
+
+    A spool file is memory-mapped, so pages are read from the page cache
+    as they are decoded rather than copied into the worker up front.
+    """
+    if not isinstance(source, str):
+        yield source
+        return
+
+    with open(source, 'rb') as spool:
+        if os.fstat(spool.fileno()).st_size == 0:
+            yield b""
+            return
+        content = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        yield content
+    finally:
+        try:
+            content.close()
+        except BufferError:
+            pass  # A view escaped (e.g. in a traceback); the map is released with it
@@ -0,0 +1,56 @@
+"""
+Worker warm-up
+Runs in every new worker process before it takes jobs: imports the
+analysis code and analyzes a short synthetic clip through each path the
+service uses, so the imports and Praat's one-time initialization are paid
+at startup instead of by the first real request
+"""
+
+import time
+from typing import Dict
+
+# Length and rate of the synthetic warm-up clip (the rate the live client records at)
+WARM_UP_SECONDS = 1.0
+WARM_UP_SAMPLE_RATE = 48000
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    Warm this process up
+
+    Returns:
+        Seconds spent importing the analysis code ("import_seconds"), on
+        the first default analysis ("first_analysis_seconds"), on the other
+        backends and the streaming path ("other_paths_seconds"), and on a
+        second default analysis once warm ("warm_analysis_seconds")
+    """
+    started = time.perf_counter()
+    import analyze
+    from budget import cost_model
+    from features import AnalysisOptions
+    from streaming import analyze_window
+    from synthetic import generate_speech_like, to_wav_bytes
+    imported = time.perf_counter()
+
+    samples = generate_speech_like(WARM_UP_SECONDS, WARM_UP_SAMPLE_RATE)
+    content = to_wav_bytes(samples, WARM_UP_SAMPLE_RATE)
+    analyze.analyze_audio_bytes(content)
+    first = time.perf_counter()
+
+    analyze.analyze_audio_bytes(
+        content, AnalysisOptions(profile="fast", intensity_backend="numpy", pitch_backend="numpy")
+    )
+    analyze_window(samples, WARM_UP_SAMPLE_RATE, 0.0, None)
+    other = time.perf_counter()
+
+    # Only the warm run calibrates the latency budget's cost model to this machine's speed
+    cost_model.reset()
+    analyze.analyze_audio_bytes(content)
+    warm = time.perf_counter()
+
+    return {
+        "import_seconds": imported - started,
+        "first_analysis_seconds": first - imported,
+        "other_paths_seconds": other - first,
+        "warm_analysis_seconds": warm - other,
+    }
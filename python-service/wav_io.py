@@ -0,0 +1,219 @@
+"""
+In-memory WAV decoding
+Parses the RIFF header and wraps the PCM payload with np.frombuffer,
+so uploads (bytes or a memory-mapped file) can be analyzed without a
+temp-file round-trip
+"""
+
+import struct
+from typing import Callable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Sample frames converted at a time by decode_pcm
+DECODE_BLOCK_FRAMES = 1 << 16
+
+
+# Headerless PCM encodings accepted by /analyze/pcm: (format tag, bits per sample)
+PCM_ENCODINGS = {
+    "int16": (WAVE_FORMAT_PCM, 16),
+    "float32": (WAVE_FORMAT_IEEE_FLOAT, 32),
+}
+
+
+class MalformedWav(ValueError):
+    """A RIFF/WAVE upload whose header cannot be parsed"""
+
+
+class WavInfo(NamedTuple):
+    """Format of the PCM payload and its location in the buffer"""
+    format_tag: int
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    data_offset: int
+    data_size: int
+
+
+def is_wav(content: bytes) -> bool:
+    """Check for a RIFF/WAVE header"""
+    return len(content) >= 12 and content[0:4] == b'RIFF' and content[8:12] == b'WAVE'
+
+
+def parse_wav_header(content: bytes) -> WavInfo:
+    """
+    Walk the RIFF chunks and locate the fmt and data chunks
+
+    Raises:
+        MalformedWav: If the buffer is not a supported WAV file
+    """
+    if not is_wav(content):
+        raise MalformedWav("Not a RIFF/WAVE file")
+
+    fmt = None
+    offset = 12
+    end = len(content)
+
+    while offset + 8 <= end:
+        chunk_id = content[offset:offset + 4]
+        chunk_size, = struct.unpack_from('<I', content, offset + 4)
+        body = offset + 8
+
+        if chunk_id == b'fmt ':
+            if chunk_size < 16:
+                raise MalformedWav("Malformed fmt chunk")
+            if body + min(chunk_size, 40) > end:
+                raise MalformedWav("Truncated fmt chunk")
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack_from('<HHIIHH', content, body)
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # The real format is the first two bytes of the SubFormat GUID
+                format_tag, = struct.unpack_from('<H', content, body + 24)
+            fmt = (format_tag, channels, sample_rate, bits)
+
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise MalformedWav("data chunk found before fmt chunk")
+            # Streaming writers may leave the size as 0 or 0xFFFFFFFF; clamp to what we have
+            data_size = min(chunk_size, end - body) if chunk_size else end - body
+            format_tag, channels, sample_rate, bits = fmt
+            if channels == 0 or sample_rate == 0:
+                raise MalformedWav("Invalid channel count or sample rate")
+            return WavInfo(format_tag, channels, sample_rate, bits, body, data_size)
+
+        # Chunks are padded to an even number of bytes
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise MalformedWav("No data chunk found in WAV file")
+
+
+def pcm_wav_info(encoding: str, sample_rate: int, channels: int, size: int) -> WavInfo:
+    """
+    Describe a headerless little-endian PCM buffer, so decode_pcm can read it
+
+    Raises:
+        ValueError: For an unknown encoding, bad format or partial frames
+    """
+    if encoding not in PCM_ENCODINGS:
+        raise ValueError(f"Unsupported encoding: {encoding} (expected one of {', '.join(PCM_ENCODINGS)})")
+    if sample_rate <= 0 or channels <= 0:
+        raise ValueError("sample_rate and channels must be positive")
+
+    format_tag, bits = PCM_ENCODINGS[encoding]
+    frame = bits // 8 * channels
+    if size == 0 or size % frame:
+        raise ValueError(f"Body must be a non-empty whole number of {frame}-byte frames, got {size} bytes")
+    return WavInfo(format_tag, channels, sample_rate, bits, 0, size)
+
+
+def read_wav_bytes(content: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Decode a WAV buffer into float64 samples scaled to [-1, 1]
+
+    The PCM payload is wrapped with np.frombuffer (no copy); the only
+    allocation is the float64 array that Praat needs anyway.
+
+    Returns:
+        (values, sample_rate) where values has shape (channels, samples)
+    """
+    info = parse_wav_header(content)
+    return decode_pcm(content, info), info.sample_rate
+
+
+def bytes_per_frame(info: WavInfo) -> int:
+    """Bytes per sample frame (one sample for every channel)"""
+    return info.bits_per_sample // 8 * info.channels
+
+
+def iter_pcm_blocks(content: bytes, info: WavInfo, block_frames: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Decode the PCM payload described by info a block of frames at a time
+
+    Args:
+        block_frames: Frames per block (default: DECODE_BLOCK_FRAMES)
+
+    Yields:
+        float64 blocks with shape (channels, frames)
+    """
+    frame_size = bytes_per_frame(info)
+    if frame_size == 0:
+        raise ValueError(f"Unsupported bit depth: {info.bits_per_sample}")
+    n_frames = info.data_size // frame_size
+    block_frames = block_frames or DECODE_BLOCK_FRAMES
+    convert = _converter(info.format_tag, info.bits_per_sample)
+
+    # Format errors are raised here, before the first block is requested
+    def blocks() -> Iterator[np.ndarray]:
+        for first in range(0, n_frames, block_frames):
+            count = min(block_frames, n_frames - first)
+            block = convert(content, info.data_offset + first * frame_size, count * info.channels)
+            # Interleaved frames -> (channels, samples), as parselmouth.Sound expects
+            yield block.reshape(count, info.channels).T
+
+    return blocks()
+
+
+def decode_pcm(content: bytes, info: WavInfo, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Decode the PCM payload described by info into float64 samples
+
+    Samples are converted DECODE_BLOCK_FRAMES at a time, so a memory-mapped
+    recording of any length needs no temporaries beyond one block.
+
+    Args:
+        out: Array of shape (channels, samples) to decode into, e.g. the
+            values of an allocated Praat Sound; allocated when omitted
+
+    Returns:
+        Values with shape (channels, samples)
+    """
+    blocks = iter_pcm_blocks(content, info)
+    if out is None:
+        out = np.empty((info.channels, info.data_size // bytes_per_frame(info)))
+
+    first = 0
+    for block in blocks:
+        out[:, first:first + block.shape[1]] = block
+        first += block.shape[1]
+    return out
+
+
+def _converter(format_tag: int, bits: int) -> Callable[[bytes, int, int], np.ndarray]:
+    """Function reading `count` samples at a byte offset as float64 in [-1, 1]"""
+    if format_tag == WAVE_FORMAT_PCM and bits == 8:
+        def convert(content, offset, count):
+            # 8-bit WAV is unsigned, centred on 128
+            pcm = np.frombuffer(content, dtype=np.uint8, count=count, offset=offset)
+            samples = np.subtract(pcm, 128, dtype=np.float64)
+            samples *= 1.0 / 128
+            return samples
+
+    elif format_tag == WAVE_FORMAT_PCM and bits in (16, 32):
+        dtype = '<i2' if bits == 16 else '<i4'
+
+        def convert(content, offset, count):
+            pcm = np.frombuffer(content, dtype=dtype, count=count, offset=offset)
+            return np.multiply(pcm, 1.0 / (1 << (bits - 1)), dtype=np.float64)
+
+    elif format_tag == WAVE_FORMAT_PCM and bits == 24:
+        def convert(content, offset, count):
+            # No native int24 dtype: sign-extend the 3-byte groups into int32
+            raw = np.frombuffer(content, dtype=np.uint8, count=count * 3, offset=offset)
+            raw = raw.reshape(-1, 3).astype(np.int32)
+            pcm = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+            pcm = np.where(pcm & 0x800000, pcm - (1 << 24), pcm)
+            return np.multiply(pcm, 1.0 / (1 << 23), dtype=np.float64)
+
+    elif format_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        dtype = '<f4' if bits == 32 else '<f8'
+
+        def convert(content, offset, count):
+            return np.frombuffer(content, dtype=dtype, count=count, offset=offset).astype(np.float64)
+
+    else:
+        raise ValueError(f"Unsupported WAV encoding (format {format_tag}, {bits}-bit)")
+
+    return convert
@@ -0,0 +1,261 @@
+"""
+Worker process pool for the speech analysis service
+Runs CPU-heavy Praat analysis off the event loop so one long chunk
+cannot stall other requests (including /health)
+
+Configuration (environment variables):
+    ANALYSIS_WORKERS               Number of worker processes (default: CPU count)
+    ANALYSIS_MAX_TASKS_PER_WORKER  Jobs a worker runs before it is replaced (0 = unlimited)
+    ANALYSIS_TIMEOUT_SECONDS       Per-job timeout in seconds (default: 60)
+    ANALYSIS_WARM_UP               Warm each new worker up before it takes jobs (default: 1, 0 disables; see warmup.py)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+POOL_SIZE = max(1, int(os.environ.get("ANALYSIS_WORKERS", os.cpu_count() or 1)))
+MAX_TASKS_PER_WORKER = int(os.environ.get("ANALYSIS_MAX_TASKS_PER_WORKER", "100"))
+JOB_TIMEOUT_SECONDS = float(os.environ.get("ANALYSIS_TIMEOUT_SECONDS", "60"))
+WARM_UP = os.environ.get("ANALYSIS_WARM_UP", "1") != "0"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_started = 0.0  # Wall-clock time the current pool was created
+_reports: Optional[Any] = None  # Queue the current pool's workers report to once warm
+_warm_reports: List[Dict[str, Any]] = []
+_ready_seconds: Optional[float] = None
+_active_jobs = 0
+_jobs_lock = threading.Lock()
+_awaited: Dict[ProcessPoolExecutor, Set[Future]] = {}  # Jobs per pool that a caller still waits for
+_retired: Set[ProcessPoolExecutor] = set()  # Pools replaced after a timeout, killed once _awaited is empty
+
+
+def _initialize_worker(reports: Any) -> None:
+    """Pool initializer: warm the new worker up, then report it ready"""
+    report: Dict[str, Any] = {"pid": os.getpid()}
+    if WARM_UP:
+        try:
+            from warmup import warm_up  # Imports the analysis code, which imports this module
+            report.update(warm_up())
+        except Exception as e:
+            # A failed warm-up must not break the pool; the worker can still take jobs cold
+            report["error"] = str(e)
+    report["ready_at"] = time.time()
+    reports.put(report)
+
+
+def _new_pool() -> ProcessPoolExecutor:
+    # Spawn (not fork) so workers never inherit the running event loop
+    return ProcessPoolExecutor(
+        max_workers=POOL_SIZE,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=MAX_TASKS_PER_WORKER or None,
+        initializer=_initialize_worker,
+        initargs=(_reports,),
+    )
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Return the shared worker pool, creating it on first use"""
+    global _pool, _pool_started, _reports, _warm_reports, _ready_seconds
+    if _pool is None:
+        _pool_started = time.time()
+        _reports = multiprocessing.get_context("spawn").Queue()
+        _warm_reports = []
+        _ready_seconds = None
+        _pool = _new_pool()
+    return _pool
+
+
+def _start_workers(pool: ProcessPoolExecutor) -> None:
+    # A spawn-context pool starts a worker for each job submitted while none is idle
+    for _ in range(POOL_SIZE):
+        pool.submit(os.getpid)
+
+
+def start_pool() -> None:
+    """Create the pool and start all its workers now, unless it is already running"""
+    if _pool is not None:
+        return
+    _start_workers(get_pool())
+
+
+def _kill_pool(pool: ProcessPoolExecutor) -> None:
+    # Executor has no public way to stop a busy worker, so kill its processes directly
+    for process in list((pool._processes or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _retire_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Replace a pool whose worker is stuck on a timed-out job
+
+    New jobs go to a fresh set of workers at once. The old pool finishes
+    the jobs callers still wait for, then its processes (including the
+    stuck one) are killed, so a hung job holds a CPU for at most one more
+    timeout instead of a worker for good.
+    """
+    global _pool
+    if pool in _retired:
+        return
+    _retired.add(pool)
+    if _pool is pool:
+        # Readiness and warm-up reports carry over: the replacements report to the same queue
+        _pool = _new_pool()
+        _start_workers(_pool)
+    _reap(pool)
+
+
+def _reap(pool: ProcessPoolExecutor) -> None:
+    if pool in _retired and not _awaited.get(pool):
+        _retired.discard(pool)
+        _awaited.pop(pool, None)
+        _kill_pool(pool)
+
+
+def shutdown_pool() -> None:
+    """Stop all worker processes"""
+    global _pool
+    for pool in list(_retired):
+        _kill_pool(pool)
+    _retired.clear()
+    _awaited.clear()
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def collect_warm_up() -> List[Dict[str, Any]]:
+    """
+    Warm-up reports that workers sent since the last call
+
+    Each report holds the worker's pid and the timings from warmup.warm_up.
+    Workers that replace recycled ones report too.
+    """
+    global _ready_seconds
+    reports = []
+    while _reports is not None:
+        try:
+            reports.append(_reports.get_nowait())
+        except queue.Empty:
+            break
+    _warm_reports.extend(reports)
+
+    if _ready_seconds is None and len(_warm_reports) >= POOL_SIZE:
+        _ready_seconds = max(report["ready_at"] for report in _warm_reports[:POOL_SIZE]) - _pool_started
+    return reports
+
+
+def pool_ready() -> bool:
+    """Every worker of the current pool has warmed up (as of the last collect_warm_up)"""
+    return _pool is not None and _ready_seconds is not None
+
+
+def startup_report() -> Dict[str, Any]:
+    """Warm workers, and seconds from creating the pool until all were warm (None until then)"""
+    return {
+        "workers": POOL_SIZE,
+        "warm_workers": min(POOL_SIZE, len(_warm_reports)),
+        "ready_seconds": round(_ready_seconds, 3) if _ready_seconds is not None else None,
+        "worker_warm_up": [
+            {key: round(value, 3) if isinstance(value, float) else value
+             for key, value in report.items() if key != "ready_at"}
+            for report in _warm_reports
+        ],
+    }
+
+
+def active_jobs() -> int:
+    """Jobs submitted to the pool that have not finished"""
+    return _active_jobs
+
+
+def queue_depth() -> int:
+    """Jobs waiting for a free worker process"""
+    return max(0, _active_jobs - POOL_SIZE)
+
+
+def _job_done(_future: Future) -> None:
+    global _active_jobs
+    with _jobs_lock:
+        _active_jobs -= 1
+
+
+def reset_peak_memory() -> None:
+    """Restart peak resident memory tracking for this process (Linux only)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_memory() -> Optional[int]:
+    """Peak resident memory of this process in bytes, or None if unknown"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def run_measured(func: Callable[..., Any], *args: Any) -> Tuple[Any, Optional[int]]:
+    """
+    Call func(*args) in a worker and also return the worker's peak memory
+
+    A worker runs one job at a time, so its peak during the call is the
+    job's peak (including the interpreter and Praat, not just the audio).
+    """
+    reset_peak_memory()
+    result = func(*args)
+    return result, peak_memory()
+
+
+async def run_in_pool(func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+    """
+    Run func(*args) in a worker process and await the result
+
+    A job that times out keeps running in its worker, so the pool is
+    retired (see _retire_pool) and later jobs do not queue behind it.
+
+    Raises:
+        asyncio.TimeoutError: If the job exceeds the timeout
+    """
+    global _active_jobs
+    timeout = JOB_TIMEOUT_SECONDS if timeout is None else timeout
+
+    pool = get_pool()
+    try:
+        future = pool.submit(func, *args)
+    except BrokenProcessPool:
+        shutdown_pool()
+        raise
+    with _jobs_lock:
+        _active_jobs += 1
+    future.add_done_callback(_job_done)
+    awaited = _awaited.setdefault(pool, set())
+    awaited.add(future)
+
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+    except asyncio.TimeoutError:
+        _retire_pool(pool)
+        raise
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); replace the pool so later jobs still run
+        if pool is _pool:
+            shutdown_pool()
+        raise
+    finally:
+        awaited.discard(future)
+        _reap(pool)